@@ -0,0 +1 @@
+``manage changelog``: only parse the part of each changelog that we need, instead of the whole history of the package.
@@ -0,0 +1,2 @@
+``manage changelog``: get the changelogs of all changed packages at the same time, reusing connections.
+Use the new ``--workers`` option to set the maximum number of concurrent requests.
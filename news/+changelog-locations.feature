@@ -0,0 +1,3 @@
+``manage changelog``: remember where the changelog of each package is, and which packages have none.
+The next time we try that location first.
+Pass ``--no-cache`` to look in all locations again.
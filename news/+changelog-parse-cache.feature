@@ -0,0 +1,2 @@
+``manage changelog``: keep parsed changelogs in the cache, so we only parse a changelog again when it has changed.
+At the end we print how many changelogs we found in the cache.
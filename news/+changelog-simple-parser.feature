@@ -0,0 +1,2 @@
+``manage changelog``: parse restructuredtext changelogs without docutils when they have the usual layout of version headings, headings like ``Bug fixes:``, and bullet lists.
+This is a lot faster.  Other changelogs are still parsed with docutils.
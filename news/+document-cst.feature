@@ -0,0 +1,2 @@
+Read and parse each buildout, mxdev and constraints file once, into a document that keeps comments and layout.
+The config views and all edits now work on this document.
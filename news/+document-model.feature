@@ -0,0 +1,2 @@
+Changing versions and checkouts is faster for big files.
+We index the lines once, and lines that we do not change are kept exactly as they were.
@@ -0,0 +1,3 @@
+``manage report`` and ``manage jenkins``: add ``--forge=github`` option.
+This asks the GitHub GraphQL api for the tags and recent commits of many packages at once, and only clones a package when that is not enough.
+This needs a ``GITHUB_TOKEN`` environment variable.
@@ -0,0 +1,3 @@
+``manage changelog``: keep downloaded ``versions.cfg`` and changelog files in a cache.
+Files of Plone releases are never downloaded again, other files only when they have changed.
+Add ``--offline`` option to only use the cache.
@@ -0,0 +1,2 @@
+Keep ignored commits in a sqlite database, .package_ignores.sqlite, with a history per package.
+The database is opened once per run and written atomically. Commits from the old .package_ignores json file are copied over once.
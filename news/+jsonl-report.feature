@@ -0,0 +1,2 @@
+The report and jenkins commands accept --format=jsonl.
+They then print one line of JSON per package as soon as it has been checked, with the pinned version, latest tag, commits, checkout status, third-party flag, and scan time.
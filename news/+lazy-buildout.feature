@@ -0,0 +1,2 @@
+The coredev buildout files are now read on first use instead of when the manage command starts.
+The commands that use them take a --coredev-dir option.
@@ -0,0 +1,2 @@
+The manage command now imports only the module of the command that you run.
+Quick commands like get-package-version no longer import git, or the GitHub and PyPI support.
@@ -0,0 +1,2 @@
+Buildout files now have one parsed copy of their values.
+Interpolation happens lazily on the same values, and each result is remembered.
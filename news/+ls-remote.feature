@@ -0,0 +1,3 @@
+When checking a package for updates, first ask the remote for its branches and tags with ``git ls-remote``.
+When the branch is still at the pinned version, we skip cloning the package.
+Otherwise we fetch commits and tags, but no file contents.
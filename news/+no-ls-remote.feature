@@ -0,0 +1,2 @@
+The report, jenkins and checkPackageForUpdates commands accept --no-ls-remote.
+Use it when git ls-remote is slow or blocked for a host.
@@ -0,0 +1,3 @@
+Look up packages in versions, constraints, sources and checkouts files by their normalized name, like pip does.
+So ``plone.app.foo``, ``plone_app.foo`` and ``Plone-App-Foo`` are the same package.
+The lookup table is kept until the file or the data changes.
@@ -0,0 +1,2 @@
+All file objects in a process share one parsed copy of each file, which is reused until the file changes.
+Set the PLONE_RELEASER_PARSE_STATS environment variable to see how often each file was parsed.
@@ -0,0 +1,4 @@
+Keep the repositories of checked packages in a cache, by default in ``~/.cache/plone.releaser/repos``.
+Later runs of ``manage report`` and ``manage jenkins`` only fetch new commits.
+Pass ``--no-cache`` to use temporary clones like before.
+Add ``manage cache-prune`` to remove the least recently used repositories from the cache.
@@ -0,0 +1,4 @@
+The report command keeps a journal of the packages that it has checked, in .report_journal.jsonl in the coredev directory.
+Pass --resume to skip the packages that were done, and retry the ones that failed.
+Failed clones are retried with exponential backoff, also with one worker.
+Use --retries and --backoff to change this.
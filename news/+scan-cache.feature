@@ -0,0 +1,2 @@
+The report and jenkins commands remember the scan result of each package. They reuse it while the branch head, the pinned version and the ignored commit stay the same.
+Pass --full to check all packages again.
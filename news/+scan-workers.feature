@@ -0,0 +1,3 @@
+``manage report`` and ``manage jenkins``: add ``--workers`` and ``--per-host`` options to clone and check several packages at the same time.
+Failing clones are retried with an increasing delay per host.
+Questions and commits still happen one package at a time.
@@ -0,0 +1,2 @@
+Add a manage serve command. It keeps parsed files in memory and answers on a Unix socket.
+When PLONE_RELEASER_SOCKET is set, the quick file commands are sent to this server. If no server is listening, they run as usual.
@@ -0,0 +1,3 @@
+Add ``manage set-package-versions`` command.
+This reads version pins from a file, or from standard input with ``-``, and writes each versions and constraints file only once.
+With ``--commit`` all changes end up in a single commit.
@@ -0,0 +1,4 @@
+The report and jenkins commands time each phase of checking a package: reading the configuration, scanning, cloning or fetching, git describe, walking commits, questions, and sleeping.
+They also count the bytes fetched and commits walked.
+Pass --timings to print a summary with p50 and p95 per phase and the slowest packages.
+Pass --trace with a file name to write a Chrome trace event file.
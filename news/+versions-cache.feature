@@ -0,0 +1,2 @@
+Keep the parsed versions of a ``versions.cfg`` file until the file, or one of the files that it extends, changes.
+Files that are extended several times are only parsed once.
@@ -1,38 +1,161 @@
+from .utils import normalize_name
+from collections import Counter
 from collections import UserDict
+from functools import cached_property
 
 import pathlib
 
+# When this environment variable is set, manage reports how often each file
+# has been parsed.
+PARSE_STATS_VARIABLE = "PLONE_RELEASER_PARSE_STATS"
+# Parsed files, shared by all file objects in this process.
+# Map from (resolved path, parse function) to (file signature, document).
+PARSED_FILES = {}
+# Map from resolved path to the number of times that we have parsed it.
+PARSE_COUNTS = Counter()
+
+
+def get_parsed_file(path, parse, signature):
+    """Return the parsed document of a file, or None.
+
+    We only return it when the file has not changed since we parsed it.
+    """
+    if signature is None:
+        return None
+    cached = PARSED_FILES.get((path, parse))
+    if cached is None or cached[0] != signature:
+        return None
+    return cached[1]
+
+
+def forget_parsed_file(path):
+    """Forget the parsed documents of a file, for example after writing it."""
+    for key in [key for key in PARSED_FILES if key[0] == path]:
+        del PARSED_FILES[key]
+
+
+def parse_report():
+    """Return a report of how often we have parsed each file."""
+    lines = [f"Parsed files: {sum(PARSE_COUNTS.values())} parses."]
+    for path, count in PARSE_COUNTS.most_common():
+        lines.append(f"{count:5d} {path}")
+    return "\n".join(lines)
+
 
 class BaseFile(UserDict):
     def __init__(self, file_location):
         self.file_location = file_location
         self.path = pathlib.Path(self.file_location).resolve()
 
+    # Attributes that we compute from the file, and forget in invalidate.
+    cached_names = ("document", "_document_signature")
+
     @property
     def data(self):
         raise NotImplementedError
 
+    def parse_document(self, text):
+        """Return a Document for the text of the file."""
+        raise NotImplementedError
+
+    @cached_property
+    def document(self):
+        """The contents of the file as a Document.
+
+        We read and parse the file once per process, and again after
+        it has changed.  Other objects for the same file share the result.
+        """
+        # The same file may be parsed in different ways, depending on the class.
+        parse = type(self).parse_document
+        signature = self.file_signature()
+        document = get_parsed_file(self.path, parse, signature)
+        if document is None:
+            document = self.parse_document(self.path.read_text())
+            PARSE_COUNTS[self.path] += 1
+            PARSED_FILES[(self.path, parse)] = (signature, document)
+        self._document_signature = signature
+        return document
+
+    def file_signature(self):
+        """Return the modification time and size of the file.
+
+        This is None when the file does not exist.
+        """
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def invalidate(self):
+        """Forget what we have read from the file."""
+        for name in self.cached_names:
+            vars(self).pop(name, None)
+
+    def refresh(self):
+        """Forget what we have read when the file has changed since then."""
+        if "_document_signature" not in vars(self):
+            return
+        if self._document_signature != self.file_signature():
+            self.invalidate()
+
+    def save_document(self):
+        """Write the document when we have changed it.
+
+        Returns True when the file has changed.
+        """
+        document = self.document
+        if not document.is_modified():
+            return False
+        self.write_text(document.text())
+        self.invalidate()
+        return True
+
+    def write_text(self, contents):
+        """Write the file, and let other objects parse it again."""
+        self.path.write_text(contents)
+        forget_parsed_file(self.path)
+
+    def _lookup(self, package_name):
+        """Return the data, and the actual key of the package in it.
+
+        The key is None when the package is not there.
+        We get the data only once.  We build the index again when
+        the data is a different object, so when the file has changed,
+        or the data has been set.
+        """
+        data = self.data
+        cached = vars(self).get("_index")
+        if cached is None or cached[0] is not data:
+            index = {normalize_name(key): key for key in data}
+            cached = self._index = (data, index)
+        return data, cached[1].get(normalize_name(package_name))
+
     @property
-    def lowerkeys(self):
-        # Map from lower case key to actual key in the data.
-        return {key.lower(): key for key in self.data}
+    def index(self):
+        """Map from normalized name to actual key in the data.
+
+        We normalize like PEP 503, so 'Plone.App-Foo' finds 'plone_app.foo'.
+        """
+        self._lookup("")
+        return self._index[1]
 
     def __iter__(self):
         return self.data.__iter__()
 
     def __contains__(self, package_name):
-        return package_name.lower() in self.lowerkeys
+        return self._lookup(package_name)[1] is not None
 
     def __getitem__(self, package_name):
         # self.data may be a defaultdict, so we cannot use
         # 'return self.data[package_name]'
-        if package_name not in self:
+        data, actual_key = self._lookup(package_name)
+        if actual_key is None:
             raise KeyError(package_name)
-        # The package_name is in the data, but the case might differ.
-        if package_name in self.data:
-            return self.data[package_name]
-        actual_key = self.lowerkeys[package_name.lower()]
-        return self.data[actual_key]
+        # The package_name is in the data, but the spelling might differ.
+        if package_name in data:
+            return data[package_name]
+        return data[actual_key]
 
     def __setitem__(self, package_name, value):
         """Set item to value.
@@ -46,9 +169,10 @@ class BaseFile(UserDict):
         return self.__setitem__(package_name, False)
 
     def get(self, package_name, default=None):
-        if package_name in self:
+        try:
             return self.__getitem__(package_name)
-        return default
+        except KeyError:
+            return default
 
     def set(self, package_name, value):
         return self.__setitem__(package_name, value)
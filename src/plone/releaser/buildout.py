@@ -1,20 +1,25 @@
 from .base import BaseFile
 from .base import Source
+from .document import Config
+from .document import IniDocument
+from .document import InterpolatingConfig
 from .utils import buildout_marker_to_pip_marker
-from .utils import update_contents
+from .utils import normalize_name
 from collections import defaultdict
 from collections import OrderedDict
-from configparser import ConfigParser
-from configparser import ExtendedInterpolation
 from functools import cached_property
 from textwrap import indent
 
 import os
 import pathlib
-import re
 import sys
 
 
+def checkout_line_key(line):
+    """Return the normalized package name on a line of auto-checkout."""
+    return normalize_name(line.strip()) or None
+
+
 class BaseBuildoutFile(BaseFile):
     def __init__(self, file_location, with_markers=False, read_extends=False):
         self.file_location = file_location
@@ -23,15 +28,26 @@ class BaseBuildoutFile(BaseFile):
         self.markers = set()
         self.read_extends = read_extends
 
+    # CheckoutsFile caches its data on the instance as well.
+    cached_names = BaseFile.cached_names + (
+        "config",
+        "raw_config",
+        "data",
+        "_cached_data",
+    )
+
+    def parse_document(self, text):
+        # For versions.cfg we had strict=False, for the others not.
+        # Let's use it always: later options with the same name win.
+        # Preserve the case instead of the default lowercase transform.
+        # When editing, we find the line of a package however its name
+        # is written, like we do when reading.
+        return IniDocument(text, filename=self.file_location, option_key=normalize_name)
+
     @cached_property
     def config(self):
-        # For versions.cfg we had strict=False, for the others not.
-        # Let's use it always.
-        config = ConfigParser(interpolation=ExtendedInterpolation(), strict=False)
-        # Preserve the case instead of the default lowercase transform:
-        config.optionxform = str
-        with self.path.open() as f:
-            config.read_file(f)
+        # The values of our document, interpolated when they are asked for.
+        config = InterpolatingConfig(self.document.values)
         # Especially in sources.cfg we may need to define a few extra variables
         # that are in a different buildout file that we do not parse here.
         # See this similar issue in mr.roboto:
@@ -44,14 +60,9 @@ class BaseBuildoutFile(BaseFile):
 
     @cached_property
     def raw_config(self):
-        # Read the same data, but without interpolation.
+        # The same values, but without interpolation.
         # So keep a url like '${settings:plone}/package.git'
-        config = ConfigParser(strict=False)
-        # Preserve the case instead of the default lowercase transform:
-        config.optionxform = str
-        with self.path.open() as f:
-            config.read_file(f)
-        return config
+        return Config(self.document.values)
 
     @property
     def extends(self):
@@ -67,6 +78,24 @@ class BaseBuildoutFile(BaseFile):
         self._extends = values
 
 
+# VersionsFiles that are extended by others, per path and with_markers.
+EXTENDED_FILES = {}
+
+
+def get_extended_file(path, with_markers=False):
+    """Get a VersionsFile that is extended by another one.
+
+    We keep one per resolved path, so a file that is extended several
+    times is only parsed once, and again when it changes.
+    """
+    key = (pathlib.Path(path).resolve(), with_markers)
+    if key not in EXTENDED_FILES:
+        EXTENDED_FILES[key] = VersionsFile(
+            key[0], with_markers=with_markers, read_extends=True
+        )
+    return EXTENDED_FILES[key]
+
+
 class VersionsFile(BaseBuildoutFile):
     @property
     def data(self):
@@ -93,25 +122,28 @@ class VersionsFile(BaseBuildoutFile):
         if hasattr(self, "_data"):
             # Our setter has been called, presumably in preparation for a rewrite.
             return self._data
+        # We keep the data until the file, or one of the extended files,
+        # has changed.
+        self.refresh()
+        extended_data = tuple(extended.data for extended in self.extended_files)
+        cached = vars(self).get("_cached_data")
+        if (
+            cached is not None
+            and len(cached[0]) == len(extended_data)
+            and all(old is new for old, new in zip(cached[0], extended_data))
+        ):
+            return cached[1]
         versions = defaultdict(dict)
         if self.config.has_section("buildout"):
             # https://github.com/plone/plone.releaser/issues/42
             self.config["buildout"]["directory"] = os.getcwd()
-            if self.read_extends:
-                # Recursively read the extended files, and include their versions.
-                for extend in self.extends:
-                    # TODO: support downloading
-                    assert not extend.startswith("http")
-                    extended = VersionsFile(
-                        self.path.parent / extend,
-                        with_markers=self.with_markers,
-                        read_extends=True,
-                    )
-                    for package, version in extended.data.items():
-                        if not isinstance(version, dict):
-                            versions[package][""] = version
-                        else:
-                            versions[package].update(version)
+            # Include the versions of the extended files.
+            for extended in extended_data:
+                for package, version in extended.items():
+                    if not isinstance(version, dict):
+                        versions[package][""] = version
+                    else:
+                        versions[package].update(version)
 
         for section in self.config.sections():
             if section == "versions":
@@ -133,60 +165,62 @@ class VersionsFile(BaseBuildoutFile):
             if len(version) == 1 and "" in version.keys():
                 versions[package] = version[""]
                 continue
+        self._cached_data = (extended_data, versions)
         return versions
 
     @data.setter
     def data(self, versions):
         self._data = versions
 
-    def __setitem__(self, package_name, new_version):
-        changed = False
-        contents = self.path.read_text()
-        if not contents.endswith("\n"):
-            # Make sure the file ends with a newline.
-            contents += "\n"
-            self.path.write_text(contents)
-            changed = True
+    @property
+    def extended_files(self):
+        """Return the VersionsFiles that we extend.
 
+        This is empty unless we read the extends.
+        """
+        if not self.read_extends:
+            return []
+        self.refresh()
+        if not self.config.has_section("buildout"):
+            return []
+        extended_files = []
+        for extend in self.extends:
+            # TODO: support downloading
+            assert not extend.startswith("http")
+            extended_files.append(
+                get_extended_file(self.path.parent / extend, self.with_markers)
+            )
+        return extended_files
+
+    def __setitem__(self, package_name, new_version):
+        self.refresh()
+        document = self.document
         if isinstance(new_version, tuple):
             new_version, marker = new_version
-            section = f"[versions:{marker}]"
-            if marker not in self.markers:
-                contents = f"{contents}\n{section}\n"
-                self.path.write_text(contents)
-                changed = True
+            section = f"versions:{marker}"
+            document.add_section(section)
         else:
-            section = "[versions]"
+            section = "versions"
         newline = f"{package_name} = {new_version}"
-        # Search case insensitively.
-        line_reg = re.compile(rf"^{package_name} *=.*", flags=re.I)
-
-        def line_check(line):
-            # Look for the 'package name = version' on a line of its own,
-            # no whitespace in front.  Maybe whitespace in between.
-            return line_reg.match(line)
-
-        def start_check(line):
-            # If we see this line, we start trying to match.
-            return line == section
-
-        def stop_check(line):
-            # If we see this line, we should stop trying to match.
-            return line.startswith("[")
-
-        # set version in contents.
-        new_contents = update_contents(
-            contents,
-            line_check,
-            newline,
-            self.file_location,
-            start_check=start_check,
-            stop_check=stop_check,
-        )
-        if contents != new_contents:
-            self.path.write_text(new_contents)
-            changed = True
-        return changed
+        document.set(normalize_name(package_name), newline, section=section)
+        return self.save_document()
+
+    def update_many(self, versions):
+        """Set several versions at once.
+
+        'versions' is a dictionary from package name to version.
+        We read and write the file only once.
+        Environment markers are not supported here: we only change
+        the [versions] section.
+
+        Returns True when the file has changed.
+        """
+        self.refresh()
+        document = self.document
+        for package_name, new_version in versions.items():
+            newline = f"{package_name} = {new_version}"
+            document.set(normalize_name(package_name), newline, section="versions")
+        return self.save_document()
 
     def rewrite(self):
         """Rewrite the file based on the parsed data.
@@ -229,7 +263,7 @@ class VersionsFile(BaseBuildoutFile):
 
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def extends_to_pip(self):
         """Translate our extends data to pip.
@@ -406,7 +440,7 @@ class SourcesFile(BaseBuildoutFile):
 
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def to_pip(self, pip_path):
         """Overwrite mxdev/pip sources file with our data.
@@ -459,29 +493,20 @@ class CheckoutsFile(BaseBuildoutFile):
             mapping[package] = True
         return mapping
 
-    def __setitem__(self, package_name, enabled=True):
-        changed = False
-        contents = self.path.read_text()
-        if not contents.endswith("\n"):
-            # Make sure the file ends with a newline.
-            contents += "\n"
-            self.path.write_text(contents)
-            changed = True
-
-        def line_check(line):
-            # Look for the package name on a line of its own,
-            # with likely whitespace in front.
-            return line.strip().lower() == package_name.lower()
+    def parse_document(self, text):
+        # Look for the package name on a line of its own,
+        # with likely whitespace in front.
+        return IniDocument(text, checkout_line_key, self.file_location)
 
+    def __setitem__(self, package_name, enabled=True):
+        self.refresh()
+        document = self.document
         # add or remove the package name from the contents.
-        newline = f"    {package_name}" if enabled else None
-        new_contents = update_contents(
-            contents, line_check, newline, self.file_location
-        )
-        if contents != new_contents:
-            self.path.write_text(new_contents)
-            changed = True
-        return changed
+        if enabled:
+            document.set(normalize_name(package_name), f"    {package_name}")
+        else:
+            document.remove(normalize_name(package_name))
+        return self.save_document()
 
     def set(self, package_name, new_version):
         # This method makes no sense for this class.
@@ -500,7 +525,7 @@ class CheckoutsFile(BaseBuildoutFile):
             contents.append(f"    {package}")
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def to_pip(self, pip_path):
         """Overwrite mxdev/pip checkouts file with our data.
@@ -528,15 +553,23 @@ class CheckoutsFile(BaseBuildoutFile):
 
 
 class Buildout:
+    """The files of a Plone core development buildout.
+
+    The file names are relative to 'coredev_dir', by default the current
+    directory.  We only read the files when we need them.
+    """
+
     def __init__(
         self,
         sources_file="sources.cfg",
         checkouts_file="checkouts.cfg",
         versions_file="versions.cfg",
+        coredev_dir=None,
     ):
-        self.sources = SourcesFile(sources_file)
-        self.versions = VersionsFile(versions_file)
-        self.checkouts = CheckoutsFile(checkouts_file)
+        self.coredev_dir = pathlib.Path(coredev_dir or os.getcwd()).resolve()
+        self.sources = SourcesFile(self.coredev_dir / sources_file)
+        self.versions = VersionsFile(self.coredev_dir / versions_file)
+        self.checkouts = CheckoutsFile(self.coredev_dir / checkouts_file)
 
     def add_to_checkouts(self, package_name):
         return self.checkouts.add(package_name)
@@ -549,3 +582,27 @@ class Buildout:
 
     def set_version(self, package_name, new_version):
         return self.versions.set(package_name, new_version)
+
+
+# The coredev directory that get_buildout uses, see set_coredev_dir.
+coredev_dir = None
+# Buildout per resolved coredev directory.
+BUILDOUTS = {}
+
+
+def set_coredev_dir(path):
+    """Use the buildout in this directory.  Pass None for the current one."""
+    global coredev_dir
+    coredev_dir = path
+
+
+def get_buildout(path=None):
+    """Get the Buildout in a directory.
+
+    By default this is the directory from set_coredev_dir,
+    or else the current directory.  We create it on first use.
+    """
+    path = pathlib.Path(path or coredev_dir or os.getcwd()).resolve()
+    if path not in BUILDOUTS:
+        BUILDOUTS[path] = Buildout(coredev_dir=path)
+    return BUILDOUTS[path]
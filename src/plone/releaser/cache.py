@@ -0,0 +1,180 @@
+"""On-disk cache for data that is expensive to fetch.
+
+By default the cache is in ~/.cache/plone.releaser.
+You can override this with the PLONE_RELEASER_CACHE_DIR environment variable.
+"""
+
+from plone.releaser.download import write_atomic
+from plone.releaser.utils import parse_size
+from shutil import rmtree
+
+import git
+import os
+import pathlib
+import pickle
+import threading
+
+CACHE_DIR_VARIABLE = "PLONE_RELEASER_CACHE_DIR"
+# Default maximum size of the repository cache.
+DEFAULT_MAX_SIZE = "2G"
+# Depth of the first fetch of a branch.
+FETCH_DEPTH = 100
+# File in each repository that we touch whenever we use it.
+LAST_USED = "plone-releaser-last-used"
+# Change this when ScanResult changes, so we do not use old scan results.
+SCAN_VERSION = 2
+
+
+def get_cache_dir(*parts):
+    """Return the cache directory, or a sub directory of it.
+
+    The directory is created if it does not exist yet.
+    """
+    base = os.environ.get(CACHE_DIR_VARIABLE)
+    if not base:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+        base = os.path.join(xdg_cache, "plone.releaser")
+    path = pathlib.Path(base).expanduser().joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_size(path):
+    """Return the total size in bytes of all files in a directory."""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                # The file may have been removed in the meantime.
+                pass
+    return total
+
+
+class RepoCache:
+    """Cache of bare git repositories, one per package.
+
+    The first time we see a package, we fetch the last commits of its branch.
+    After that we only fetch new commits.  Tags that point into the fetched
+    history are fetched along automatically.  We never fetch file contents.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = get_cache_dir("repos")
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def repo_path(self, name):
+        return self.path / f"{name}.git"
+
+    def get_repo(self, source):
+        """Get an up-to-date bare repository for this source."""
+        path = self.repo_path(source.name)
+        if path.exists():
+            repo = git.Repo(path)
+            if repo.remotes.origin.url != source.url:
+                repo.remotes.origin.set_url(source.url)
+        else:
+            repo = git.Repo.init(path, bare=True)
+            repo.create_remote("origin", source.url)
+            # Make this a partial clone: we only need the commits and tags,
+            # not the file contents.
+            with repo.config_writer() as writer:
+                writer.set_value("core", "repositoryformatversion", "1")
+                writer.set_value("extensions", "partialClone", "origin")
+                writer.set_value('remote "origin"', "promisor", "true")
+                writer.set_value('remote "origin"', "partialclonefilter", "blob:none")
+        branch = source.branch
+        refspec = f"+refs/heads/{branch}:refs/heads/{branch}"
+        try:
+            repo.commit(f"refs/heads/{branch}")
+        except (git.exc.BadName, ValueError):
+            # We do not have this branch yet.
+            repo.git.fetch(f"--depth={FETCH_DEPTH}", "origin", refspec)
+        else:
+            repo.git.fetch("origin", refspec)
+        # Make sure 'git describe' looks at the right branch.
+        repo.git.symbolic_ref("HEAD", f"refs/heads/{branch}")
+        (path / LAST_USED).touch()
+        return repo
+
+    def entries(self):
+        """Return list of (last used time, size, path), least recently used first."""
+        entries = []
+        for path in self.path.glob("*.git"):
+            try:
+                last_used = (path / LAST_USED).stat().st_mtime
+            except OSError:
+                last_used = path.stat().st_mtime
+            entries.append((last_used, get_size(path), path))
+        return sorted(entries)
+
+    def prune(self, max_size=DEFAULT_MAX_SIZE):
+        """Remove least recently used repositories until we are below max_size.
+
+        max_size can be a number of bytes, or a string like '500M' or '2G'.
+        Returns the list of removed paths.
+        """
+        max_size = parse_size(max_size)
+        entries = self.entries()
+        total = sum(size for last_used, size, path in entries)
+        removed = []
+        for last_used, size, path in entries:
+            if total <= max_size:
+                break
+            rmtree(path)
+            total -= size
+            removed.append(path)
+        return removed
+
+
+class ScanCache:
+    """Results of earlier scans of packages.
+
+    We store the last ScanResult of each package as a pickle in the cache
+    directory, together with its key.  The key contains everything that
+    the result depends on: the package name, the url and branch of the
+    source, the commit at the head of the branch, a hash of the tags,
+    the pinned version, and the ignored commit.  When the key is the same,
+    so is the result.  We count the hits and misses, also when scanning
+    in several threads.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = get_cache_dir("scans")
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def result_path(self, name):
+        return self.path / f"{name}.pickle"
+
+    def get(self, key):
+        """Get the scan result for this key, or None when we do not have it."""
+        try:
+            with self.result_path(key[0]).open("rb") as pickled:
+                version, stored_key, result = pickle.load(pickled)
+        except Exception:
+            # Not there, or a broken file.
+            version = stored_key = result = None
+        with self._lock:
+            if version != SCAN_VERSION or stored_key != key:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return result
+
+    def set(self, key, result):
+        data = (SCAN_VERSION, key, result)
+        write_atomic(
+            self.result_path(key[0]),
+            pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    def stats(self):
+        return f"Scan cache: {self.hits} hits, {self.misses} misses."
@@ -1,35 +1,84 @@
 from collections import defaultdict
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from docutils.core import publish_doctree
 from itertools import product
 from packaging.version import InvalidVersion
 from packaging.version import parse
-from plone.releaser.buildout import Buildout
+from plone.releaser.buildout import get_buildout
+from plone.releaser.cache import get_cache_dir
+from plone.releaser.download import close_connections
+from plone.releaser.download import fetch
+from plone.releaser.download import HTTPCache
+from plone.releaser.download import NOT_CACHED
+from plone.releaser.download import set_cache
+from plone.releaser.download import write_atomic
 from plone.releaser.release import HEADINGS
 from plone.releaser.release import OLD_HEADING_MAPPING
-from urllib.request import urlopen
 
+import hashlib
+import json
+import os
+import pathlib
+import pickle
 import re
+import string
+import time
 
 DIST_URL = "https://dist.plone.org/release/{0}/versions.cfg"
 MD_HEADING_RE = re.compile(r"## (\S*).*")
 MD_SUB_HEADING_RE = re.compile(r"### (.*)")
-buildout = Buildout()
+# Maximum number of concurrent requests when getting changelogs.
+DEFAULT_WORKERS = 16
+# How long we remember that a package has no changelog, in seconds.
+MISSING_CHANGELOG_TTL = 24 * 60 * 60
+# Version of the changelog parsers.  Increase this when the parsed data
+# changes, so we do not use old data from the ChangelogCache.
+PARSER_VERSION = 2
+# Marker for a package without changelog.
+MISSING = object()
+# Characters that can be used for underlining a section title.
+RST_UNDERLINE_CHARACTERS = string.punctuation
+# Characters that can start a bullet list item.
+RST_BULLETS = "-*+"
+# Start of a bullet or enumerated list item.
+RST_LIST_RE = re.compile(r"([-*+]|\(?(\d+|[a-zA-Z#]|[ivxlcdmIVXLCDM]+)[.)])( |$)")
+# Start of a line that is not a plain paragraph for docutils, like a
+# directive, comment, field list, option list, line block or doctest.
+RST_SPECIAL_RE = re.compile(
+    r"\.\.( |$)|[-:|+\[]|>>>|\(?(\d+|[a-zA-Z#]|[ivxlcdmIVXLCDM]+)[.)]( |$)"
+)
+
+
+def is_release(version_number):
+    """Is this a final Plone release, whose files never change?
+
+    Something like '6.0-dev' can still change.
+    """
+    try:
+        version = parse(version_number)
+    except InvalidVersion:
+        return False
+    return not version.is_devrelease
 
 
 def pull_versions(version_number):
     package_versions = OrderedDict()
     if version_number == "here":
         url = "versions.cfg"
-        versions_file = open(url)
+        with get_buildout().versions.path.open() as versions_file:
+            lines = versions_file.read().splitlines()
     else:
         url = DIST_URL.format(version_number)
-        versions_file = urlopen(url)
-        if versions_file.code == 404:
+        response = fetch(url, immutable=is_release(version_number))
+        if response.status == 404:
             raise ValueError("Version %s not found." % version_number)
-    for line in versions_file:
-        if not isinstance(line, str):
-            line = line.decode("utf-8")
+        if response.status == NOT_CACHED:
+            raise ValueError(f"Version {version_number} not found in cache.")
+        if response.status != 200:
+            raise ValueError(f"Could not get {url}: status {response.status}.")
+        lines = response.body.decode("utf-8").splitlines()
+    for line in lines:
         line = line.strip().replace(" ", "")
         if line and not (line.startswith("#") or line.startswith("[")):
             try:
@@ -49,7 +98,7 @@ def pull_versions(version_number):
 
 
 def get_source_location(package_name):
-    source = buildout.sources.get(package_name)
+    source = get_buildout().sources.get(package_name)
     if source is not None:
         # Go from this:
         # git://github.com/plone/plone.batching.git
@@ -63,33 +112,496 @@ def get_source_location(package_name):
     return "", ""
 
 
-def get_changelog(package_name):
+def get_changelog_urls(package_name):
+    """Get the urls where the changelog of a package may be.
+
+    The most likely url is first.
+    """
     source_url, branch = get_source_location(package_name)
     if not source_url:
-        return ""
+        return []
     file_names = ["CHANGES", "HISTORY"]
     file_extensions = [".rst", ".md", ".txt"]
     if "github" in source_url:
         paths = [f"{branch}/", f"{branch}/docs/"]
     else:
         paths = ["/", "/docs/", "/".join(package_name.split(".")) + "/"]
-    for pathable in product(paths, file_names, file_extensions):
-        structure = "".join(pathable)
-        url = f"{source_url}/{structure}"
+    return [
+        f"{source_url}/{''.join(pathable)}"
+        for pathable in product(paths, file_names, file_extensions)
+    ]
+
+
+class ChangelogLocations:
+    """Remember where we found the changelog of each package.
+
+    We store this as json in the cache directory, per package and branch.
+    When we did not find a changelog at all, we remember that as well,
+    but only for 'ttl' seconds.
+    """
+
+    def __init__(self, path=None, ttl=MISSING_CHANGELOG_TTL):
+        if path is None:
+            path = get_cache_dir() / "changelog-locations.json"
+        self.path = pathlib.Path(path)
+        self.ttl = ttl
+        self.changed = False
         try:
-            response = urlopen(url)
-        except OSError:
-            print(f"Unable to reach {url}")
+            self.data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, package_name, branch):
+        """Get the url of the changelog.
+
+        Returns MISSING when we recently did not find it,
+        and None when we do not know.
+        """
+        location = self.data.get(package_name, {}).get(branch)
+        if not location:
+            return None
+        if "url" in location:
+            return location["url"]
+        if time.time() - location.get("missing", 0) < self.ttl:
+            return MISSING
+        return None
+
+    def found(self, package_name, branch, url):
+        location = {"url": url}
+        if self.data.get(package_name, {}).get(branch) != location:
+            self.data.setdefault(package_name, {})[branch] = location
+            self.changed = True
+
+    def missing(self, package_name, branch):
+        self.data.setdefault(package_name, {})[branch] = {"missing": time.time()}
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        # Write to a temporary file first, so we never leave a broken file.
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.data, indent=1, sort_keys=True))
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+
+def fetch_url(url):
+    """Get the url.
+
+    Returns a tuple (status, body).  The status is 0 when the url
+    cannot be reached.
+    """
+    try:
+        response = fetch(url)
+    except OSError:
+        print(f"Unable to reach {url}")
+        return 0, None
+    return response.status, response.body
+
+
+def fetch_changelog(url):
+    """Get the changelog at this url.
+
+    Returns None when the url does not exist or cannot be reached.
+    """
+    status, body = fetch_url(url)
+    if status == 200:
+        return body
+    return None
+
+
+def _first_found(futures):
+    """Get the first url that exists from a list of (url, future).
+
+    Returns a tuple (url, contents, missing).  'missing' is True when
+    all urls gave a 404 Not Found.  Then the url and contents are None.
+    """
+    missing = True
+    for index, (url, future) in enumerate(futures):
+        status, body = future.result()
+        if status == 200:
+            # No need to try the less likely urls.
+            for other_url, other in futures[index + 1 :]:
+                other.cancel()
+            return url, body, False
+        if status != 404:
+            missing = False
+    return None, None, missing
+
+
+def get_changelog(package_name, locations=None):
+    return get_changelogs([package_name], workers=1, locations=locations)[package_name]
+
+
+def get_changelogs(package_names, workers=DEFAULT_WORKERS, locations=None):
+    """Get the changelogs of several packages.
+
+    We request all possible urls of all packages at the same time,
+    with at most 'workers' requests at the same time.
+    Per package, the most likely url that exists wins.
+
+    With ChangelogLocations we first try the url where we found the
+    changelog last time, and skip packages that recently had none.
+
+    Returns a dictionary from package name to changelog contents.
+    The contents are an empty string when no changelog is found.
+    """
+    changelogs = {}
+    candidates = {}
+    # Map from package name to url that we have tried first.
+    known = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+
+            def submit(urls):
+                return [(url, executor.submit(fetch_url, url)) for url in urls]
+
+            try:
+                for package_name in package_names:
+                    urls = get_changelog_urls(package_name)
+                    if locations is not None:
+                        branch = get_source_location(package_name)[1]
+                        location = locations.get(package_name, branch)
+                        if location is MISSING:
+                            changelogs[package_name] = ""
+                            continue
+                        if location in urls:
+                            known[package_name] = location
+                            urls = [location]
+                    candidates[package_name] = submit(urls)
+
+                for package_name, futures in candidates.items():
+                    url, content, missing = _first_found(futures)
+                    if url is None and package_name in known:
+                        # The changelog is not where it used to be.
+                        urls = get_changelog_urls(package_name)
+                        urls.remove(known[package_name])
+                        futures = candidates[package_name] = submit(urls)
+                        url, content, missing = _first_found(futures)
+                    changelogs[package_name] = content if url is not None else ""
+                    if locations is None:
+                        continue
+                    branch = get_source_location(package_name)[1]
+                    if url is not None:
+                        locations.found(package_name, branch, url)
+                    elif missing:
+                        locations.missing(package_name, branch)
+            finally:
+                for futures in candidates.values():
+                    for url, future in futures:
+                        future.cancel()
+    finally:
+        # The worker threads are done: close their connections.
+        close_connections()
+    if locations is not None:
+        locations.save()
+    return changelogs
+
+
+def is_version_heading(text):
+    """Does this heading text start with a version?"""
+    try:
+        parse(text.split()[0])
+    except (InvalidVersion, ValueError, IndexError):
+        return False
+    return True
+
+
+def is_underline(line):
+    """Is this line a restructuredtext section underline (or overline)?"""
+    line = line.rstrip()
+    return (
+        len(line) >= 3
+        and line[0] in RST_UNDERLINE_CHARACTERS
+        and line == line[0] * len(line)
+    )
+
+
+def split_rst_versions(content):
+    """Split restructuredtext changelog contents on version headings.
+
+    Returns a tuple: the text before the first version, and a list
+    of (version, text) for each version section, newest first.
+    This only looks at the lines, without parsing the contents,
+    so it is a lot faster than docutils.
+    """
+    lines = content.splitlines(keepends=True)
+    # Find the line numbers where a version section starts.
+    starts = []
+    for index in range(len(lines) - 1):
+        title = lines[index]
+        if (
+            not title.strip()
+            or title[0].isspace()
+            or not is_underline(lines[index + 1])
+        ):
+            continue
+        if not is_version_heading(title):
+            continue
+        start = index
+        if index > 0 and lines[index - 1].rstrip() == lines[index + 1].rstrip():
+            # The heading has an overline as well.
+            start = index - 1
+        # docutils normalizes the section names to lowercase.
+        starts.append((start, title.split()[0].lower()))
+    if not starts:
+        return content, []
+    prefix = "".join(lines[: starts[0][0]])
+    sections = []
+    for number, (start, version) in enumerate(starts):
+        if number + 1 < len(starts):
+            end = starts[number + 1][0]
         else:
-            if response.code == 200:
-                return response.read()
-    return ""
+            end = len(lines)
+        sections.append((version, "".join(lines[start:end])))
+    return prefix, sections
+
+
+def rst_heading(text):
+    """Get the changelog heading for this paragraph text."""
+    if text in HEADINGS:
+        return text
+    # Might be an old heading or unknown.
+    return OLD_HEADING_MAPPING.get(text, "other")
+
+
+def parse_rst_docutils(content):
+    """Parse restructuredtext changelog contents with docutils.
+
+    Returns an ordered dictionary from version to a dictionary of entries
+    per heading.
+    """
+    data = OrderedDict()
+    # Do not turn a single section into the document title:
+    # we may have only one version left.
+    tree = publish_doctree(content, settings_overrides={"doctitle_xform": False})
+
+    def is_valid_version_section(x):
+        if x.tagname == "section":
+            try:
+                return is_version_heading(x["names"][0])
+            except IndexError:
+                pass
+        return False
+
+    def heading(x):
+        if x.tagname != "paragraph":
+            return ""
+        return rst_heading(x.rawsource)
+
+    def is_list_item(x):
+        return x.tagname == "list_item"
+
+    found_sections = tree.traverse(condition=is_valid_version_section)
+    for section in found_sections:
+        version = section["names"][0].split()[0]
+        # Look for paragraph headings.
+        # When two are found, we have a section with:
+        # paragraph 1, bullet_list 1, paragraph 2, bullet_list 2.
+        # But a single bullet_list is handled fine too.
+        # Put items in dictionary, with the headings as possible keys.
+        entries = defaultdict(list)
+        current = "other"
+        for child in section.children:
+            child_heading = heading(child)
+            if child_heading:
+                current = child_heading
+                continue
+            list_items = child.traverse(condition=is_list_item)
+            entries[current] = [a.rawsource.strip() for a in list_items]
+        data[version] = entries
+    return data
+
+
+def parse_simple_rst(content):
+    """Parse restructuredtext changelog contents without docutils.
+
+    This understands the layout that zest.releaser and towncrier create:
+    underlined version headings, paragraphs like 'Bug fixes:', and bullet
+    lists.  The result is the same as with parse_rst_docutils, but we are
+    a lot faster.
+
+    Returns None when we find anything else, for example sub headings,
+    nested lists or directives.  Then you should use docutils after all.
+    """
+    if "\t" in content or "\v" in content or "\f" in content:
+        # docutils would replace these with spaces.
+        return None
+    prefix, sections = split_rst_versions(content)
+    if prefix.strip() and prefix.splitlines()[-1].strip():
+        # No blank line before the first version heading.
+        return None
+    data = OrderedDict()
+    styles = set()
+    titles = set()
+    for index, (version, text) in enumerate(sections):
+        lines = [line.rstrip() for line in text.splitlines()]
+        if index + 1 < len(sections) and lines[-1]:
+            # No blank line before the next version heading.
+            return None
+        if is_underline(lines[0]):
+            overline, title, underline = lines[:3]
+            body = lines[3:]
+        else:
+            overline = ""
+            title, underline = lines[:2]
+            body = lines[2:]
+        if len(underline) < len(title.strip()):
+            # docutils would complain.
+            return None
+        # When the version headings differ, docutils may nest them.
+        styles.add((underline[0], bool(overline)))
+        # docutils ignores sections with the same title.
+        titles.add(" ".join(title.lower().split()))
+        if len(styles) > 1 or len(titles) <= index:
+            return None
+        entries = parse_simple_rst_section(body)
+        if entries is None:
+            return None
+        data[version] = entries
+    return data
+
+
+def parse_simple_rst_section(lines):
+    """Parse the lines of one version section without docutils.
+
+    Returns a dictionary of entries per heading, or None when the lines
+    contain anything else than paragraphs and a simple bullet list.
+    """
+    # docutils finds no list items in the title, but it does set this key.
+    entries = defaultdict(list, other=[])
+    current = "other"
+    # Lines of the current paragraph.
+    paragraph = None
+    # List items, list item lines, and bullet character of the current list.
+    items = None
+    item = None
+    bullet = None
+    blank = True
+    for line in lines + [""]:
+        if not line:
+            if paragraph is not None:
+                text = "\n".join(paragraph)
+                if text.endswith("::"):
+                    # A literal block follows.
+                    return None
+                current = rst_heading(text)
+                paragraph = None
+            if item is not None:
+                item.append("")
+            blank = True
+            continue
+        if line.startswith(" "):
+            # This is only expected inside a list item.
+            if item is None or not line.startswith("  "):
+                return None
+            text = line[2:]
+            if is_underline(text.strip()):
+                return None
+            if RST_LIST_RE.match(text.lstrip()):
+                # A nested list.  docutils also sees this without
+                # a blank line in front.
+                return None
+            item.append(text)
+            blank = False
+            continue
+        if line[0] in RST_BULLETS and line[1:2] in ("", " "):
+            text = line[2:]
+            if paragraph is not None or not text or text[0] == " ":
+                return None
+            if RST_LIST_RE.match(text):
+                # A nested list.
+                return None
+            if item is not None:
+                items.append("\n".join(item).strip())
+            if line[0] != bullet:
+                if items is not None and not blank:
+                    return None
+                # A new list.  Like docutils, this replaces an earlier
+                # list with the same heading.
+                items = entries[current] = []
+                bullet = line[0]
+            item = [text]
+            blank = False
+            continue
+        # A paragraph.
+        if is_underline(line):
+            # A section title or transition.
+            return None
+        if paragraph is None:
+            if not blank or RST_SPECIAL_RE.match(line):
+                return None
+            if item is not None:
+                items.append("\n".join(item).strip())
+            items = item = bullet = None
+            paragraph = []
+        paragraph.append(line)
+        blank = False
+    if item is not None:
+        items.append("\n".join(item).strip())
+    return entries
+
+
+class ChangelogCache:
+    """Cache of parsed changelogs.
+
+    We store the parsed data as a pickle in the cache directory.
+    The key is a hash of the parser version, the stop version and the
+    contents, so we only parse again when the changelog has changed.
+    We count the hits and misses.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = get_cache_dir("changelogs")
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, content, stop_version=None):
+        text = f"{PARSER_VERSION}\n{stop_version}\n{content}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, content, stop_version=None):
+        """Get the parsed data, or None when we do not have it."""
+        path = self.path / f"{self.key(content, stop_version)}.pickle"
+        try:
+            with path.open("rb") as pickled:
+                data = pickle.load(pickled)
+        except Exception:
+            # Not there, or a broken file.
+            data = None
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def set(self, content, stop_version, data):
+        path = self.path / f"{self.key(content, stop_version)}.pickle"
+        write_atomic(path, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def stats(self):
+        return f"Parsed changelog cache: {self.hits} hits, {self.misses} misses."
 
 
 class Changelog:
-    def __init__(self, file_location=None, content=None):
+    """Parsed changelog.
+
+    When you only need the changes since a certain version, pass it as
+    'stop_version'.  Then we stop parsing after this version, instead of
+    parsing the entire history of the package.
+
+    Pass a ChangelogCache as 'cache' to reuse earlier results.
+    """
+
+    def __init__(self, file_location=None, content=None, stop_version=None, cache=None):
         self.file_location = file_location
         self.content = content
+        self.stop_version = stop_version
+        self.cache = cache
         self.data = OrderedDict()
         if content is not None:
             if isinstance(content, bytes):
@@ -147,48 +659,29 @@ class Changelog:
             return list(self.data.items())[0]
         return None
 
+    def _limit_rst(self, content):
+        """Limit the content to the versions up to and including stop_version.
+
+        When the stop version is not found, we return all content.
+        """
+        if self.stop_version is None:
+            return content
+        stop_version = str(self.stop_version).lower()
+        prefix, sections = split_rst_versions(content)
+        texts = [prefix]
+        for version, text in sections:
+            texts.append(text)
+            if version == stop_version:
+                return "".join(texts)
+        return content
+
     def _parse_rst(self, content):
-        tree = publish_doctree(content)
-
-        def is_valid_version_section(x):
-            if x.tagname == "section":
-                try:
-                    parse(x["names"][0].split()[0])
-                except (InvalidVersion, ValueError, IndexError):
-                    pass
-                else:
-                    return True
-            return False
-
-        def heading(x):
-            if x.tagname != "paragraph":
-                return ""
-            if x.rawsource in HEADINGS:
-                return x.rawsource
-            # Might be an old heading or unknown.
-            return OLD_HEADING_MAPPING.get(x.rawsource, "other")
-
-        def is_list_item(x):
-            return x.tagname == "list_item"
-
-        found_sections = tree.traverse(condition=is_valid_version_section)
-        for section in found_sections:
-            version = section["names"][0].split()[0]
-            # Look for paragraph headings.
-            # When two are found, we have a section with:
-            # paragraph 1, bullet_list 1, paragraph 2, bullet_list 2.
-            # But a single bullet_list is handled fine too.
-            # Put items in dictionary, with the headings as possible keys.
-            entries = defaultdict(list)
-            current = "other"
-            for child in section.children:
-                child_heading = heading(child)
-                if child_heading:
-                    current = child_heading
-                    continue
-                list_items = child.traverse(condition=is_list_item)
-                entries[current] = [a.rawsource.strip() for a in list_items]
-            self.data[version] = entries
+        content = self._limit_rst(content)
+        data = parse_simple_rst(content)
+        if data is None:
+            # Not the layout that we expect.  Let docutils figure it out.
+            data = parse_rst_docutils(content)
+        self.data.update(data)
 
     def _parse_md(self, content):
         # Parse as markdown.
@@ -252,14 +745,36 @@ class Changelog:
             self.data[version] = entries
 
     def _parse(self, content):
+        if self.cache is not None:
+            data = self.cache.get(content, self.stop_version)
+            if data is not None:
+                self.data = data
+                return
         # Try to parse as restructuredtext.
         self._parse_rst(content)
         if not self.data:
             # Try to parse as markdown.
             self._parse_md(content)
-
-
-def build_unified_changelog(start_version, end_version, packages=None):
+        if self.cache is not None:
+            self.cache.set(content, self.stop_version, self.data)
+
+
+def build_unified_changelog(
+    start_version,
+    end_version,
+    packages=None,
+    workers=DEFAULT_WORKERS,
+    cache=True,
+    offline=False,
+):
+    """Print the combined changes of all packages between two Plone versions.
+
+    With 'cache' we keep the downloaded files and the parsed changelogs,
+    remember where the changelogs are, and only download and parse files
+    again when they have changed.
+    With 'offline' we only use the cache.
+    """
+    set_cache(HTTPCache(offline=offline) if cache or offline else None)
     try:
         prior_versions = pull_versions(start_version)
         current_versions = pull_versions(end_version)
@@ -270,60 +785,69 @@ def build_unified_changelog(start_version, end_version, packages=None):
     if isinstance(packages, str):
         packages = packages.split(",")
 
+    # First find the packages with changes.
+    changed = []
+    for package, version in current_versions.items():
+        if packages is not None and package not in packages:
+            # We are not interested in this package.
+            continue
+        if package not in prior_versions:
+            continue
+        prior_version = prior_versions[package]
+        try:
+            if version > prior_version:
+                print(f"{package} has a newer version")
+                changed.append((package, prior_version, version))
+        except AttributeError:
+            # Bad version line, skip
+            pass
+        except TypeError:
+            # (Pdb) version > prior_version
+            # *** TypeError: '<' not supported between instances of 'int' and 'str'
+            # (Pdb) version, prior_version
+            # (LooseVersion ('5.2.0'), LooseVersion ('5.2a1'))
+            print(
+                "ERROR {}: cannot compare prior version {} with new version {}".format(
+                    package, prior_version, version
+                )
+            )
+
+    parsed_cache = ChangelogCache() if cache or offline else None
     output_str = ""
     try:
-        for package, version in current_versions.items():
-            if packages is not None and package not in packages:
-                # We are not interested in this package.
+        # Get all changelogs at the same time.
+        changelogs = get_changelogs(
+            [package for package, prior_version, version in changed],
+            workers=workers,
+            locations=ChangelogLocations() if cache or offline else None,
+        )
+        for package, prior_version, version in changed:
+            packageChange = "{}: {} {} {}".format(
+                package, prior_version, "\u2192", version
+            )
+            output_str += "\n" + packageChange + "\n" + "-" * len(packageChange) + "\n"
+
+            logtext = changelogs[package]
+            if not logtext:
+                print(f"WARNING: No changelog found for {package}.")
                 continue
-            if package in prior_versions:
-                prior_version = prior_versions[package]
-                try:
-                    if version > prior_version:
-                        print(f"{package} has a newer version")
-                        packageChange = "{}: {} {} {}".format(
-                            package, prior_version, "\u2192", version
-                        )
-                        output_str += (
-                            "\n"
-                            + packageChange
-                            + "\n"
-                            + "-" * len(packageChange)
-                            + "\n"
-                        )
-
-                        logtext = get_changelog(package)
-                        if not logtext:
-                            print("WARNING: No changelog found.")
-                            continue
-                        changelog = Changelog(content=logtext)
-                        try:
-                            changes = changelog.get_changes(prior_version, version)
-                        except ValueError as e:
-                            print(f"ERROR: {e}")
-                        else:
-                            bullet = "- "
-                            for change in changes:
-                                if change in HEADINGS:
-                                    output_str += change + "\n\n"
-                                else:
-                                    change = change.replace(
-                                        "\n", "\n" + " " * len(bullet)
-                                    )
-                                    output_str += bullet + change + "\n\n"
-                except AttributeError:
-                    # Bad version line, skip
-                    pass
-                except TypeError:
-                    # (Pdb) version > prior_version
-                    # *** TypeError: '<' not supported between instances of 'int' and 'str'
-                    # (Pdb) version, prior_version
-                    # (LooseVersion ('5.2.0'), LooseVersion ('5.2a1'))
-                    print(
-                        "ERROR {}: cannot compare prior version {} with new version {}".format(
-                            package, prior_version, version
-                        )
-                    )
+            changelog = Changelog(
+                content=logtext, stop_version=prior_version, cache=parsed_cache
+            )
+            try:
+                changes = changelog.get_changes(prior_version, version)
+            except ValueError as e:
+                print(f"ERROR: {package}: {e}")
+            else:
+                bullet = "- "
+                for change in changes:
+                    if change in HEADINGS:
+                        output_str += change + "\n\n"
+                    else:
+                        change = change.replace("\n", "\n" + " " * len(bullet))
+                        output_str += bullet + change + "\n\n"
     except KeyboardInterrupt:
         pass
     print(output_str)
+    if parsed_cache is not None:
+        print(parsed_cache.stats())
@@ -1,31 +1,152 @@
+"""Database of the commits that we ignore, per package.
+
+When the report finds changes in a package, you can choose to ignore them.
+We remember the last commit at that moment, and only report newer commits.
+
+We keep this in a sqlite database in the current directory, normally
+the coredev checkout.  Each change is a new row, so we keep the history.
+The database uses a write-ahead log, so readers do not block the writer,
+and a crash never leaves a half written database.
+
+We used to keep only the last commit per package in a json file.
+The first time we open the database, we copy the commits from that file.
+"""
+
 import json
 import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+DB_FILENAME = ".package_ignores.sqlite"
+# The json file that we used before.
+JSON_FILENAME = ".package_ignores"
+# Seconds to wait when another process is writing.
+TIMEOUT = 30
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ignores (
+    id INTEGER PRIMARY KEY,
+    package TEXT NOT NULL,
+    sha TEXT,
+    branch TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ignores_package ON ignores (package, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
 
 
 class IgnoresDB:
-    def __init__(self):
-        self._filename = ".package_ignores"
-        if not os.path.isfile(self._filename):
-            open(self._filename, "w").close()
-
-        with open(self._filename) as f:
-            content = f.read()
-            if content != "":
-                self._db = json.loads(content)
-            else:
-                self._db = {}
-
-    def save(self):
-        with open(self._filename, "w+") as f:
-            f.write(json.dumps(self._db))
+    """The ignored commits of all packages.
+
+    We open the database when we first need it.  You can use one instance
+    in several threads: we use one connection, and a lock around it.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = DB_FILENAME
+        self.path = pathlib.Path(path).resolve()
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=TIMEOUT, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.executescript(SCHEMA)
+            self._connection = connection
+            self.migrate()
+        return self._connection
+
+    def migrate(self):
+        """Copy the commits from the old json file, once."""
+        json_path = self.path.parent / JSON_FILENAME
+        connection = self._connection
+        with connection:
+            # Another process may be doing the same.  Only one of us can
+            # insert the row, and the other then has nothing to do.
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('migrated', ?)", (time.time(),)
+            )
+            if cursor.rowcount == 0:
+                return
+            if not json_path.is_file():
+                return
+            content = json_path.read_text()
+            ignores = json.loads(content) if content.strip() else {}
+            timestamp = os.path.getmtime(json_path)
+            connection.executemany(
+                "INSERT INTO ignores (package, sha, branch, timestamp) "
+                "VALUES (?, ?, NULL, ?)",
+                [(package, sha, timestamp) for package, sha in ignores.items()],
+            )
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _add(self, package_name, sha, branch=None):
+        with self._lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO ignores (package, sha, branch, timestamp) "
+                    "VALUES (?, ?, ?, ?)",
+                    (package_name, sha, branch, time.time()),
+                )
 
     def get(self, package_name):
-        return self._db.get(package_name)
+        """Get the ignored commit of a package, or None."""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT sha FROM ignores WHERE package = ? ORDER BY id DESC LIMIT 1",
+                (package_name,),
+            ).fetchone()
+        return row[0] if row else None
 
-    def set(self, package_name, sha):
-        self._db[package_name] = sha
-        self.save()
+    def set(self, package_name, sha, branch=None):
+        """Ignore the commits of a package up to this sha."""
+        self._add(package_name, sha, branch=branch)
 
     def delete(self, package_name):
-        del self._db[package_name]
-        self.save()
+        """Stop ignoring commits of a package."""
+        if self.get(package_name) is None:
+            raise KeyError(package_name)
+        self._add(package_name, None)
+
+    def history(self, package_name):
+        """Return the changes for a package, oldest first.
+
+        Each change is a tuple (sha, branch, timestamp).
+        The sha is None when we stopped ignoring commits.
+        """
+        with self._lock:
+            return self.connection.execute(
+                "SELECT sha, branch, timestamp FROM ignores "
+                "WHERE package = ? ORDER BY id",
+                (package_name,),
+            ).fetchall()
+
+
+# IgnoresDB per resolved path, see get_ignores_db.
+IGNORES_DBS = {}
+_ignores_dbs_lock = threading.Lock()
+
+
+def get_ignores_db(path=None):
+    """Get the shared IgnoresDB, by default in the current directory."""
+    path = pathlib.Path(path or DB_FILENAME).resolve()
+    with _ignores_dbs_lock:
+        if path not in IGNORES_DBS:
+            IGNORES_DBS[path] = IgnoresDB(path)
+        return IGNORES_DBS[path]
@@ -0,0 +1,556 @@
+"""Line based model of the files that we read and edit.
+
+We read the lines once, and remember where each section starts and ends,
+and on which lines each package is.  Then changing the version of a
+package does not need to look at all lines again.  Lines that we do not
+change are written back exactly as they were, including comments.
+
+For ini files, like Buildout and mxdev files, we parse the options as
+well, in the same way as ConfigParser does.  A Config gives access to
+them with the parts of the ConfigParser api that we use.  An
+InterpolatingConfig uses the same values, and resolves references like
+'${settings:plone}' when they are asked for.
+"""
+
+from collections import defaultdict
+from collections.abc import MutableMapping
+from configparser import InterpolationDepthError
+from configparser import InterpolationMissingOptionError
+from configparser import InterpolationSyntaxError
+from configparser import MAX_INTERPOLATION_DEPTH
+from configparser import MissingSectionHeaderError
+from configparser import ParsingError
+
+import re
+
+# A section header like ConfigParser expects, after stripping whitespace.
+SECTION_RE = re.compile(r"\[(?P<header>.+)\]")
+# An option line like ConfigParser expects, after stripping whitespace.
+OPTION_RE = re.compile(r"(?P<option>.*?)\s*(?P<vi>=|:)\s*(?P<value>.*)$")
+COMMENT_PREFIXES = ("#", ";")
+# A reference to an option, like ExtendedInterpolation understands.
+REFERENCE_RE = re.compile(r"\$\{([^}]+)\}")
+
+
+class Document:
+    """Lines of a text file, with an index of sections and keys.
+
+    - 'line_key' is a function that gets a line, with trailing whitespace
+      removed, and returns its key, for example the lower case package name.
+      It returns None for lines without key.
+    - 'filename' is used for reporting.
+
+    Removed lines are replaced by None, so the line numbers in the index
+    stay valid.  Added lines are kept apart per section, and are only
+    put in place when we create the new text.
+    """
+
+    def __init__(self, text, line_key, filename=""):
+        self.original = text
+        self.lines = text.splitlines()
+        self.line_key = line_key
+        self.filename = filename
+        # Map from section name to (start, end): the line number of the
+        # section header, and the line number after the last line.
+        # When a section is in the file twice, we only use the first one.
+        self.sections = {}
+        # Map from key to the line numbers that have this key.
+        self.keys = defaultdict(list)
+        # Map from section name to the new lines that we add at its end.
+        # Section None is the entire file.
+        self.additions = defaultdict(dict)
+        # Have we made any change?  Changes may still cancel each other out.
+        self.changed = False
+        self._index()
+
+    def _index(self):
+        name = None
+        start = 0
+        for number, line in enumerate(self.lines):
+            line = line.rstrip()
+            if line.startswith("["):
+                self._add_section(name, start, number)
+                name = line[1:-1] if line.endswith("]") else line[1:]
+                start = number
+                continue
+            key = self.line_key(line)
+            if key is not None:
+                self.keys[key].append(number)
+        self._add_section(name, start, len(self.lines))
+
+    def _add_section(self, name, start, end):
+        if name is not None and name not in self.sections:
+            self.sections[name] = (start, end)
+
+    def has_section(self, name):
+        return name in self.sections
+
+    def add_section(self, name):
+        """Add an empty section at the end, after an empty line."""
+        if name in self.sections:
+            return
+        self.lines.extend(["", f"[{name}]"])
+        self.sections[name] = (len(self.lines) - 1, len(self.lines))
+        self.changed = True
+
+    def _scope(self, section):
+        # Return the section name and the range of line numbers.
+        # Like update_contents, we use the entire file when the section
+        # is not there.
+        if section in self.sections:
+            return section, self.sections[section]
+        return None, (0, len(self.lines))
+
+    def find(self, key, section=None):
+        """Return the line numbers with this key in the section."""
+        section, (start, end) = self._scope(section)
+        return [
+            number
+            for number in self.keys.get(key, [])
+            if start <= number < end and self.lines[number] is not None
+        ]
+
+    def set(self, key, newline, section=None):
+        """Set the line with this key to a new line.
+
+        Duplicate lines are removed.  When the key is not there yet,
+        we add the line at the end of the section.
+        Returns True when this changes the text.
+        """
+        section = self._scope(section)[0]
+        numbers = self.find(key, section)
+        if not numbers:
+            additions = self.additions[section]
+            if additions.get(key) == newline:
+                return False
+            additions[key] = newline
+            print(f"{self.filename}: '{newline}' added.")
+            self.changed = True
+            return True
+        changed = False
+        first = numbers[0]
+        for number in numbers[1:]:
+            # This is a duplicate, remove the line.
+            self.remove_line(number)
+            changed = True
+        if self.lines[first].rstrip() == newline:
+            print(f"{self.filename}: '{newline}' already there.")
+        else:
+            self.replace_line(first, newline)
+            print(f"{self.filename}: have set '{newline}'.")
+            changed = True
+        self.changed = self.changed or changed
+        return changed
+
+    def remove(self, key, section=None):
+        """Remove all lines with this key.
+
+        Returns True when this changes the text.
+        """
+        section = self._scope(section)[0]
+        numbers = self.find(key, section)
+        if self.additions[section].pop(key, None) is not None:
+            self.changed = True
+            return True
+        if not numbers:
+            print(f"{self.filename}: line not found.")
+            return False
+        for number in numbers:
+            print(f"{self.filename}: '{self.lines[number].rstrip()}' removed.")
+            self.remove_line(number)
+        self.changed = True
+        return True
+
+    def replace_line(self, number, newline):
+        self.lines[number] = newline
+
+    def remove_line(self, number):
+        self.lines[number] = None
+
+    def _insert_position(self, start, end):
+        # Add new lines after the last line of the section,
+        # but when that line is empty, add them before it.
+        for number in range(end - 1, start - 1, -1):
+            line = self.lines[number]
+            if line is None:
+                continue
+            if line.strip():
+                return number + 1
+            return number
+        return end
+
+    def text(self):
+        """Return the text, including our changes."""
+        inserts = defaultdict(list)
+        for section, additions in self.additions.items():
+            if not additions:
+                continue
+            section, (start, end) = self._scope(section)
+            position = self._insert_position(start, end)
+            if section is None and position == len(self.lines):
+                # Add these after the additions to the last section.
+                position += 1
+            inserts[position].extend(additions.values())
+        lines = []
+        for number, line in enumerate(self.lines):
+            lines.extend(inserts.get(number, []))
+            if line is not None:
+                lines.append(line)
+        for number in (len(self.lines), len(self.lines) + 1):
+            lines.extend(inserts.get(number, []))
+        result = "\n".join(lines)
+        if not result.endswith("\n"):
+            result += "\n"
+        return result
+
+    def is_modified(self):
+        """Is the text different from the original text?
+
+        We only build the text to compare when we have made changes.
+        """
+        return self.changed and self.text() != self.original
+
+
+class IniDocument(Document):
+    """Document for an ini file.
+
+    We read the sections and options like ConfigParser does with
+    strict=False: no inline comments, empty lines are allowed in values,
+    and later sections and options with the same name win.
+    'values' maps section names to dictionaries with the raw values.
+
+    Without 'line_key', the key of an option line is the result of
+    'option_key' for the name of the option, by default the lower case
+    name.  When we replace or remove an option, we remove its continuation
+    lines as well.
+    """
+
+    def __init__(
+        self,
+        text,
+        line_key=None,
+        filename="",
+        optionxform=str,
+        default_section="DEFAULT",
+        option_key=str.lower,
+    ):
+        self.optionxform = optionxform
+        self.option_key = option_key
+        self.default_section = default_section
+        # Map from section name to a dictionary of option name to raw value.
+        self.values = {default_section: {}}
+        # Map from line number of an option to its continuation line numbers.
+        self.continuations = {}
+        self.use_option_keys = line_key is None
+        super().__init__(text, line_key, filename)
+
+    def _index(self):
+        section = None
+        start = 0
+        # The lines of the values of the current section.
+        values = None
+        option = None
+        option_number = None
+        indent_level = 0
+        errors = []
+        for number, line in enumerate(self.lines):
+            if not self.use_option_keys:
+                key = self.line_key(line.rstrip())
+                if key is not None and not SECTION_RE.match(line.strip()):
+                    self.keys[key].append(number)
+            stripped = line.strip()
+            if stripped.startswith(COMMENT_PREFIXES):
+                continue
+            if not stripped:
+                if values is not None and option is not None:
+                    # Empty lines in a value are kept, except at the end.
+                    values[option].append("")
+                continue
+            indent = len(line) - len(line.lstrip())
+            if values is not None and option is not None and indent > indent_level:
+                # A continuation line.
+                values[option].append(stripped)
+                self.continuations[option_number].append(number)
+                continue
+            indent_level = indent
+            match = SECTION_RE.match(stripped)
+            if match:
+                self._add_section(section, start, number)
+                section = match.group("header")
+                start = number
+                values = self.values.setdefault(section, {})
+                option = None
+                continue
+            if values is None:
+                raise MissingSectionHeaderError(
+                    self.filename or "<string>", number + 1, line
+                )
+            match = OPTION_RE.match(stripped)
+            if match is None or not match.group("option"):
+                # Like ConfigParser we report this at the end.
+                errors.append((number + 1, line))
+                continue
+            option = self.optionxform(match.group("option").rstrip())
+            option_number = number
+            values[option] = [match.group("value").strip()]
+            self.continuations[number] = []
+            if self.use_option_keys:
+                self.keys[self.option_key(option)].append(number)
+        self._add_section(section, start, len(self.lines))
+        for section_values in self.values.values():
+            for option, lines in section_values.items():
+                section_values[option] = "\n".join(lines).rstrip()
+        if errors:
+            error = ParsingError(self.filename or "<string>")
+            for lineno, line in errors:
+                error.append(lineno, repr(line))
+            raise error
+
+    def _add_section(self, name, start, end):
+        if name != self.default_section:
+            super()._add_section(name, start, end)
+
+    def replace_line(self, number, newline):
+        super().replace_line(number, newline)
+        for continuation in self.continuations.get(number, []):
+            self.lines[continuation] = None
+
+    def remove_line(self, number):
+        super().remove_line(number)
+        for continuation in self.continuations.get(number, []):
+            self.lines[continuation] = None
+
+
+class Config:
+    """View on the values of an IniDocument, like a ConfigParser.
+
+    We support the parts of the ConfigParser api that we use.
+    Options of the default section are available in all sections.
+    Changes are only made in memory, not in the document.
+    """
+
+    def __init__(self, values, default_section="DEFAULT", optionxform=str):
+        self.values = values
+        self.default_section = default_section
+        self.optionxform = optionxform
+        values.setdefault(default_section, {})
+
+    @property
+    def defaults(self):
+        return self.values[self.default_section]
+
+    def sections(self):
+        return [name for name in self.values if name != self.default_section]
+
+    def has_section(self, name):
+        return name != self.default_section and name in self.values
+
+    def add_section(self, name):
+        self.values.setdefault(name, {})
+
+    def options(self, section):
+        options = dict.fromkeys(self.values[section])
+        options.update(dict.fromkeys(self.defaults))
+        return list(options)
+
+    def has_option(self, section, option):
+        return option in self.values.get(section, {}) or option in self.defaults
+
+    def get(self, section, option, **kwargs):
+        """Get a value.
+
+        Like ConfigParser, you can pass a default value as 'fallback'.
+        """
+        try:
+            return self.get_value(section, option)
+        except KeyError:
+            if "fallback" in kwargs:
+                return kwargs["fallback"]
+            raise
+
+    def get_value(self, section, option):
+        values = self.values[section]
+        if option in values:
+            return values[option]
+        return self.defaults[option]
+
+    def set_value(self, section, option, value):
+        self.values[section][option] = value
+
+    def remove_value(self, section, option):
+        del self.values[section][option]
+
+    def __contains__(self, name):
+        return name in self.values
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return ConfigSection(self, name)
+
+    def __iter__(self):
+        yield self.default_section
+        yield from self.sections()
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+
+class InterpolatingConfig(Config):
+    """Config that interpolates values like ExtendedInterpolation.
+
+    We share the raw values with the document and with any raw Config.
+    A value is interpolated the first time it is asked for, and then
+    remembered.  Values that are set on this config are kept apart,
+    so they do not end up in the raw values.
+    """
+
+    def __init__(self, values, default_section="DEFAULT", optionxform=str):
+        super().__init__(values, default_section, optionxform)
+        # Map from section name to options that were set on us.
+        self.extra = {}
+        # Map from (section, option) to interpolated value.
+        self.interpolated = {}
+        # The options that we are interpolating, to detect loops.
+        self.resolving = []
+
+    def sections(self):
+        sections = super().sections()
+        sections.extend(name for name in self.extra if name not in self.values)
+        return sections
+
+    def has_section(self, name):
+        if name in self.extra and name != self.default_section:
+            return True
+        return super().has_section(name)
+
+    def add_section(self, name):
+        if name not in self.values:
+            self.extra.setdefault(name, {})
+
+    def options(self, section):
+        extra = self.extra.get(section, {})
+        if section not in self.values:
+            options = dict.fromkeys(extra)
+            options.update(dict.fromkeys(self.defaults))
+            return list(options)
+        options = dict.fromkeys(super().options(section))
+        options.update(dict.fromkeys(extra))
+        return list(options)
+
+    def has_option(self, section, option):
+        return option in self.extra.get(section, {}) or super().has_option(
+            section, option
+        )
+
+    def __contains__(self, name):
+        return name in self.extra or super().__contains__(name)
+
+    def get_raw(self, section, option):
+        extra = self.extra.get(section, {})
+        if option in extra:
+            return extra[option]
+        if section not in self.values:
+            if section not in self.extra:
+                raise KeyError(section)
+            return self.defaults[option]
+        return super().get_value(section, option)
+
+    def get_value(self, section, option):
+        key = (section, option)
+        if key in self.interpolated:
+            return self.interpolated[key]
+        raw = self.get_raw(section, option)
+        if "$" not in raw:
+            value = raw
+        else:
+            if key in self.resolving or len(self.resolving) >= MAX_INTERPOLATION_DEPTH:
+                raise InterpolationDepthError(option, section, raw)
+            self.resolving.append(key)
+            try:
+                value = self.interpolate(section, option, raw)
+            finally:
+                self.resolving.pop()
+        self.interpolated[key] = value
+        return value
+
+    def interpolate(self, section, option, raw):
+        result = []
+        rest = raw
+        while rest:
+            position = rest.find("$")
+            if position < 0:
+                result.append(rest)
+                break
+            result.append(rest[:position])
+            rest = rest[position:]
+            next_char = rest[1:2]
+            if next_char == "$":
+                result.append("$")
+                rest = rest[2:]
+                continue
+            if next_char != "{":
+                raise InterpolationSyntaxError(
+                    option,
+                    section,
+                    f"'$' must be followed by '$' or '{{', found: {rest!r}",
+                )
+            match = REFERENCE_RE.match(rest)
+            if match is None:
+                raise InterpolationSyntaxError(
+                    option, section, f"bad interpolation variable reference {rest!r}"
+                )
+            path = match.group(1).split(":")
+            rest = rest[match.end() :]
+            if len(path) == 1:
+                reference = (section, self.optionxform(path[0]))
+            elif len(path) == 2:
+                reference = (path[0], self.optionxform(path[1]))
+            else:
+                raise InterpolationSyntaxError(
+                    option, section, f"More than one ':' found: {rest!r}"
+                )
+            try:
+                result.append(self.get_value(*reference))
+            except KeyError:
+                raise InterpolationMissingOptionError(
+                    option, section, raw, ":".join(path)
+                ) from None
+        return "".join(result)
+
+    def set_value(self, section, option, value):
+        self.extra.setdefault(section, {})[option] = value
+        self.interpolated.clear()
+
+    def remove_value(self, section, option):
+        if option in self.extra.get(section, {}):
+            del self.extra[section][option]
+        else:
+            super().remove_value(section, option)
+        self.interpolated.clear()
+
+
+class ConfigSection(MutableMapping):
+    """A section of a Config, like a SectionProxy of ConfigParser."""
+
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+
+    def __getitem__(self, option):
+        return self.config.get_value(self.name, option)
+
+    def __setitem__(self, option, value):
+        self.config.set_value(self.name, option, value)
+
+    def __delitem__(self, option):
+        self.config.remove_value(self.name, option)
+
+    def __iter__(self):
+        return iter(self.config.options(self.name))
+
+    def __len__(self):
+        return len(self.config.options(self.name))
+
+    def __repr__(self):
+        return f"<Section: {self.name}>"
@@ -0,0 +1,245 @@
+"""Download files over http, reusing connections.
+
+urlopen opens a new connection for every request.  When we fetch the
+changelogs of a few hundred packages from the same host, it is a lot
+faster to keep the connection open.  So we keep one connection per host
+in each thread.
+
+Optionally we keep the downloaded files in a cache, see HTTPCache.
+"""
+
+from http.client import HTTPConnection
+from http.client import HTTPException
+from http.client import HTTPSConnection
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Status code when we are offline and the url is not in the cache.
+# This is what browsers use as well.
+NOT_CACHED = 504
+
+
+def write_atomic(path, contents):
+    """Write bytes to a temporary file, and then move it in place.
+
+    This way we never leave a half written file.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(contents)
+    os.replace(tmp_path, path)
+
+
+class Response:
+    def __init__(self, url, status, body, headers):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+    def __repr__(self):
+        return f"<Response {self.status} {self.url}>"
+
+
+class ConnectionPool:
+    """Keep one open connection per host in each thread."""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._local = threading.local()
+        # The connections of all threads, so we can close them.
+        self._all_connections = []
+        self._lock = threading.Lock()
+
+    @property
+    def connections(self):
+        local = self._local
+        if not hasattr(local, "connections"):
+            local.connections = {}
+            with self._lock:
+                self._all_connections.append(local.connections)
+        return local.connections
+
+    def get_connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        if key not in self.connections:
+            if scheme == "https":
+                connection = HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                connection = HTTPConnection(netloc, timeout=self.timeout)
+            self.connections[key] = connection
+        return self.connections[key]
+
+    def close_connection(self, scheme, netloc):
+        connection = self.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        """Close the connections of all threads.
+
+        Only call this when other threads no longer use the pool,
+        for example after their executor has shut down.
+        """
+        with self._lock:
+            all_connections = self._all_connections
+            self._all_connections = []
+            # Threads that use the pool again start with new connections.
+            self._local = threading.local()
+        for connections in all_connections:
+            for connection in connections.values():
+                connection.close()
+            connections.clear()
+
+    def request(self, url, headers=None, max_redirects=5):
+        """Get the url and return a Response.
+
+        We follow redirects.  Network problems raise an OSError,
+        like they do with urlopen.  But http errors like 404 do not:
+        check the status of the response.
+        """
+        for _ in range(max_redirects + 1):
+            response = self._request(url, headers or {})
+            location = response.headers.get("Location")
+            if response.status not in REDIRECT_CODES or not location:
+                break
+            url = urljoin(url, location)
+        return response
+
+    def _request(self, url, headers):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        # When the server has closed a kept-alive connection,
+        # we only notice when we use it.  Then we try once more.
+        for attempt in (1, 2):
+            connection = self.get_connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (HTTPException, ConnectionError) as exc:
+                self.close_connection(parts.scheme, parts.netloc)
+                if attempt == 2:
+                    if isinstance(exc, OSError):
+                        raise
+                    raise OSError(f"{exc.__class__.__name__}: {exc}") from exc
+                continue
+            except OSError:
+                self.close_connection(parts.scheme, parts.netloc)
+                raise
+            if response.will_close:
+                self.close_connection(parts.scheme, parts.netloc)
+            return Response(url, response.status, body, response.headers)
+
+
+class HTTPCache:
+    """Cache of downloaded files.
+
+    For an immutable url, for example the versions.cfg of a Plone release,
+    we use the cached file without asking the server.
+    For other urls we ask the server if the file has changed since we
+    downloaded it, using the ETag and Last-Modified headers.
+    When we are offline, we only use the cache.
+
+    Only successful responses are cached.
+    """
+
+    def __init__(self, path=None, offline=False, pool=None):
+        if path is None:
+            # Import here to avoid circular imports.
+            from plone.releaser.cache import get_cache_dir
+
+            path = get_cache_dir("http")
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        self.pool = pool
+
+    def paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.path / f"{key}.json", self.path / f"{key}.body"
+
+    def load(self, url):
+        """Get the cached metadata and body, or (None, None)."""
+        meta_path, body_path = self.paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url:
+            return None, None
+        return meta, body
+
+    def store(self, url, response, immutable=False):
+        meta_path, body_path = self.paths(url)
+        meta = {
+            "url": url,
+            "immutable": immutable,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "stored": time.time(),
+        }
+        # Write the body first: a metadata file means the body is complete.
+        write_atomic(body_path, response.body)
+        write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def fetch(self, url, headers=None, immutable=False):
+        meta, body = self.load(url)
+        if meta is not None and (self.offline or meta["immutable"] or immutable):
+            return Response(url, 200, body, {})
+        if self.offline:
+            return Response(url, NOT_CACHED, b"", {})
+        headers = dict(headers or {})
+        if meta is not None:
+            if meta["etag"]:
+                headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"]:
+                headers["If-Modified-Since"] = meta["last_modified"]
+        connections = self.pool if self.pool is not None else pool
+        response = connections.request(url, headers=headers)
+        if response.status == 304 and meta is not None:
+            # Not modified.
+            return Response(url, 200, body, response.headers)
+        if response.status == 200:
+            self.store(url, response, immutable=immutable)
+        return response
+
+
+# Shared pool.
+pool = ConnectionPool()
+# Shared cache, see set_cache.
+http_cache = None
+
+
+def set_cache(cache):
+    """Use this HTTPCache for fetching.  Pass None to stop caching."""
+    global http_cache
+    http_cache = cache
+
+
+def close_connections():
+    """Close the connections of the shared pool, and of the shared cache."""
+    pool.close()
+    if http_cache is not None and http_cache.pool is not None:
+        http_cache.pool.close()
+
+
+def fetch(url, headers=None, immutable=False):
+    """Get the url using the shared connection pool.
+
+    When we have a shared cache, we use that.  Mark the url as immutable
+    when its contents never change: then we never ask the server again.
+    """
+    if http_cache is not None:
+        return http_cache.fetch(url, headers=headers, immutable=immutable)
+    return pool.request(url, headers=headers)
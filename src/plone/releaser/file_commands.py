@@ -0,0 +1,360 @@
+"""Commands that read and edit the versions, constraints and checkouts files.
+
+These are called often from scripts, so we keep their imports light.
+"""
+
+from pathlib import Path
+from plone.releaser.buildout import CheckoutsFile
+from plone.releaser.buildout import SourcesFile
+from plone.releaser.buildout import VersionsFile
+from plone.releaser.pip import ConstraintsFile
+from plone.releaser.pip import MxCheckoutsFile
+from plone.releaser.pip import MxSourcesFile
+from plone.releaser.utils import parse_pins
+
+import glob
+import sys
+
+
+def _get_checkouts(path=None):
+    """Get the parsed checkouts file at the given path.
+
+    If no path is given, we use several paths:
+    both checkouts.cfg and mxcheckouts.ini.
+    """
+    if path:
+        paths = [path]
+    else:
+        paths = glob.glob("mxcheckouts.ini") + glob.glob("checkouts.cfg")
+    for path in paths:
+        if path.endswith(".ini"):
+            checkouts = MxCheckoutsFile(path)
+        else:
+            checkouts = CheckoutsFile(path)
+        yield checkouts
+
+
+def check_checkout(package_name, *, path=None):
+    """Check if package is in the checkouts.
+
+    If no path is given, we try several paths:
+    both checkouts.cfg and mxcheckouts.ini.
+    """
+    for checkouts in _get_checkouts(path=path):
+        loc = checkouts.file_location
+        if package_name not in checkouts:
+            print(f"No, your package {package_name} is NOT on auto checkout in {loc}.")
+        else:
+            print(f"YES, your package {package_name} is on auto checkout in {loc}.")
+
+
+def remove_checkout(package_name, *, path=None):
+    """Remove package from auto checkouts.
+
+    If no path is given, we try several paths:
+    both checkouts.cfg and mxcheckouts.ini.
+    """
+    for checkouts in _get_checkouts(path=path):
+        checkouts.remove(package_name)
+
+
+def add_checkout(package_name, *, path=None):
+    """Add package to auto checkouts.
+
+    If no path is given, we try several paths:
+    both checkouts.cfg and mxcheckouts.ini.
+    """
+    for checkouts in _get_checkouts(path=path):
+        checkouts.add(package_name)
+
+
+def append_jenkins_build_number_to_package_version(jenkins_build_number):
+    from zest.releaser.utils import cleanup_version
+    from zest.releaser.vcs import BaseVersionControl
+
+    vcs = BaseVersionControl()
+    old_version = cleanup_version(vcs.version)
+    new_version = f"{old_version}.{jenkins_build_number}"
+    vcs.version = new_version
+    return new_version
+
+
+def _get_constraints(path=None):
+    """Get the parsed constraints/versions file at the given path.
+
+    If no path is given, we use several paths:
+    constraints*.txt and versions*.cfg.
+    """
+    if path:
+        paths = [path]
+    else:
+        paths = glob.glob("constraints*.txt") + glob.glob("versions*.cfg")
+    for path in paths:
+        if path.endswith(".txt"):
+            constraints = ConstraintsFile(path)
+        else:
+            constraints = VersionsFile(path)
+        yield constraints
+
+
+def get_package_version(package_name, *, path=None):
+    """Get package version from constraints/versions file.
+
+    If no path is given, we try several paths.
+
+    Note that versions with environment markers are ignored.
+    See https://peps.python.org/pep-0496/ explaining them.
+    The 99.99 percent use case of this part of plone.releaser is to get or set
+    versions for a Plone package, and after abandoning Python 2 we are unlikely
+    to need different versions of our core packages for different environments.
+
+    So in all the following cases, package version 1.0 is reported:
+
+    package==1.0
+    package==2.0; python_version=="3.11"
+
+    [versions]
+    package = 1.0
+    [versions:python311]
+    package = 2.0
+    [versions:python_version=="3.12"]
+    package = 3.0
+    """
+    for constraints in _get_constraints(path=path):
+        if package_name not in constraints:
+            print(f"{constraints.file_location}: {package_name} missing.")
+            continue
+        version = constraints.get(package_name)
+        print(f"{constraints.file_location}: {package_name} {version}.")
+
+
+def set_package_version(package_name, new_version, *, path=None, commit=False):
+    """Pin package to new version in a versions file.
+
+    This can also be a pip constraints file.
+    If the package is not pinned yet, we add it.
+
+    If no path is given, we try several paths and set the version in all of them,
+    but only if the package is already there: we do not want to add one package
+    in three versions*.cfg files.
+
+    If you want to add environment markers, like "python_version >= '3.0'",
+    please just edit the files yourself.
+    """
+    updated = []
+    for constraints in _get_constraints(path=path):
+        if package_name not in constraints:
+            if path is None:
+                print(f"{constraints.file_location}: {package_name} missing.")
+                continue
+            print(
+                f"{constraints.file_location}: {package_name} not pinned yet. "
+                f"Adding pin because you explicitly gave the path."
+            )
+        # Call the 'set' function.  This will return True if the file has changed.
+        if constraints.set(package_name, new_version):
+            updated.append(constraints)
+    if not commit:
+        return
+    if not updated:
+        print("Nothing to commit.")
+        return
+    # There are updates and we want to commit them.
+    _commit_constraints(updated, f"{package_name} {new_version}")
+
+
+def _commit_constraints(updated, message):
+    """Commit the changed constraints/versions files in one commit."""
+    # Import here: git is slow to import, and we only need it for committing.
+    from plone.releaser.package import buildout_coredev
+
+    import git
+
+    with buildout_coredev() as core_repo:
+        added = []
+        for constraints in updated:
+            try:
+                core_repo.git.add(constraints.path)
+                added.append(constraints.path)
+            except git.GitCommandError:
+                # most likely a file that is ignored by git
+                pass
+        if not added:
+            print("WARNING: no files were added to the commit")
+            return
+        print("Committing changes to these files:")
+        for path in added:
+            print(f"- {path}")
+        core_repo.git.commit(message=message)
+        print(f"Committed changes: {message}")
+
+
+def set_package_versions(pins, *, path=None, commit=False):
+    """Pin several packages to new versions in the versions files.
+
+    Read the pins from a file, or from standard input when you pass '-'.
+    Use one pin per line, for example 'plone.api==2.0' or 'plone.api = 2.0'.
+
+    This works like set-package-version, but each file is read and written
+    only once, and with --commit we make a single commit for all changes.
+    """
+    if pins == "-":
+        text = sys.stdin.read()
+    else:
+        text = Path(pins).read_text()
+    try:
+        versions = parse_pins(text)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    if not versions:
+        print("No version pins given.")
+        return
+    updated = []
+    for constraints in _get_constraints(path=path):
+        to_set = {}
+        for package_name, new_version in versions.items():
+            if package_name not in constraints:
+                if path is None:
+                    print(f"{constraints.file_location}: {package_name} missing.")
+                    continue
+                print(
+                    f"{constraints.file_location}: {package_name} not pinned yet. "
+                    f"Adding pin because you explicitly gave the path."
+                )
+            to_set[package_name] = new_version
+        if to_set and constraints.update_many(to_set):
+            updated.append(constraints)
+    if not commit:
+        return
+    if not updated:
+        print("Nothing to commit.")
+        return
+    if len(versions) == 1:
+        package_name, new_version = next(iter(versions.items()))
+        message = f"{package_name} {new_version}"
+    else:
+        lines = [
+            f"{package_name} {version}" for package_name, version in versions.items()
+        ]
+        message = "Update versions of {} packages\n\n{}".format(
+            len(versions), "\n".join(lines)
+        )
+    _commit_constraints(updated, message)
+
+
+def _get_paths(path, patterns):
+    paths = []
+    if path:
+        if not isinstance(path, Path):
+            path = Path(path)
+        if path.is_dir():
+            for pat in patterns:
+                paths.extend(glob.glob(str(path / pat)))
+        else:
+            paths = [path]
+    else:
+        for pat in patterns:
+            paths.extend(glob.glob(pat))
+    all_paths = []
+    for path in paths:
+        if not isinstance(path, Path):
+            path = Path(path)
+        all_paths.append(path)
+    return all_paths
+
+
+def versions2constraints(*, path=None):
+    """Take a Buildout versions file and create a pip constraints file out of it.
+
+    If a path is given, we handle only that file.
+    If no path is given, we use versions*.cfg.
+    """
+    paths = _get_paths(path, ["versions*.cfg"])
+    for path in paths:
+        versions = VersionsFile(path, with_markers=True)
+        # Create path to constraints*.txt instead of versions*.cfg.
+        filepath = versions.path
+        filename = str(filepath)[len(str(filepath.parent)) + 1 :]
+        filename = filename.replace("versions", "constraints").replace(".cfg", ".txt")
+        constraints_path = filepath.parent / filename
+        versions.to_pip(constraints_path)
+
+
+def constraints2versions(*, path=None):
+    """Take a pip constraints file and create a Buildout versions file out of it.
+
+    If a path is given, we handle only that file.
+    If no path is given, we use constraints*.txt.
+    """
+    paths = _get_paths(path, ["constraints*.txt"])
+    for path in paths:
+        constraints = ConstraintsFile(path, with_markers=True)
+        # Create path to versions*.cfg instead of constraints*.txt.
+        filepath = constraints.path
+        filename = str(filepath)[len(str(filepath.parent)) + 1 :]
+        filename = filename.replace("constraints", "versions").replace(".txt", ".cfg")
+        versions_path = filepath.parent / filename
+        constraints.to_buildout(versions_path)
+
+
+def buildout2pip(*, path=None):
+    """Take a Buildout file and create a pip/mxdev file out of it.
+
+    If a path is given, we handle only that file, guessing whether it is a file
+    with versions or sources or checkouts.
+    If no path is given, we use versions*.cfg, sources*.cfg and checkouts*.cfg.
+    """
+    paths = _get_paths(path, ["versions*.cfg", "sources*.cfg", "checkouts*.cfg"])
+    for path in paths:
+        if path.name.startswith("versions"):
+            buildout_file = VersionsFile(path, with_markers=True)
+        elif path.name.startswith("sources"):
+            buildout_file = SourcesFile(path)
+        elif path.name.startswith("checkouts"):
+            buildout_file = CheckoutsFile(path)
+        # Create path to constraints*.txt instead of versions*.cfg, etc.
+        filepath = buildout_file.path
+        filename = str(filepath)[len(str(filepath.parent)) + 1 :]
+        filename = filename.replace("versions", "constraints")
+        if "checkouts" in filename or "sources" in filename:
+            filename = (
+                filename.replace("checkouts", "mxcheckouts")
+                .replace("sources", "mxsources")
+                .replace(".cfg", ".ini")
+            )
+        else:
+            filename = filename.replace(".cfg", ".txt")
+        pip_path = filepath.parent / filename
+        buildout_file.to_pip(pip_path)
+
+
+def pip2buildout(*, path=None):
+    """Take a pip/mxdev files and create a Buildout file out of it.
+
+    If a path is given, we handle only that file, guessing whether it is a file
+    with versions or sources or checkouts.
+    If no path is given, we use constraints*.txt, mxsources*.ini and mxcheckouts*.ini.
+    """
+    paths = _get_paths(path, ["constraints*.txt", "mxsources*.ini", "mxcheckouts*.ini"])
+    for path in paths:
+        if path.name.startswith("constraints"):
+            pip_file = ConstraintsFile(path, with_markers=True)
+        elif path.name.startswith("mxsources"):
+            pip_file = MxSourcesFile(path)
+        elif path.name.startswith("mxcheckouts"):
+            pip_file = MxCheckoutsFile(path)
+        # Create path to  versions*.cfg instead of constraints*.txt, etc.
+        filepath = pip_file.path
+        filename = str(filepath)[len(str(filepath.parent)) + 1 :]
+        filename = filename.replace("constraints", "versions")
+        if "mxcheckouts" in filename or "mxsources" in filename:
+            filename = (
+                filename.replace("mxcheckouts", "checkouts")
+                .replace("mxsources", "sources")
+                .replace(".ini", ".cfg")
+            )
+        else:
+            filename = filename.replace(".txt", ".cfg")
+        buildout_path = filepath.parent / filename
+        pip_file.to_buildout(buildout_path)
@@ -0,0 +1,240 @@
+"""Get package data from the api of a code forge instead of cloning.
+
+For GitHub we can ask in one GraphQL query for the tags, the branch head
+and the recent history of dozens of repositories.  When the answer is not
+good enough, for example because the pinned version is too far back in the
+history, the package falls back to cloning.
+"""
+
+from plone.releaser.package import CommitInfo
+from plone.releaser.package import ScanResult
+from urllib.error import URLError
+from urllib.parse import urlparse
+from urllib.request import Request
+from urllib.request import urlopen
+
+import json
+import os
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+GITHUB_TOKEN_VARIABLE = "GITHUB_TOKEN"
+REPOSITORY_QUERY = """
+  r{index}: repository(owner: $owner{index}, name: $name{index}) {{
+    ref(qualifiedName: $ref{index}) {{
+      target {{
+        ... on Commit {{
+          oid
+          history(first: {history}) {{
+            nodes {{
+              oid
+              messageHeadline
+              message
+              author {{ name }}
+              parents(first: 10) {{ nodes {{ oid }} }}
+            }}
+          }}
+        }}
+      }}
+    }}
+    refs(refPrefix: "refs/tags/", first: 100,
+         orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{
+      nodes {{
+        name
+        target {{
+          oid
+          ... on Tag {{ target {{ oid }} }}
+        }}
+      }}
+    }}
+  }}"""
+
+
+def parse_github_url(url):
+    """Get (owner, name) from a GitHub repository url.
+
+    Returns None when this is not a GitHub url.
+    """
+    if "://" in url:
+        parsed = urlparse(url)
+        host = parsed.hostname
+        path = parsed.path
+    else:
+        # scp-like syntax: git@github.com:plone/plone.api.git
+        host, _, path = url.partition(":")
+        host = host.split("@")[-1]
+    if host != "github.com":
+        return None
+    parts = path.strip("/").split("/")
+    if len(parts) != 2:
+        return None
+    owner, name = parts
+    if name.endswith(".git"):
+        name = name[: -len(".git")]
+    return owner, name
+
+
+def commits_between(history, start, end):
+    """Get the commits in 'start..end' from a partial history.
+
+    'history' is a list of commit nodes from GraphQL, newest first,
+    starting at 'end'.  We return the commits that are not reachable
+    from 'start', like 'git rev-list start..end' does.
+    Returns None when 'start' is not in this part of the history.
+    """
+    by_oid = {node["oid"]: node for node in history}
+    if start not in by_oid or not history or history[0]["oid"] != end:
+        return None
+    # Mark everything that is reachable from start.
+    seen = set()
+    todo = [start]
+    while todo:
+        oid = todo.pop()
+        if oid in seen or oid not in by_oid:
+            continue
+        seen.add(oid)
+        todo.extend(parent["oid"] for parent in by_oid[oid]["parents"]["nodes"])
+    return [node for node in history if node["oid"] not in seen]
+
+
+class ForgeBackend:
+    """Get the data for the package update report from a code forge.
+
+    This is the interface that Package expects.
+    """
+
+    def prefetch(self, packages):
+        """Get the data for many packages at once."""
+
+    def scan(self, package):
+        """Return a ScanResult, or None when we cannot tell.
+
+        In the last case the package clones the repository.
+        """
+        return None
+
+
+class GitHubBackend(ForgeBackend):
+    """Get package data from the GitHub GraphQL api.
+
+    You need a token, which we read from the GITHUB_TOKEN environment
+    variable by default.
+    """
+
+    def __init__(self, token=None, url=GITHUB_GRAPHQL_URL, batch_size=20, history=100):
+        if token is None:
+            token = os.environ.get(GITHUB_TOKEN_VARIABLE)
+        self.token = token
+        self.url = url
+        self.batch_size = batch_size
+        self.history = history
+        # Map from (owner, name, branch) to the repository data.
+        # The data is None when we could not get it.
+        self._data = {}
+
+    def key(self, package):
+        if package.source is None:
+            return None
+        owner_name = parse_github_url(package.source.url)
+        if owner_name is None:
+            return None
+        return owner_name + (package.source.branch,)
+
+    def prefetch(self, packages):
+        keys = []
+        for package in packages:
+            if package.version is None:
+                # Nothing to check.
+                continue
+            key = self.key(package)
+            if key is not None and key not in self._data and key not in keys:
+                keys.append(key)
+        for start in range(0, len(keys), self.batch_size):
+            self.fetch(keys[start : start + self.batch_size])
+
+    def fetch(self, keys):
+        """Fetch the data for a list of (owner, name, branch) keys."""
+        parts = []
+        arguments = []
+        variables = {}
+        for index, (owner, name, branch) in enumerate(keys):
+            parts.append(REPOSITORY_QUERY.format(index=index, history=self.history))
+            arguments.append(
+                f"$owner{index}: String!, $name{index}: String!, $ref{index}: String!"
+            )
+            variables[f"owner{index}"] = owner
+            variables[f"name{index}"] = name
+            variables[f"ref{index}"] = f"refs/heads/{branch}"
+        query = "query({}) {{{}\n}}".format(", ".join(arguments), "".join(parts))
+        body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+        request = Request(
+            self.url,
+            data=body,
+            headers={
+                "Authorization": f"bearer {self.token}",
+                "Content-Type": "application/json",
+            },
+        )
+        try:
+            with urlopen(request) as response:
+                data = json.loads(response.read()).get("data") or {}
+        except (URLError, OSError, ValueError) as exc:
+            print(f"Could not query {self.url}: {exc}")
+            data = {}
+        for index, key in enumerate(keys):
+            self._data[key] = data.get(f"r{index}")
+
+    def scan(self, package):
+        key = self.key(package)
+        if key is None:
+            return None
+        if key not in self._data:
+            self.fetch([key])
+        repository = self._data[key]
+        if not repository or not repository.get("ref"):
+            return None
+        target = repository["ref"]["target"]
+        head = target["oid"]
+        history = target["history"]["nodes"]
+
+        # Map from commit to tag names.
+        tags = {}
+        for tag in repository["refs"]["nodes"]:
+            tag_target = tag["target"]
+            # An annotated tag points to a tag object, which points to a commit.
+            oid = tag_target.get("target", {}).get("oid") or tag_target["oid"]
+            tags.setdefault(oid, []).append(tag["name"])
+
+        result = ScanResult(package.name)
+        for node in history:
+            if node["oid"] in tags:
+                result.latest_tag = max(tags[node["oid"]])
+                break
+        else:
+            # No tag in the recent history.  Let git try harder.
+            return None
+
+        version_oid = None
+        for oid, names in tags.items():
+            if package.version in names:
+                version_oid = oid
+                break
+        if version_oid is None:
+            return None
+        commits = commits_between(history, version_oid, head)
+        if commits is None:
+            return None
+        result.commits_since_release = [self.commit_info(node) for node in commits]
+
+        result.ignored_commit = package.commit_ignores.get(package.name)
+        if result.ignored_commit is not None:
+            commits = commits_between(history, result.ignored_commit, head)
+            if commits is not None:
+                result.commits_since_ignore = [
+                    self.commit_info(node) for node in commits
+                ]
+        return result
+
+    @staticmethod
+    def commit_info(node):
+        author = (node.get("author") or {}).get("name") or ""
+        return CommitInfo(node["oid"], author, node["messageHeadline"], node["message"])
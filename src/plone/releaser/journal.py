@@ -0,0 +1,96 @@
+"""Journal of the packages that the report command has checked.
+
+After checking a package, we append a line of JSON to the journal,
+with its name and the outcome: done, or failed with an error.
+When the report stops halfway, for example because GitHub quits,
+you can run it again with --resume: we skip the packages that are done,
+and check the others, including the ones that failed.
+
+We use package names, not positions, so this keeps working when
+packages are added to or removed from the sources in the meantime.
+"""
+
+import json
+import os
+import pathlib
+import time
+
+JOURNAL_FILENAME = ".report_journal.jsonl"
+DONE = "done"
+FAILED = "failed"
+
+
+class Journal:
+    """Append-only journal of checked packages, one JSON line per package."""
+
+    def __init__(self, path=None):
+        if path is None:
+            path = JOURNAL_FILENAME
+        self.path = pathlib.Path(path)
+
+    def entries(self):
+        """Return a map from package name to its last entry.
+
+        A line that was only half written when we stopped is ignored.
+        """
+        entries = {}
+        try:
+            with self.path.open() as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry["name"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def done(self):
+        """Return the set of package names that we do not have to check again."""
+        return {
+            name for name, entry in self.entries().items() if entry["status"] == DONE
+        }
+
+    def failed(self):
+        """Return the set of package names that failed the last time."""
+        return {
+            name for name, entry in self.entries().items() if entry["status"] == FAILED
+        }
+
+    def clear(self):
+        """Start a new journal."""
+        self.path.unlink(missing_ok=True)
+
+    def _ends_with_newline(self):
+        """Is the journal empty, or does it end with a newline?"""
+        try:
+            with self.path.open("rb") as journal_file:
+                journal_file.seek(0, os.SEEK_END)
+                if journal_file.tell() == 0:
+                    return True
+                journal_file.seek(-1, os.SEEK_END)
+                return journal_file.read(1) == b"\n"
+        except FileNotFoundError:
+            return True
+
+    def record(self, name, error=None):
+        """Record that we have checked a package.
+
+        We write the line to disk right away, so it survives a crash.
+        When a crash left a half written line, we start on a new line,
+        so at least this entry can be read.
+        """
+        entry = {
+            "name": name,
+            "status": FAILED if error else DONE,
+            "error": error,
+            "timestamp": time.time(),
+        }
+        line = json.dumps(entry) + "\n"
+        if not self._ends_with_newline():
+            line = "\n" + line
+        with self.path.open("a") as journal_file:
+            journal_file.write(line)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
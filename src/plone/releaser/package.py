@@ -8,26 +8,64 @@ from plone.releaser import ALWAYS_CHECKED_OUT
 from plone.releaser import IGNORED_PACKAGES
 from plone.releaser import PACKAGE_ACTIONS
 from plone.releaser import THIRD_PARTY_PACKAGES
-from plone.releaser.db import IgnoresDB
+from plone.releaser.cache import get_size
+from plone.releaser.db import DB_FILENAME
+from plone.releaser.db import get_ignores_db
+from plone.releaser.timing import count
+from plone.releaser.timing import enabled as timing_enabled
+from plone.releaser.timing import phase
 from shutil import rmtree
 from tempfile import mkdtemp
 
 import git
+import hashlib
 import os
+import time
 
 
 @contextmanager
-def git_repo(source):
+def git_repo(source, cache=None):
     """Handle temporal git repositories.
 
     It ensures that a git repository is cloned on a temporal folder that is
     removed after being used.
 
+    When a plone.releaser.cache.RepoCache is passed, we use a persistent
+    bare repository from the cache instead, and only fetch what is new.
+
     See an example of this kind of context managers here:
     http://preshing.com/20110920/the-python-with-statement-by-example/
     """
+    if cache is not None:
+        # Walking the repository to see what we fetched is only worth it
+        # when we are timing.
+        path = cache.repo_path(source.name)
+        measure = timing_enabled()
+        size = get_size(path) if measure and path.exists() else 0
+        with phase(source.name, "fetch"):
+            repo = cache.get_repo(source)
+        if measure:
+            count(source.name, "bytes fetched", max(0, get_size(path) - size))
+        try:
+            yield repo
+        finally:
+            repo.close()
+        return
+
     tmp_dir = mkdtemp()
-    repo = git.Repo.clone_from(source.url, tmp_dir, branch=source.branch, depth=100)
+    # We only need the commits and tags, not the file contents.
+    # Without a checkout, git does not download the files of the branch.
+    with phase(source.name, "clone"):
+        repo = git.Repo.clone_from(
+            source.url,
+            tmp_dir,
+            branch=source.branch,
+            depth=100,
+            filter="blob:none",
+            no_checkout=True,
+        )
+    if timing_enabled():
+        count(source.name, "bytes fetched", get_size(tmp_dir))
 
     # give the control back
     yield repo
@@ -37,18 +75,84 @@ def git_repo(source):
     rmtree(tmp_dir)
 
 
+def ls_remote(url):
+    """Get the branches and tags of a remote repository, without cloning it.
+
+    Returns a dictionary from reference to commit sha, for example:
+
+    {
+        "refs/heads/main": "1234...",
+        "refs/tags/1.0": "5678...",
+        "refs/tags/1.0^{}": "9abc...",
+    }
+
+    The last one is for annotated tags: it points to the tagged commit.
+    """
+    output = git.cmd.Git().ls_remote("--tags", "--heads", url)
+    refs = {}
+    for line in output.splitlines():
+        sha, ref = line.split()
+        refs[ref] = sha
+    return refs
+
+
 @contextmanager
-def buildout_coredev():
+def buildout_coredev(path=None):
     """Context manager for buildout.coredev git repositories.
 
-    Or actually any git repository in the current working directory.
+    Or actually any git repository in the given path,
+    by default the current working directory.
     But plone.releaser is targeted at the Plone core development buildout.
     """
-    repo = git.Repo(os.getcwd())
+    repo = git.Repo(path or os.getcwd())
     yield repo
     del repo
 
 
+class CommitInfo:
+    """The parts of a git commit that we are interested in.
+
+    Unlike a GitPython commit, this stays usable after the temporary
+    clone has been removed.
+    """
+
+    def __init__(self, hexsha, author, summary, message=""):
+        self.hexsha = hexsha
+        self.author = author
+        self.summary = summary
+        self.message = message
+
+    @classmethod
+    def from_git(cls, commit):
+        return cls(commit.hexsha, commit.author.name, commit.summary, commit.message)
+
+    def __repr__(self):
+        return f"<CommitInfo {self.hexsha[:8]} {self.author}: {self.summary}>"
+
+
+def commit_record(commit):
+    """Return a dictionary with the data of a CommitInfo, for JSON."""
+    return {"sha": commit.hexsha, "author": commit.author, "summary": commit.summary}
+
+
+class ScanResult:
+    """The data we gathered about a package by looking at its repository."""
+
+    def __init__(self, name):
+        self.name = name
+        # Error message when the repository could not be checked at all.
+        self.error = None
+        self.latest_tag = None
+        # List of CommitInfo, or None when we could not read them.
+        self.commits_since_release = None
+        # Commit that we previously decided to ignore.
+        self.ignored_commit = None
+        # List of CommitInfo, or None when we could not read them.
+        self.commits_since_ignore = None
+        # Did we clone or fetch the repository for this result?
+        self.fetched = False
+
+
 class Package:
     # A reference to an plone.releaser.buildout.Buildout instance
     buildout = None
@@ -72,14 +176,50 @@ class Package:
     # Database of per package ignored commits
     commit_ignores = None
 
-    def __init__(self, buildout, package):
+    # Optional plone.releaser.cache.RepoCache to use instead of temporary clones
+    repo_cache = None
+
+    # Optional plone.releaser.forge.ForgeBackend to ask before cloning
+    forge = None
+
+    # Optional plone.releaser.cache.ScanCache with results of earlier scans
+    scan_cache = None
+
+    # Ask the remote for its branches and tags before cloning
+    use_ls_remote = True
+
+    # How many seconds the last scan took
+    scan_seconds = None
+
+    def __init__(
+        self,
+        buildout,
+        package,
+        repo_cache=None,
+        forge=None,
+        scan_cache=None,
+        use_ls_remote=True,
+    ):
         self.buildout = buildout
+        self.repo_cache = repo_cache
+        self.forge = forge
+        self.scan_cache = scan_cache
+        self.use_ls_remote = use_ls_remote
+        self._remote_refs = None
         self.name = package
-        self.source = self.buildout.sources.get(self.name)
-        self.version = self.get_version()
-        self.commit_ignores = IgnoresDB()
-
-    def __call__(self, action=ACTION_INTERACTIVE):
+        with phase(self.name, "config"):
+            self.source = self.buildout.sources.get(self.name)
+            self.version = self.get_version()
+        self.commit_ignores = get_ignores_db(self.buildout.coredev_dir / DB_FILENAME)
+
+    def __call__(self, action=ACTION_INTERACTIVE, result=None):
+        """Check the package and act on the outcome.
+
+        You can pass the result of an earlier call to ``scan``.
+        This is what we do when scanning packages in parallel:
+        the scanning happens in worker threads, but any printing and
+        asking happens here, one package at a time.
+        """
         if action not in PACKAGE_ACTIONS:
             print(f"This package action does not exist: {action}")
             return
@@ -96,80 +236,279 @@ class Package:
         ):
             return
 
-        # clone the package and gather data about it
-        with git_repo(self.source) as repo:
-            # exit early if no tag can be found
-            latest_tag_in_branch = self.latest_tag(repo)
-            if latest_tag_in_branch is None:
-                return
+        if result is None:
+            result = self.scan()
+        with phase(self.name, "process"):
+            self.process(result)
 
-            # if there is a newer tag of the package not in buildout.coredev
-            # versions.cfg, ask/add/report about it
-            self.update_version(latest_tag_in_branch)
+    def scan(self):
+        """Clone the package and gather data about it.
 
-            commits_since_release = self.latest_commits(repo)
-            if not commits_since_release:
-                # There are no changes since the last release (i.e. last tag)
-                # so we are done.
-                self.remove()
-                return
-            if len(commits_since_release) == 1:
-                # If there is only one commit since release and it is only the
-                # regular version bump, then we are done.
-                latest_commit_message = commits_since_release[0].message.lower()
-                if (
-                    latest_commit_message.startswith("vb")
-                    or "back to development" in latest_commit_message
-                    or "bump version" in latest_commit_message
-                    or "version bump" in latest_commit_message
-                ):
-                    self.remove()
-                    return
-
-            # Maybe there are more commits but we have previously seen them
-            # and decided they are not interesting.  We only want to show
-            # interesting commits.
-            interesting_commits = commits_since_release
-            latest_ignored_commit = self.commit_ignores.get(self.name)
-            if latest_ignored_commit is not None:
+        When we have a forge backend, we ask that first.
+
+        This does not print or ask anything, and does not change any files,
+        so it is safe to call this in a worker thread.
+        Returns a ScanResult, or None when there is nothing to check.
+        Errors when cloning are not caught: the caller may want to retry.
+        """
+        start = time.monotonic()
+        try:
+            with phase(self.name, "scan"):
+                return self._scan()
+        finally:
+            self.scan_seconds = time.monotonic() - start
+
+    def _scan(self):
+        if (
+            self.name in IGNORED_PACKAGES
+            or self.version is None
+            or self.source is None
+            or self.source.protocol != "git"
+        ):
+            return None
+
+        if self.forge is not None:
+            with phase(self.name, "forge"):
+                result = self.forge.scan(self)
+            if result is not None:
+                return result
+
+        result = ScanResult(self.name)
+        if self.use_ls_remote and self.unchanged_since_release():
+            # The branch is still at the pinned tag: no need to clone.
+            result.latest_tag = self.version
+            result.commits_since_release = []
+            return result
+
+        key = self.scan_key() if self.scan_cache is not None else None
+        if key is not None:
+            with phase(self.name, "scan cache"):
+                cached = self.scan_cache.get(key)
+            if cached is not None:
+                # Nothing has changed since the previous scan.
+                cached.fetched = False
+                return cached
+
+        with git_repo(self.source, cache=self.repo_cache) as repo:
+            result.fetched = True
+            result.latest_tag = self.latest_tag(repo)
+            if result.latest_tag is None:
+                # No need to look further.
+                return result
+            result.commits_since_release = self.latest_commits(repo)
+            result.ignored_commit = self.commit_ignores.get(self.name)
+            if result.ignored_commit is not None:
                 try:
-                    commits_since_ignore = self._commits_between(
-                        repo, latest_ignored_commit, self.source.branch
+                    result.commits_since_ignore = self._commits_between(
+                        repo, result.ignored_commit, self.source.branch
                     )
                 except git.exc.GitCommandError:
                     # Most likely error is that this fails:
                     # git rev-list latest_ignored_commit..master
                     # This happens when latest_ignored_commit is not on the master branch.
                     # See https://github.com/plone/plone.releaser/issues/39
-                    commits_since_ignore = interesting_commits
-                if not commits_since_ignore:
-                    # Okay, nothing interesting.
-                    self.remove()
-                    return
-                # I guess we could have ignored something last month
-                # and have released since.  Check which commits are still interesting:
-                # the commits since release or since ignore.
-                if len(commits_since_ignore) < len(commits_since_release):
-                    interesting_commits = commits_since_ignore
-
-            # Check for checkout
-            if self.name not in self.buildout.checkouts:
-                msg = "\nWARNING: No auto-checkout exists for {0}\n Changes in {0}:"  # noqa
-                self.print_commits(commits_since_release, message=msg.format(self.name))
-
-                if self.name in THIRD_PARTY_PACKAGES:
-                    msg = "NOTE: {0} is a third-party package."
-                    print(msg.format(self.name))
-
-                self.add(commits_since_release)
-
-            elif not self.interactive:
-                msg = f"\nChanges in {self.name}:"
-                self.print_commits(commits_since_release, message=msg)
-
-                if self.name in THIRD_PARTY_PACKAGES:
-                    msg = "NOTE: {0} is a third-party package."
-                    print(msg.format(self.name))
+                    pass
+        if key is not None:
+            self.scan_cache.set(key, result)
+        return result
+
+    def remote_refs(self):
+        """Get the branches and tags of the remote repository, once."""
+        if self._remote_refs is None:
+            with phase(self.name, "ls-remote"):
+                self._remote_refs = ls_remote(self.source.url)
+        return self._remote_refs
+
+    def scan_key(self):
+        """Return the key for the scan cache.
+
+        This contains everything that the scan result depends on.
+        Returns None when we do not know the head of the branch,
+        for example because we do not use ls-remote.
+        """
+        if not self.use_ls_remote:
+            return None
+        refs = self.remote_refs()
+        head = refs.get(f"refs/heads/{self.source.branch}")
+        if head is None:
+            return None
+        # A new tag on the same commit changes the latest tag.
+        tags = "\n".join(
+            f"{ref} {sha}"
+            for ref, sha in sorted(refs.items())
+            if ref.startswith("refs/tags/")
+        )
+        return (
+            self.name,
+            self.source.url,
+            self.source.branch,
+            head,
+            hashlib.sha256(tags.encode("utf-8")).hexdigest(),
+            self.version,
+            self.commit_ignores.get(self.name),
+        )
+
+    def unchanged_since_release(self):
+        """Is the head of the branch the same commit as the pinned version?
+
+        We ask the remote for its branches and tags, which is a lot cheaper
+        than a clone.  The tag may be annotated: then the tag points
+        to a tag object, and the tag with '^{}' points to the commit.
+        """
+        refs = self.remote_refs()
+        head = refs.get(f"refs/heads/{self.source.branch}")
+        tagged = refs.get(f"refs/tags/{self.version}^{{}}") or refs.get(
+            f"refs/tags/{self.version}"
+        )
+        return head is not None and head == tagged
+
+    def process(self, result):
+        """Report and act on the result of a scan."""
+        if result is None:
+            return
+        if result.error:
+            print(f"\nCould not check {self.name}: {result.error}")
+            return
+
+        # exit early if no tag can be found
+        latest_tag_in_branch = result.latest_tag
+        if latest_tag_in_branch is None:
+            if self.report_only:
+                print(f"Unable to check tags for {self.name}")
+            return
+
+        # if there is a newer tag of the package not in buildout.coredev
+        # versions.cfg, ask/add/report about it
+        self.update_version(latest_tag_in_branch)
+
+        commits_since_release = result.commits_since_release
+        if commits_since_release is None:
+            print(
+                "\nCould not read commits between {} and {} for package {}".format(
+                    self.version, self.source.branch, self.name
+                )
+            )
+        if not self.interesting_commits(result):
+            self.remove()
+            return
+
+        # Check for checkout
+        if self.name not in self.buildout.checkouts:
+            msg = "\nWARNING: No auto-checkout exists for {0}\n Changes in {0}:"  # noqa
+            self.print_commits(commits_since_release, message=msg.format(self.name))
+
+            if self.name in THIRD_PARTY_PACKAGES:
+                msg = "NOTE: {0} is a third-party package."
+                print(msg.format(self.name))
+
+            self.add(commits_since_release)
+
+        elif not self.interactive:
+            msg = f"\nChanges in {self.name}:"
+            self.print_commits(commits_since_release, message=msg)
+
+            if self.name in THIRD_PARTY_PACKAGES:
+                msg = "NOTE: {0} is a third-party package."
+                print(msg.format(self.name))
+
+    @staticmethod
+    def interesting_commits(result):
+        """Return the commits of a scan result that someone should look at.
+
+        This is an empty list when there are no changes since the release,
+        when the only change is the regular version bump, or when we have
+        previously seen and ignored all commits.
+        """
+        commits_since_release = result.commits_since_release
+        if not commits_since_release:
+            # There are no changes since the last release (i.e. last tag).
+            return []
+        if len(commits_since_release) == 1:
+            # If there is only one commit since release and it is only the
+            # regular version bump, then we are done.
+            latest_commit_message = commits_since_release[0].message.lower()
+            if (
+                latest_commit_message.startswith("vb")
+                or "back to development" in latest_commit_message
+                or "bump version" in latest_commit_message
+                or "version bump" in latest_commit_message
+            ):
+                return []
+
+        # Maybe there are more commits but we have previously seen them
+        # and decided they are not interesting.  We only want to show
+        # interesting commits.
+        interesting_commits = commits_since_release
+        if result.ignored_commit is not None:
+            commits_since_ignore = result.commits_since_ignore
+            if commits_since_ignore is None:
+                # We could not compare with the ignored commit.
+                commits_since_ignore = interesting_commits
+            if not commits_since_ignore:
+                # Okay, nothing interesting.
+                return []
+            # I guess we could have ignored something last month
+            # and have released since.  Check which commits are still interesting:
+            # the commits since release or since ignore.
+            if len(commits_since_ignore) < len(commits_since_release):
+                interesting_commits = commits_since_ignore
+        return interesting_commits
+
+    def record(self, result, seconds=None):
+        """Return a dictionary with what we know about the package.
+
+        This is what the reports print as JSON, one line per package.
+        Like ``process``, it looks at the result of ``scan``,
+        but it does not print or ask anything, or change any files.
+        """
+        in_checkouts = self.name in self.buildout.checkouts
+        record = {
+            "name": self.name,
+            "version": self.version,
+            "branch": self.source.branch if self.source is not None else None,
+            "status": "ok",
+            "error": None,
+            "latest_tag": None,
+            "newer_tag": False,
+            "commits_since_release": None,
+            "interesting_commits": [],
+            "in_checkouts": in_checkouts,
+            "checkout": None,
+            "third_party": self.name in THIRD_PARTY_PACKAGES,
+            "seconds": seconds,
+        }
+        if result is None:
+            record["status"] = "skipped"
+            return record
+        if result.error:
+            record["status"] = "error"
+            record["error"] = result.error
+            return record
+        record["latest_tag"] = result.latest_tag
+        if result.latest_tag is None:
+            record["status"] = "no-tag"
+            return record
+        record["newer_tag"] = result.latest_tag > self.version
+        if result.commits_since_release is not None:
+            record["commits_since_release"] = [
+                commit_record(commit) for commit in result.commits_since_release
+            ]
+        interesting_commits = self.interesting_commits(result)
+        record["interesting_commits"] = [
+            commit_record(commit) for commit in interesting_commits
+        ]
+        # Mirror the conditions of the 'remove' and 'add' methods.
+        if not interesting_commits:
+            if in_checkouts and self.name not in ALWAYS_CHECKED_OUT:
+                record["checkout"] = "remove"
+        elif not in_checkouts:
+            record["checkout"] = "add"
+        return record
+
+    def confirm(self, question, **kwargs):
+        """Ask a question, and time how long we wait for the answer."""
+        with phase(self.name, "prompt"):
+            return confirm(question, **kwargs)
 
     def set_interaction_and_report(self, action):
         if action == ACTION_REPORT:
@@ -203,10 +542,10 @@ class Package:
     def latest_tag(self, repo):
         tag = None
         try:
-            tag = repo.git.describe("--abbrev=0", "--tags")
+            with phase(self.name, "describe"):
+                tag = repo.git.describe("--abbrev=0", "--tags")
         except git.exc.GitCommandError:
-            if self.report_only:
-                print(f"Unable to check tags for {self.name}")
+            pass
 
         return tag
 
@@ -216,17 +555,18 @@ class Package:
         try:
             commits = self._commits_between(repo, self.version, self.source.branch)
         except git.exc.GitCommandError:
-            print(
-                "\nCould not read commits between {} and {} for package {}".format(
-                    self.version, self.source.branch, self.name
-                )
-            )
+            pass
 
         return commits
 
-    @staticmethod
-    def _commits_between(repo, start, end):
-        return list(repo.iter_commits(f"{start}..{end}"))
+    def _commits_between(self, repo, start, end):
+        with phase(self.name, "iter commits"):
+            commits = [
+                CommitInfo.from_git(commit)
+                for commit in repo.iter_commits(f"{start}..{end}")
+            ]
+        count(self.name, "commits walked", len(commits))
+        return commits
 
     def remove(self):
         if self.name in self.buildout.checkouts and self.name not in ALWAYS_CHECKED_OUT:
@@ -237,11 +577,11 @@ class Package:
                 return
 
             msg = f"Remove {self.name} from checkouts.cfg"
-            if confirm(msg, default=True, skip=not self.interactive):
+            if self.confirm(msg, default=True, skip=not self.interactive):
                 self.buildout.remove_from_checkouts(self.name)
 
-                with buildout_coredev() as core_repo:
-                    checkouts_path = os.path.join(os.getcwd(), "checkouts.cfg")
+                with buildout_coredev(self.buildout.coredev_dir) as core_repo:
+                    checkouts_path = str(self.buildout.checkouts.path)
                     core_repo.git.add(checkouts_path)
                     msg = f"No new changes in {self.name}"
                     core_repo.git.commit(message=msg)
@@ -251,20 +591,24 @@ class Package:
             return
 
         msg = f"Add {self.name} to checkouts.cfg"
-        if confirm(msg, default=True, skip=not self.interactive):
+        if self.confirm(msg, default=True, skip=not self.interactive):
             self.buildout.add_to_checkouts(self.name)
 
-            with buildout_coredev() as core_repo:
-                checkouts_path = os.path.join(os.getcwd(), "checkouts.cfg")
+            with buildout_coredev(self.buildout.coredev_dir) as core_repo:
+                checkouts_path = str(self.buildout.checkouts.path)
                 core_repo.index.add([checkouts_path])
                 core_repo.index.commit(f"{self.name} has changes.")
 
-        elif confirm(
+        elif self.confirm(
             f"Ignore changes in  {self.name}",
             default=False,
             skip=not self.interactive,
         ):
-            self.commit_ignores.set(self.name, commits_since_release[0].hexsha)
+            self.commit_ignores.set(
+                self.name,
+                commits_since_release[0].hexsha,
+                branch=self.source.branch,
+            )
 
     @staticmethod
     def print_commits(commits_list, message=None):
@@ -274,7 +618,7 @@ class Package:
         for commit in commits_list:
             print(
                 "    {}: {}".format(
-                    commit.author.name,
+                    commit.author,
                     commit.summary,
                 )
             )
@@ -289,14 +633,14 @@ class Package:
         if self.report_only:
             return
 
-        if confirm("Update versions.cfg", default=True, skip=not self.interactive):
+        if self.confirm("Update versions.cfg", default=True, skip=not self.interactive):
             self.buildout.set_version(self.name, tag)
 
-            with buildout_coredev() as core_repo:
-                versions_path = os.path.join(os.getcwd(), "versions.cfg")
+            with buildout_coredev(self.buildout.coredev_dir) as core_repo:
+                versions_path = str(self.buildout.versions.path)
                 core_repo.git.add(versions_path)
                 core_repo.git.commit(message=f"{self.name}={tag}")
-                if confirm(
+                if self.confirm(
                     "Ok to push coredev?", default=True, skip=not self.interactive
                 ):
                     print("Pushing changes to server.")
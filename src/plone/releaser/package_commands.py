@@ -0,0 +1,481 @@
+"""Commands that check the packages in the sources of a coredev buildout.
+
+These need git, and some of them ask PyPI or GitHub.
+"""
+
+from argh import arg
+from argh.decorators import named
+from plone.releaser import ACTION_BATCH
+from plone.releaser import ACTION_INTERACTIVE
+from plone.releaser import ACTION_REPORT
+from plone.releaser import pypi
+from plone.releaser import THIRD_PARTY_PACKAGES
+from plone.releaser.buildout import get_buildout
+from plone.releaser.buildout import set_coredev_dir
+from plone.releaser.cache import DEFAULT_MAX_SIZE
+from plone.releaser.cache import RepoCache
+from plone.releaser.cache import ScanCache
+from plone.releaser.forge import GITHUB_TOKEN_VARIABLE
+from plone.releaser.forge import GitHubBackend
+from plone.releaser.journal import Journal
+from plone.releaser.journal import JOURNAL_FILENAME
+from plone.releaser.package import Package
+from plone.releaser.scanner import Scanner
+from plone.releaser.timing import phase
+from plone.releaser.timing import TIMINGS
+from progress.bar import Bar
+
+import json
+import sys
+import time
+
+
+def _get_buildout(kwargs):
+    """Get the buildout in the --coredev-dir, by default the current directory.
+
+    We only read its files when we need them.
+    """
+    set_coredev_dir(kwargs.get("coredev_dir"))
+    return get_buildout()
+
+
+@arg("--coredev-dir", default=None)
+def checkPypi(user, **kwargs):
+    for package in _get_buildout(kwargs).sources:
+        if package in THIRD_PARTY_PACKAGES:
+            pass
+        else:
+            if not pypi.can_user_release_package_to_pypi(user, package):
+                print(
+                    "{}: {}".format(
+                        package, ", ".join(pypi.get_users_with_release_rights(package))
+                    )
+                )
+
+
+def _get_repo_cache(kwargs):
+    """Get the repository cache, unless --no-cache was passed."""
+    if kwargs.get("no_cache"):
+        return None
+    return RepoCache()
+
+
+def _get_scan_cache(kwargs):
+    """Get the cache of scan results, unless --full was passed."""
+    if kwargs.get("full"):
+        return None
+    return ScanCache()
+
+
+def _get_forge(kwargs):
+    """Get the forge backend that was chosen with --forge.
+
+    With 'git' we only clone.  With 'github' we ask the GitHub api first.
+    """
+    forge = kwargs.get("forge") or "git"
+    if forge == "git":
+        return None
+    if forge == "github":
+        backend = GitHubBackend()
+        if not backend.token:
+            print(
+                f"WARNING: {GITHUB_TOKEN_VARIABLE} environment variable is not set. "
+                "Cloning all packages instead."
+            )
+            return None
+        return backend
+    raise ValueError(f"Unknown forge {forge}, pick git or github.")
+
+
+def _scan_packages(
+    buildout,
+    packages,
+    workers=1,
+    per_host=2,
+    repo_cache=None,
+    forge=None,
+    scan_cache=None,
+    ordered=True,
+    retries=3,
+    backoff=1.0,
+    use_ls_remote=True,
+):
+    """Yield (package, result) for all package names.
+
+    With one worker, we scan each package right before yielding it.
+    Otherwise we scan in worker threads.
+    In both cases we retry with exponential backoff when cloning fails.
+    With ordered=False, the results come in the order in which they are ready.
+    """
+    packages = [
+        Package(
+            buildout,
+            package_name,
+            repo_cache=repo_cache,
+            forge=forge,
+            scan_cache=scan_cache,
+            use_ls_remote=use_ls_remote,
+        )
+        for package_name in packages
+    ]
+    if forge is not None:
+        # Get the data for all packages in a few requests.
+        forge.prefetch(packages)
+    scanner = Scanner(
+        workers=workers, per_host=per_host, retries=retries, backoff=backoff
+    )
+    if workers <= 1:
+        for package in packages:
+            yield package, scanner.scan(package)
+        return
+    yield from scanner.scan_all(packages, ordered=ordered)
+
+
+def _sleep_between(scanned, sleep):
+    """Yield from scanned, sleeping after each package has been handled.
+
+    We only sleep when we have cloned or fetched the repository,
+    or failed to.  Otherwise we have not bothered the host much.
+    """
+    for pkg, result in scanned:
+        yield pkg, result
+        if result is None or not (result.fetched or result.error):
+            continue
+        with phase(pkg.name, "sleep"):
+            time.sleep(sleep)
+
+
+def _journaled(scanned, journal):
+    """Yield from scanned, recording each package once it has been handled."""
+    for pkg, result in scanned:
+        yield pkg, result
+        journal.record(pkg.name, error=result.error if result is not None else None)
+
+
+def _print_records(scanned):
+    """Print a JSON line for each scanned package, as soon as we have it.
+
+    A result of None means there was nothing to scan: the record says so.
+    """
+    for pkg, result in scanned:
+        print(json.dumps(pkg.record(result, seconds=pkg.scan_seconds)), flush=True)
+
+
+def _print_stats(scan_cache, output_format):
+    """Print the statistics of the scan cache.
+
+    With JSON output, they go to stderr, so stdout only has the records.
+    """
+    if scan_cache is None:
+        return
+    file = sys.stderr if output_format == "jsonl" else sys.stdout
+    print(scan_cache.stats(), file=file)
+
+
+def _start_timings(kwargs):
+    """Start timing when --timings or --trace is passed."""
+    TIMINGS.enabled = bool(kwargs.get("timings") or kwargs.get("trace"))
+
+
+def _report_timings(kwargs, output_format):
+    """Print a summary of the timings with --timings, and write --trace."""
+    if kwargs.get("timings"):
+        file = sys.stderr if output_format == "jsonl" else sys.stdout
+        print(TIMINGS.summary(), file=file)
+    if kwargs.get("trace"):
+        TIMINGS.write_trace(kwargs["trace"])
+
+
+@named("jenkins")
+@arg("--workers", default=1)
+@arg("--per-host", default=2)
+@arg("--no-cache", default=False)
+@arg("--forge", default="git", choices=["git", "github"])
+@arg("--coredev-dir", default=None)
+@arg("--full", default=False)
+@arg("--no-ls-remote", default=False)
+@arg("--format", default="text", choices=["text", "jsonl"])
+@arg("--timings", default=False)
+@arg("--trace", default=None)
+def jenkins_report(**kwargs):
+    """Read-only version of checkAllPackagesForUpdates.
+
+    With --workers higher than one, this many packages are cloned at
+    the same time, with at most --per-host at the same time per host.
+
+    Repositories are kept in a cache, see the cache-prune command.
+    Pass --no-cache to use temporary clones instead.
+
+    With --forge=github we ask the GitHub api for the tags and commits
+    of many packages at once, and only clone when that is not enough.
+    This needs a GITHUB_TOKEN environment variable.
+
+    We remember the result for each package.  When the head of its branch,
+    its pinned version and its ignored commit are the same the next time,
+    we use this result instead of looking at the repository again.
+    Pass --full to check all packages again.
+
+    Before cloning, we ask the host with 'git ls-remote' whether the
+    branch has changed since the release.  Pass --no-ls-remote to skip
+    this, for example when ls-remote is slow or blocked for a host.
+    We then always clone, and do not use the remembered results.
+
+    With --format=jsonl we print one line of JSON per package, as soon as
+    it is checked, so with more workers not in the usual order.
+
+    Pass --timings to see how long each phase took, for example cloning,
+    and which packages were slowest.  Pass --trace with a file name to
+    write a trace that you can open in chrome://tracing or Perfetto.
+    """
+    output_format = kwargs.get("format") or "text"
+    _start_timings(kwargs)
+    workers = int(kwargs["workers"])
+    per_host = int(kwargs["per_host"])
+    repo_cache = _get_repo_cache(kwargs)
+    scan_cache = _get_scan_cache(kwargs)
+    buildout = _get_buildout(kwargs)
+    scanned = _scan_packages(
+        buildout,
+        buildout.sources,
+        workers=workers,
+        per_host=per_host,
+        repo_cache=repo_cache,
+        forge=_get_forge(kwargs),
+        scan_cache=scan_cache,
+        ordered=output_format != "jsonl",
+        use_ls_remote=not kwargs.get("no_ls_remote"),
+    )
+    if output_format == "jsonl":
+        _print_records(scanned)
+    else:
+        for pkg, result in scanned:
+            pkg(action=ACTION_REPORT, result=result)
+    if repo_cache is not None:
+        repo_cache.prune()
+    _print_stats(scan_cache, output_format)
+    _report_timings(kwargs, output_format)
+
+
+@arg("--interactive", default=False)
+@arg("--no-cache", default=False)
+@arg("--coredev-dir", default=None)
+@arg("--no-ls-remote", default=False)
+def checkPackageForUpdates(package_name, **kwargs):
+    pkg = Package(
+        _get_buildout(kwargs),
+        package_name,
+        repo_cache=_get_repo_cache(kwargs),
+        use_ls_remote=not kwargs.get("no_ls_remote"),
+    )
+    if kwargs["interactive"]:
+        pkg(action=ACTION_INTERACTIVE)
+    else:
+        pkg(action=ACTION_BATCH)
+
+
+@named("report")
+@arg("--interactive", default=False)
+@arg("--sleep", default=20.0)
+@arg("--start", default=0)
+@arg("--resume", default=False)
+@arg("--retries", default=3)
+@arg("--backoff", default=1.0)
+@arg("--workers", default=1)
+@arg("--per-host", default=2)
+@arg("--no-cache", default=False)
+@arg("--forge", default="git", choices=["git", "github"])
+@arg("--coredev-dir", default=None)
+@arg("--full", default=False)
+@arg("--no-ls-remote", default=False)
+@arg("--format", default="text", choices=["text", "jsonl"])
+@arg("--timings", default=False)
+@arg("--trace", default=None)
+def checkAllPackagesForUpdates(**kwargs):
+    """Check all packages for updates.
+
+    For each package, we fetch the last 100 commits into a cache directory.
+    The next time, we only fetch the new commits.
+    With --no-cache we clone it with a depth of 100 to a temporary directory.
+
+    GitHub often quits, probably because I do too many large requests.
+    Sleeping should help, with the --sleep argument.
+    We only sleep after cloning or fetching a repository.
+
+    We keep a journal of the packages that we have checked, in
+    .report_journal.jsonl in the coredev directory.  If the command stops
+    halfway, run it again with --resume: we skip the packages that were
+    done, and check the rest, including the ones that failed.
+    When cloning fails, we try again --retries times, waiting --backoff
+    seconds the first time, and twice as long each next time.
+    You can still pass for example --start 50 to start at package 50
+    instead of the first one, but the numbers shift when packages are
+    added or removed.
+
+    With --workers higher than one, this many packages are cloned at
+    the same time, with at most --per-host at the same time per host.
+    Instead of sleeping a fixed time, we then wait longer between
+    clones when a host refuses one, and retry.  Questions and commits
+    still happen one package at a time, in the usual order.
+
+    With --forge=github we ask the GitHub api for the tags and commits
+    of many packages at once, and only clone when that is not enough.
+    This needs a GITHUB_TOKEN environment variable.
+
+    We remember the result for each package.  When the head of its branch,
+    its pinned version and its ignored commit are the same the next time,
+    we use this result instead of looking at the repository again.
+    Pass --full to check all packages again.
+
+    Before cloning, we ask the host with 'git ls-remote' whether the
+    branch has changed since the release.  Pass --no-ls-remote to skip
+    this, for example when ls-remote is slow or blocked for a host.
+    We then always clone, and do not use the remembered results.
+
+    With --format=jsonl we only report: we print one line of JSON per
+    package, as soon as it is checked, so with more workers not in the
+    usual order.  Then --interactive is ignored.
+
+    Pass --timings to see how long each phase took, for example cloning,
+    sleeping or waiting for your answers, and which packages were slowest.
+    Pass --trace with a file name to write a trace that you can open in
+    chrome://tracing or Perfetto.
+
+    We use the buildout in the current directory, or in --coredev-dir.
+    """
+    output_format = kwargs.get("format") or "text"
+    _start_timings(kwargs)
+    interactive = bool(kwargs["interactive"])
+    sleep = float(kwargs["sleep"])
+    start = int(kwargs["start"])
+    workers = int(kwargs["workers"])
+    per_host = int(kwargs["per_host"])
+    buildout = _get_buildout(kwargs)
+    packages = sorted(list(buildout.sources.items()))
+    if start > 0:
+        packages = packages[start:]
+    package_names = [package_name for package_name, source in packages]
+    journal = Journal(buildout.coredev_dir / JOURNAL_FILENAME)
+    if kwargs.get("resume"):
+        done = journal.done()
+        package_names = [name for name in package_names if name not in done]
+    else:
+        journal.clear()
+    repo_cache = _get_repo_cache(kwargs)
+    scan_cache = _get_scan_cache(kwargs)
+    scanned = _scan_packages(
+        buildout,
+        package_names,
+        workers=workers,
+        per_host=per_host,
+        repo_cache=repo_cache,
+        forge=_get_forge(kwargs),
+        scan_cache=scan_cache,
+        ordered=output_format != "jsonl",
+        use_ls_remote=not kwargs.get("no_ls_remote"),
+        retries=int(kwargs["retries"]),
+        backoff=float(kwargs["backoff"]),
+    )
+    if sleep and workers <= 1:
+        scanned = _sleep_between(scanned, sleep)
+    scanned = _journaled(scanned, journal)
+    if output_format == "jsonl":
+        _print_records(scanned)
+    else:
+        for pkg, result in Bar("Scanning", max=len(package_names)).iter(scanned):
+            if interactive:
+                pkg(action=ACTION_INTERACTIVE, result=result)
+            else:
+                pkg(action=ACTION_REPORT, result=result)
+    if repo_cache is not None:
+        repo_cache.prune()
+    _print_stats(scan_cache, output_format)
+    _report_timings(kwargs, output_format)
+    failed = journal.failed()
+    if failed:
+        file = sys.stderr if output_format == "jsonl" else sys.stdout
+        print(
+            f"Could not check {len(failed)} packages. "
+            "Run again with --resume to retry them.",
+            file=file,
+        )
+
+
+@named("cache-prune")
+@arg("--max-size", default=DEFAULT_MAX_SIZE)
+def cache_prune(**kwargs):
+    """Remove the least recently used repositories from the cache.
+
+    We keep removing repositories until the cache is smaller than --max-size,
+    for example 500M or 2G.  Use 0 to empty the cache.
+    This is done automatically at the end of the report and jenkins commands.
+    """
+    repo_cache = RepoCache()
+    for path in repo_cache.prune(kwargs["max_size"]):
+        print(f"Removed {path}")
+
+
+@named("changelog")
+@arg("--start")
+@arg("--end", default="here")
+@arg("--package", default=None)
+@arg("--workers", default=16)
+@arg("--no-cache", default=False)
+@arg("--offline", default=False)
+@arg("--coredev-dir", default=None)
+def changelog(**kwargs):
+    """Build a unified changelog.
+
+    For each package we get the changes between the start and end version,
+    and unify them, so the changes of all intermediate versions get combined:
+    all bug fixes together, all new features, etcetera.
+
+    - 'start' is for example 6.0.7.
+      This is used to get versions.cfg from dist.plone.org.
+    - Same for 'end', where the default is 'here', meaning we take
+      versions.cfg from the current directory.
+    - With 'package' you can restrict to a single package.]
+      This is mostly useful when debugging this command.
+      You can separate packages with a comma:
+      --package=plone.restapi,Products.CMFPlone
+    - With 'workers' you set the maximum number of concurrent requests
+      when getting the changelogs.
+    - We keep the downloaded files in a cache, remember where we found the
+      changelog of each package, and which packages had none.
+      Changelogs are only downloaded again when they have changed.
+      Pass --no-cache to download everything and look everywhere again.
+    - With --offline we only use the cache.
+    - With --coredev-dir you use the buildout in this directory,
+      instead of the current directory.
+
+    We get the changes from the repository for this package,
+    as defined in sources.cfg, and try a few locations, for example:
+    https://raw.githubusercontent.com/plone/plone.restapi/main/CHANGES.rst
+
+    Sample output in a problematic case:
+
+        $ bin/manage changelog --start=6.0.7 --end=6.0.8 --package=plone.restapi
+        Parsed https://dist.plone.org/release/6.0.7/versions.cfg
+        Parsed https://dist.plone.org/release/6.0.8/versions.cfg
+        plone.restapi has a newer version
+        ERROR: plone.restapi: Start version 8.43.3 not found in changelog contents.
+
+        plone.restapi: 8.43.3 → 9.1.2
+        -----------------------------
+
+    The problem here is we get the CHANGES.rst file from the main plone.restapi branch,
+    and this does not include a header for version 8.43.3: this header is only on the
+    8.x branch.
+    When we run the same command with `--start=6.0.6`, it does work, and you get the
+    unified changes between version 8.40.0 and 9.1.2.
+    """
+    from plone.releaser.changelog import build_unified_changelog
+
+    _get_buildout(kwargs)
+    build_unified_changelog(
+        kwargs["start"],
+        kwargs["end"],
+        packages=kwargs["package"],
+        workers=int(kwargs["workers"]),
+        cache=not kwargs["no_cache"],
+        offline=kwargs["offline"],
+    )
@@ -1,6 +1,9 @@
 from .base import BaseFile
 from .base import Source
-from .utils import update_contents
+from .document import Config
+from .document import Document
+from .document import IniDocument
+from .utils import normalize_name
 from collections import defaultdict
 from collections import OrderedDict
 from configparser import ConfigParser
@@ -9,6 +12,17 @@ from functools import cached_property
 import pathlib
 import re
 
+# A 'package==version' line without markers, with the package name as group.
+# So on a line of its own, no whitespace, no environment markers.
+CONSTRAINT_LINE_RE = re.compile(r"^([^\s=;#]+)==[^;]*$")
+
+
+def constraint_line_key(line):
+    """Return the normalized package name of a 'package==version' line."""
+    match = CONSTRAINT_LINE_RE.match(line)
+    if match:
+        return normalize_name(match.group(1))
+
 
 def to_bool(value):
     if not isinstance(value, str):
@@ -19,6 +33,10 @@ def to_bool(value):
 
 
 class ConstraintsFile(BaseFile):
+    # The data is computed from the file once, so forget it together with
+    # the document.
+    cached_names = BaseFile.cached_names + ("data", "extends")
+
     def __init__(self, file_location, with_markers=False, read_extends=False):
         self.file_location = file_location
         self.path = pathlib.Path(self.file_location).resolve()
@@ -32,12 +50,15 @@ class ConstraintsFile(BaseFile):
         _ignored = self.data  # noqa F841
         return self._extends
 
+    def parse_document(self, text):
+        return Document(text, constraint_line_key, self.file_location)
+
     @cached_property
     def data(self):
         """Read the constraints."""
-        contents = self.path.read_text()
         constraints = defaultdict(dict)
-        for line in contents.splitlines():
+        self._extends = []
+        for line in self.document.lines:
             line = line.strip()
             if line.startswith("#"):
                 continue
@@ -89,29 +110,23 @@ class ConstraintsFile(BaseFile):
         return constraints
 
     def __setitem__(self, package_name, new_version):
-        changed = False
-        contents = self.path.read_text()
-        if not contents.endswith("\n"):
-            contents += "\n"
-            self.path.write_text(contents)
-            changed = True
-
-        newline = f"{package_name}=={new_version}"
-        # Look for 'package name==version' on a line of its own,
-        # no whitespace, no environment markers.
-        line_reg = re.compile(rf"^{package_name}==[^;]*$", flags=re.I)
-
-        def line_check(line):
-            return line_reg.match(line)
-
-        # set version in contents.
-        new_contents = update_contents(
-            contents, line_check, newline, self.file_location
-        )
-        if contents != new_contents:
-            self.path.write_text(new_contents)
-            changed = True
-        return changed
+        return self.update_many({package_name: new_version})
+
+    def update_many(self, versions):
+        """Set several versions at once.
+
+        'versions' is a dictionary from package name to version.
+        We read and write the file only once.
+        Lines with environment markers are not changed.
+
+        Returns True when the file has changed.
+        """
+        self.refresh()
+        document = self.document
+        for package_name, new_version in versions.items():
+            newline = f"{package_name}=={new_version}"
+            document.set(normalize_name(package_name), newline)
+        return self.save_document()
 
     def rewrite(self):
         """Rewrite the file based on the parsed data.
@@ -138,7 +153,7 @@ class ConstraintsFile(BaseFile):
 
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def extends_to_buildout(self):
         """Translate our extends data to buildout.
@@ -203,19 +218,26 @@ class MxSourcesFile(BaseFile):
     in the SourcesFile.
     """
 
-    def __init__(self, file_location):
-        super().__init__(file_location)
-        self.config = ConfigParser(
+    cached_names = BaseFile.cached_names + ("config",)
+
+    def parse_document(self, text):
+        # Like a ConfigParser with default_section="settings".
+        return IniDocument(
+            text,
+            filename=self.file_location,
+            optionxform=str.lower,
             default_section="settings",
         )
+
+    @cached_property
+    def config(self):
         # mxdev itself calls ConfigParser with extra option
         # interpolation=ExtendedInterpolation().
         # This turns a line like 'url = ${settings:plone}/package.git'
         # into 'url = https://github.com/plone/package.git'.
         # In our case we very much want the original line,
         # especially when we do a rewrite of the file.
-        with self.path.open() as f:
-            self.config.read_file(f)
+        return Config(self.document.values, default_section="settings")
 
     @cached_property
     def data(self):
@@ -248,7 +270,7 @@ class MxSourcesFile(BaseFile):
 
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def to_buildout(self, sources_path):
         """Overwrite sources file with our data.
@@ -310,19 +332,29 @@ class MxCheckoutsFile(BaseFile):
     In fact, we only support 'default-use = false'.
     """
 
-    def __init__(self, file_location):
-        super().__init__(file_location)
-        self.config = ConfigParser(
+    cached_names = BaseFile.cached_names + ("config", "data", "sections")
+
+    def parse_document(self, text):
+        # Like a ConfigParser with default_section="settings".
+        return IniDocument(
+            text,
+            filename=self.file_location,
+            optionxform=str.lower,
             default_section="settings",
         )
+
+    @cached_property
+    def config(self):
         # mxdev itself calls ConfigParser with extra option
         # interpolation=ExtendedInterpolation().
         # This turns a line like 'url = ${settings:plone}/package.git'
         # into 'url = https://github.com/plone/package.git'.
         # In our case we very much want the original line,
         # especially when we do a rewrite of the file.
-        with self.path.open() as f:
-            self.config.read_file(f)
+        return Config(self.document.values, default_section="settings")
+
+    def __init__(self, file_location):
+        super().__init__(file_location)
         _marker = object()
         default_use = self.config["settings"].get("default-use", _marker)
         if default_use is not _marker and to_bool(default_use):
@@ -362,12 +394,12 @@ class MxCheckoutsFile(BaseFile):
         The caller should have made sure this package is currently
         not in the file.
         """
-        contents = self.path.read_text()
-        if not contents.endswith("\n"):
-            contents += "\n"
+        self.refresh()
+        document = self.document
+        document.add_section(package_name)
         use = "true" if enabled else "false"
-        contents += f"\n[{package_name}]\nuse = {use}\n"
-        self.path.write_text(contents)
+        document.set("use", f"use = {use}", section=package_name)
+        self.save_document()
         print(f"{self.file_location}: {package_name} added to checkouts.")
 
     def __setitem__(self, package_name, enabled=True):
@@ -376,10 +408,9 @@ class MxCheckoutsFile(BaseFile):
         Mostly this will be called to disable a checkout.
         Expected is that default-use is false.
         This means we can remove 'use = true' from the package.
-
-        But let's support the other way around as well:
-        when default-use is true, we set 'use = false'.
+        We keep the section, so it is easy to enable it again.
         """
+        self.refresh()
         stored_package_name = self.lowerkeys_section.get(package_name.lower())
         if not stored_package_name:
             # Package is not known to us.
@@ -400,50 +431,15 @@ class MxCheckoutsFile(BaseFile):
 
         # So the package is already configured in the checkouts file, but the
         # value must be updated.
-        contents = self.path.read_text()
-        if not contents.endswith("\n"):
-            contents += "\n"
-            self.path.write_text(contents)
-
-        lines = []
-        found_package = False
-        # Add extra line at the end.  This eases parsing and editing the final section.
-        orig_lines = contents.splitlines() + ["\n"]
-        for line in orig_lines:
-            line = line.rstrip()
-            if line == f"[{package_name}]":
-                found_package = True
-                continue
-            if not found_package:
-                lines.append(line)
-                continue
-            if line.startswith("use =") or line.startswith("use="):
-                # Ignore this line.  We may add a new one a bit further.
-                continue
-            if line == "" or line.startswith("["):
-                # A new section is starting.
-                if not enabled:
-                    # We do not keep any lines of this section.
-                    print(
-                        f"{self.file_location}: {package_name} removed from checkouts."
-                    )
-                else:
-                    # We need to explicitly enable it.
-                    lines.append("use = true")
-                    print(f"{self.file_location}: {package_name} added to checkouts.")
-                # We are done with the section for this package name.
-                found_package = False
-                # We still need to append the original line.
-                # But avoid adding multiple empty lines.
-                if line or lines[-1]:
-                    lines.append(line)
-                continue
-            # Just a regular line.
-            lines.append(line)
-
-        contents = "\n".join(lines)
-        self.path.write_text(contents)
-        return True
+        document = self.document
+        if enabled:
+            # We need to explicitly enable it.
+            document.set("use", "use = true", section=package_name)
+            print(f"{self.file_location}: {package_name} added to checkouts.")
+        else:
+            document.remove("use", section=package_name)
+            print(f"{self.file_location}: {package_name} removed from checkouts.")
+        return self.save_document()
 
     def rewrite(self):
         """Rewrite the file based on the parsed data.
@@ -461,7 +457,7 @@ class MxCheckoutsFile(BaseFile):
 
         contents.append("")
         new_contents = "\n".join(contents)
-        self.path.write_text(new_contents)
+        self.write_text(new_contents)
 
     def to_buildout(self, checkouts_path):
         """Overwrite checkouts file with our data.
@@ -0,0 +1,152 @@
+"""Scan packages for updates with a pool of worker threads.
+
+Cloning a repository is slow, and most of the time is spent waiting for
+the network.  So we let a few threads clone and analyse packages at the
+same time.  Any printing, asking and committing is left to the caller,
+which gets the results one at a time, in the original order,
+or in the order in which they are ready.
+"""
+
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from plone.releaser.package import ScanResult
+from urllib.parse import urlparse
+
+import git
+import threading
+import time
+
+
+def get_host(url):
+    """Get the host name from a git url.
+
+    This handles both real urls and scp-like urls:
+
+    - https://github.com/plone/plone.api.git
+    - git@github.com:plone/plone.api.git
+    """
+    if "://" in url:
+        return urlparse(url).hostname or ""
+    # scp-like syntax: [user@]host:path
+    host = url.split(":", 1)[0]
+    return host.split("@")[-1]
+
+
+class HostThrottle:
+    """Limit the number of concurrent requests to a single host.
+
+    When the host complains, for example when GitHub refuses a clone,
+    we wait longer between requests.  Every success makes the delay
+    shorter again.
+    """
+
+    def __init__(self, limit=2, min_delay=1.0, max_delay=300.0):
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self):
+        with self.semaphore:
+            self.wait()
+            yield
+
+    def wait(self):
+        # Reserve a start time, keeping 'delay' seconds between requests.
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+    def success(self):
+        with self._lock:
+            self.delay /= 2
+            if self.delay < self.min_delay / 2:
+                self.delay = 0.0
+
+    def failure(self):
+        with self._lock:
+            self.delay = min(self.max_delay, max(self.min_delay, self.delay * 2))
+            # The next request, likely the retry, has to wait this long as well.
+            self._next_start = max(self._next_start, time.monotonic() + self.delay)
+
+
+class Scanner:
+    """Scan packages in worker threads.
+
+    - 'workers' is the number of packages that are scanned at the same time.
+    - 'per_host' is the maximum number of concurrent scans on one host.
+    - 'retries' is how often we try again when cloning fails.
+    - 'backoff' is the first delay in seconds after a failure.
+      It doubles with each failure.
+    """
+
+    def __init__(self, workers=4, per_host=2, retries=3, backoff=1.0):
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._throttles = {}
+        self._lock = threading.Lock()
+
+    def throttle(self, url):
+        host = get_host(url)
+        with self._lock:
+            if host not in self._throttles:
+                self._throttles[host] = HostThrottle(
+                    limit=self.per_host, min_delay=self.backoff
+                )
+            return self._throttles[host]
+
+    def scan(self, package):
+        """Scan a single package, retrying with backoff when cloning fails.
+
+        This is called in a worker thread.
+        """
+        if package.source is None:
+            return package.scan()
+        throttle = self.throttle(package.source.url)
+        error = None
+        for _ in range(self.retries + 1):
+            with throttle.slot():
+                try:
+                    result = package.scan()
+                except git.exc.GitCommandError as exc:
+                    error = exc
+                    throttle.failure()
+                    continue
+            throttle.success()
+            return result
+        result = ScanResult(package.name)
+        result.error = str(error).strip()
+        return result
+
+    def scan_all(self, packages, ordered=True):
+        """Scan all packages, and yield (package, result).
+
+        By default we yield them in the original order.
+        The workers may be a few packages ahead of the consumer.
+        That is fine: they only read, the consumer does all the writing.
+
+        With ordered=False we yield each package as soon as it is scanned.
+        This is for reports that stream their output.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {
+                executor.submit(self.scan, package): package for package in packages
+            }
+            if ordered:
+                done = futures
+            else:
+                done = as_completed(futures)
+            for future in done:
+                yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
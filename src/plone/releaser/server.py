@@ -0,0 +1,156 @@
+"""Serve the quick manage commands from a long running process.
+
+Start the server in a coredev checkout, with the path of a Unix socket:
+
+    export PLONE_RELEASER_SOCKET=/tmp/plone-releaser.sock
+    bin/manage serve
+
+With this environment variable set, a command like
+'bin/manage get-package-version plone.api' is sent to the server.
+The server keeps the files that it has parsed, and only parses them again
+when they have changed.  So it answers much faster than a fresh process.
+When no server is listening, the command runs in the usual way.
+
+We only serve the commands that read and edit the versions, constraints
+and checkouts files.  The server runs one command at a time.
+"""
+
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+from plone.releaser.manage import COMMANDS
+from plone.releaser.manage import run
+from plone.releaser.manage import SOCKET_VARIABLE
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+
+# The module with the commands that we serve.
+SERVED_MODULE = "plone.releaser.file_commands"
+
+
+def can_serve(args):
+    """Can the server run the command with these arguments?"""
+    if not args or args[0] not in COMMANDS:
+        return False
+    return COMMANDS[args[0]].split(":")[0] == SERVED_MODULE
+
+
+def get_exit_code(error):
+    """Get the exit code of a SystemExit, like Python does."""
+    if error.code is None:
+        return 0
+    if isinstance(error.code, int):
+        return error.code
+    print(error.code, file=sys.stderr)
+    return 1
+
+
+def run_request(request):
+    """Run the command of a client, and return the response.
+
+    The request has the arguments, the current directory of the client,
+    and optionally the text for standard input.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    cwd = os.getcwd()
+    stdin = sys.stdin
+    try:
+        os.chdir(request["cwd"])
+        sys.stdin = io.StringIO(request.get("stdin", ""))
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                run(request["args"], output_file=stdout, errors_file=stderr)
+            except SystemExit as e:
+                exit_code = get_exit_code(e)
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        sys.stdin = stdin
+        os.chdir(cwd)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit": exit_code}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read())
+            args = request["args"]
+        except (ValueError, KeyError, TypeError):
+            response = {"stdout": "", "stderr": "Bad request.\n", "exit": 2}
+        else:
+            if can_serve(args):
+                response = run_request(request)
+            else:
+                message = f"We do not serve this command: {' '.join(args)}\n"
+                response = {"stdout": "", "stderr": message, "exit": 2}
+        self.wfile.write(json.dumps(response).encode("utf-8"))
+
+
+def is_listening(path):
+    """Is a server listening on the socket at this path?"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(*, path=None):
+    """Run the quick commands for clients, listening on a Unix socket.
+
+    The path of the socket is the PLONE_RELEASER_SOCKET environment
+    variable, unless you pass --path.
+    When this variable is set, the quick commands, like get-package-version,
+    are sent to this server, which keeps the parsed files in memory.
+    """
+    path = path or os.environ.get(SOCKET_VARIABLE)
+    if not path:
+        print(f"Pass --path or set the {SOCKET_VARIABLE} environment variable.")
+        sys.exit(1)
+    if os.path.exists(path):
+        if is_listening(path):
+            print(f"A server is already listening on {path}.")
+            sys.exit(1)
+        # A socket left behind by a server that has stopped.
+        os.unlink(path)
+    with socketserver.UnixStreamServer(path, RequestHandler) as server:
+        print(f"Serving on {path}.  Press Ctrl-C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def forward(args, path):
+    """Let the server on the socket at this path run the command.
+
+    Returns the exit code, or None when no server is listening.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.connect(path)
+        except OSError:
+            return None
+        request = {"args": args, "cwd": os.getcwd()}
+        if "-" in args:
+            # The command reads from standard input.
+            request["stdin"] = sys.stdin.read()
+        client.sendall(json.dumps(request).encode("utf-8"))
+        client.shutdown(socket.SHUT_WR)
+        data = b"".join(iter(lambda: client.recv(65536), b""))
+    response = json.loads(data)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit"]
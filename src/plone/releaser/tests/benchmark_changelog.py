@@ -0,0 +1,59 @@
+"""Compare the speed of the changelog parsers.
+
+Run this with a few large changelogs, as files or urls:
+
+    python -m plone.releaser.tests.benchmark_changelog CHANGES.rst \
+        https://raw.githubusercontent.com/plone/Products.CMFPlone/master/CHANGES.rst
+
+Without arguments we use the changelog of plone.releaser itself.
+"""
+
+from plone.releaser.changelog import parse_rst_docutils
+from plone.releaser.changelog import parse_simple_rst
+from plone.releaser.download import fetch
+
+import pathlib
+import sys
+import timeit
+
+DEFAULT_CHANGELOG = pathlib.Path(__file__).parents[3] / "CHANGES.rst"
+
+
+def read(location):
+    if "://" not in location:
+        return pathlib.Path(location).read_text()
+    response = fetch(location)
+    if response.status != 200:
+        raise ValueError(f"Could not get {location}: status {response.status}.")
+    return response.body.decode("utf-8")
+
+
+def best_time(function, content, number):
+    timer = timeit.Timer(lambda: function(content))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    locations = args or [str(DEFAULT_CHANGELOG)]
+    for location in locations:
+        content = read(location)
+        simple = parse_simple_rst(content)
+        docutils = parse_rst_docutils(content)
+        print(f"{location}: {len(content)} characters, {len(docutils)} versions")
+        if simple is None:
+            print("  Not a simple changelog: we would fall back to docutils.")
+            continue
+        if simple != docutils:
+            print("  ERROR: the parsers give different results.")
+            continue
+        simple_time = best_time(parse_simple_rst, content, 20)
+        docutils_time = best_time(parse_rst_docutils, content, 3)
+        print(f"  docutils: {docutils_time * 1000:8.2f} ms")
+        print(f"  simple:   {simple_time * 1000:8.2f} ms")
+        print(f"  speedup:  {docutils_time / simple_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import git
+import pathlib
+import pytest
+
+
+class FakeBuildout:
+    """Just enough of a Buildout for checking packages."""
+
+    def __init__(self, sources, versions, checkouts=None):
+        # Like Buildout, by default we use the current directory.
+        self.coredev_dir = pathlib.Path.cwd()
+        self.sources = sources
+        self.versions = versions
+        self.checkouts = checkouts or {}
+
+    def get_version(self, package_name):
+        return self.versions[package_name]
+
+
+def commit(repo, message):
+    path = repo.working_tree_dir + "/README.rst"
+    with open(path, "w") as f:
+        f.write(message)
+    repo.index.add(["README.rst"])
+    return repo.index.commit(message)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Create a git repository with a release and a few commits after it."""
+    path = tmp_path / "upstream"
+    repo = git.Repo.init(path, initial_branch="main")
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "Tester")
+        writer.set_value("user", "email", "tester@example.org")
+    commit(repo, "Initial")
+    commit(repo, "Release 1.0")
+    repo.create_tag("1.0")
+    commit(repo, "Fix bug")
+    commit(repo, "Add feature")
+    return path
@@ -1,4 +1,8 @@
+from plone.releaser.base import PARSE_COUNTS
+from plone.releaser.base import parse_report
 from plone.releaser.buildout import CheckoutsFile
+from plone.releaser.buildout import get_buildout
+from plone.releaser.buildout import set_coredev_dir
 from plone.releaser.buildout import SourcesFile
 from plone.releaser.buildout import VersionsFile
 
@@ -77,6 +81,18 @@ def test_checkouts_file_remove(tmp_path):
     assert "camelcase" not in cf
 
 
+def test_checkouts_file_add_remove_same_instance(tmp_path):
+    copy_path = tmp_path / "checkouts.cfg"
+    shutil.copyfile(CHECKOUTS_FILE, copy_path)
+    cf = CheckoutsFile(copy_path)
+    assert "new.package" not in cf
+    cf.add("new.package")
+    assert "new.package" in cf
+    assert "New_Package" in cf
+    cf.remove("New-Package")
+    assert "new.package" not in cf
+
+
 def test_checkouts_file_rewrite(tmp_path):
     copy_path = tmp_path / "checkouts.cfg"
     shutil.copyfile(CHECKOUTS_FILE, copy_path)
@@ -215,6 +231,42 @@ def test_versions_file_read_extends_with_markers():
     }
 
 
+def test_versions_file_data_cached(tmp_path):
+    copy_path = tmp_path / "versions.cfg"
+    copy_path.write_text("[versions]\none = 1.0\n")
+    vf = VersionsFile(copy_path)
+    data = vf.data
+    assert vf.data is data
+    assert vf["one"] == "1.0"
+    # Setting a version reads the file again.
+    vf["one"] = "1.1"
+    assert vf.data is not data
+    assert vf["one"] == "1.1"
+    # Changing the file from outside is noticed as well.
+    copy_path.write_text("[versions]\none = 1.2\ntwo = 2.0\n")
+    assert vf["one"] == "1.2"
+    assert vf["two"] == "2.0"
+
+
+def test_versions_file_extends_cached(tmp_path):
+    for name in ("versions2.cfg", "versions3.cfg", "versions4.cfg"):
+        shutil.copyfile(INPUT_DIR / name, tmp_path / name)
+    vf = VersionsFile(tmp_path / "versions2.cfg", read_extends=True)
+    vf2 = VersionsFile(tmp_path / "versions2.cfg", read_extends=True)
+    assert vf.data == vf2.data
+    # The extended file is only read once.
+    assert vf.extended_files[0] is vf2.extended_files[0]
+    data = vf.data
+    assert vf.data is data
+    assert vf["four"] == "4.0"
+    # When an extended file changes, we notice it.
+    path = tmp_path / "versions4.cfg"
+    path.write_text(path.read_text().replace("four = 4.0", "four = 4.1"))
+    assert vf.data is not data
+    assert vf["four"] == "4.1"
+    assert vf2["four"] == "4.1"
+
+
 def test_versions_file_versions_with_markers():
     vf = VersionsFile(VERSIONS_FILE, with_markers=True)
     # All versions are reported lowercased.
@@ -247,6 +299,35 @@ def test_versions_file_contains():
     assert "UPPERCASE" in vf
 
 
+def test_versions_file_normalized_names(tmp_path):
+    copy_path = tmp_path / "versions.cfg"
+    copy_path.write_text("[versions]\nplone.app.Foo = 1.0\nzope_bar = 2.0\n")
+    vf = VersionsFile(copy_path)
+    # We normalize the names like pip does.
+    assert "plone-app-foo" in vf
+    assert "Plone_App.Foo" in vf
+    assert vf["plone_app_foo"] == "1.0"
+    assert vf.get("zope.bar") == "2.0"
+    assert "zope.bar.baz" not in vf
+    # The index is only built again when the data changes.
+    index = vf.index
+    assert vf.index is index
+    vf.data = {"other": "3.0"}
+    assert "plone.app.foo" not in vf
+    assert vf["OTHER"] == "3.0"
+
+
+def test_versions_file_set_normalized_name(tmp_path):
+    copy_path = tmp_path / "versions.cfg"
+    copy_path.write_text("[versions]\nplone.app.foo = 1.0\nzope_bar = 2.0\n")
+    vf = VersionsFile(copy_path)
+    # We edit the existing pin, also when the name is written differently.
+    vf["plone_app_foo"] = "2.0"
+    vf.update_many({"Zope.Bar": "3.0"})
+    assert copy_path.read_text() == "[versions]\nplone_app_foo = 2.0\nZope.Bar = 3.0\n"
+    assert VersionsFile(copy_path).get("plone.app.foo") == "2.0"
+
+
 def test_versions_file_contains_with_markers():
     vf = VersionsFile(VERSIONS_FILE, with_markers=True)
     assert "package" in vf
@@ -501,3 +582,48 @@ three = 3.0
 [versions:python312]
 three = 3.2
 """
+
+
+def test_parsed_file_registry(tmp_path):
+    copy_path = tmp_path / "versions.cfg"
+    shutil.copyfile(VERSIONS_FILE, copy_path)
+    path = copy_path.resolve()
+    vf = VersionsFile(copy_path)
+    assert vf["package"] == "1.0"
+    assert PARSE_COUNTS[path] == 1
+    # Other objects for the same file use the same parsed document.
+    assert VersionsFile(copy_path)["package"] == "1.0"
+    assert SourcesFile(copy_path).raw_config.has_section("versions")
+    assert PARSE_COUNTS[path] == 1
+    # Checkouts are parsed differently.
+    CheckoutsFile(copy_path).document
+    assert PARSE_COUNTS[path] == 2
+    # After writing, the file is parsed again.
+    vf["package"] = "2.0"
+    assert VersionsFile(copy_path)["package"] == "2.0"
+    assert PARSE_COUNTS[path] == 3
+    assert f"    3 {path}" in parse_report()
+
+
+def test_get_buildout(tmp_path, monkeypatch):
+    shutil.copyfile(CHECKOUTS_FILE, tmp_path / "checkouts.cfg")
+    shutil.copyfile(SOURCES_FILE, tmp_path / "sources.cfg")
+    shutil.copyfile(VERSIONS_FILE, tmp_path / "versions.cfg")
+    path = tmp_path.resolve()
+    monkeypatch.chdir(tmp_path)
+    buildout = get_buildout()
+    assert buildout.coredev_dir == path
+    assert buildout.versions.path == path / "versions.cfg"
+    # We have not read anything yet.
+    assert PARSE_COUNTS[path / "versions.cfg"] == 0
+    assert buildout.get_version("package") == "1.0"
+    assert PARSE_COUNTS[path / "versions.cfg"] == 1
+    assert get_buildout(tmp_path) is buildout
+    # We can use a buildout in a different directory.
+    monkeypatch.chdir(INPUT_DIR.parent)
+    assert get_buildout().coredev_dir != path
+    set_coredev_dir(tmp_path)
+    try:
+        assert get_buildout() is buildout
+    finally:
+        set_coredev_dir(None)
@@ -0,0 +1,56 @@
+from plone.releaser.base import Source
+from plone.releaser.cache import get_cache_dir
+from plone.releaser.cache import RepoCache
+from plone.releaser.tests.conftest import commit
+
+import git
+import os
+
+
+def test_get_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLONE_RELEASER_CACHE_DIR", str(tmp_path / "cache"))
+    assert get_cache_dir() == tmp_path / "cache"
+    path = get_cache_dir("repos")
+    assert path == tmp_path / "cache" / "repos"
+    assert path.is_dir()
+
+
+def test_repo_cache_fetch(upstream, tmp_path):
+    cache = RepoCache(tmp_path / "repos")
+    source = Source(name="package", url=str(upstream), branch="main")
+    repo = cache.get_repo(source)
+    assert repo.bare
+    assert repo.git.describe("--abbrev=0", "--tags") == "1.0"
+    assert len(list(repo.iter_commits("1.0..main"))) == 2
+    repo.close()
+
+    # Make a release and a new commit.  We only need to fetch those.
+    upstream_repo = git.Repo(upstream)
+    commit(upstream_repo, "Release 1.1")
+    upstream_repo.create_tag("1.1")
+    commit(upstream_repo, "Back to development")
+    repo = cache.get_repo(source)
+    assert repo.working_dir == str(cache.repo_path("package"))
+    assert repo.git.describe("--abbrev=0", "--tags") == "1.1"
+    assert [c.summary for c in repo.iter_commits("1.1..main")] == [
+        "Back to development"
+    ]
+    repo.close()
+
+
+def test_repo_cache_prune(upstream, tmp_path):
+    cache = RepoCache(tmp_path / "repos")
+    for name in ("old", "new"):
+        cache.get_repo(Source(name=name, url=str(upstream), branch="main")).close()
+    # Make sure 'old' is used longest ago.
+    last_used = cache.repo_path("old") / "plone-releaser-last-used"
+    os.utime(last_used, (0, 0))
+    assert [path.name for _, _, path in cache.entries()] == ["old.git", "new.git"]
+    size = cache.entries()[-1][1]
+
+    # Nothing is removed when we are below the maximum size.
+    assert cache.prune(size * 10) == []
+    assert cache.prune(size) == [cache.repo_path("old")]
+    assert not cache.repo_path("old").exists()
+    assert cache.repo_path("new").exists()
+    assert cache.prune("0") == [cache.repo_path("new")]
@@ -1,6 +1,7 @@
 from plone.releaser.changelog import Changelog
 
 import pathlib
+import pytest
 
 TESTS_DIR = pathlib.Path(__file__).parent
 INPUT_DIR = TESTS_DIR / "input"
@@ -51,3 +52,260 @@ def test_get_changes_content():
     assert "3.0.2" in from_bytes
     assert from_file == from_string
     assert from_string == from_bytes
+
+
+@pytest.fixture
+def fake_urls(monkeypatch):
+    from plone.releaser import changelog
+
+    available = {
+        "https://example.org/one/docs/CHANGES.rst": b"one docs",
+        "https://example.org/one/CHANGES.md": b"one md",
+        "https://example.org/two/HISTORY.txt": b"two",
+    }
+    requested = []
+
+    def get_changelog_urls(package_name):
+        return [
+            f"https://example.org/{package_name}/CHANGES.rst",
+            f"https://example.org/{package_name}/CHANGES.md",
+            f"https://example.org/{package_name}/docs/CHANGES.rst",
+            f"https://example.org/{package_name}/HISTORY.txt",
+        ]
+
+    def fetch_url(url):
+        requested.append(url)
+        if url in available:
+            return 200, available[url]
+        return 404, b"Not found"
+
+    monkeypatch.setattr(changelog, "get_changelog_urls", get_changelog_urls)
+    monkeypatch.setattr(changelog, "get_source_location", lambda name: ("", "main"))
+    monkeypatch.setattr(changelog, "fetch_url", fetch_url)
+    return available, requested
+
+
+def test_get_changelogs(fake_urls):
+    from plone.releaser.changelog import get_changelog
+    from plone.releaser.changelog import get_changelogs
+
+    # The most likely url wins, even if a less likely one is found as well.
+    assert get_changelogs(["one", "two", "three"], workers=4) == {
+        "one": b"one md",
+        "two": b"two",
+        "three": "",
+    }
+    assert get_changelog("one") == b"one md"
+    assert get_changelog("three") == ""
+
+
+def test_get_changelogs_locations(fake_urls, tmp_path):
+    from plone.releaser.changelog import ChangelogLocations
+    from plone.releaser.changelog import get_changelogs
+    from plone.releaser.changelog import MISSING
+
+    available, requested = fake_urls
+    path = tmp_path / "locations.json"
+    locations = ChangelogLocations(path)
+    changelogs = get_changelogs(["one", "two", "three"], locations=locations)
+    assert changelogs == {"one": b"one md", "two": b"two", "three": ""}
+    assert len(requested) > 3
+
+    # The next time we only request the urls that worked.
+    locations = ChangelogLocations(path)
+    assert locations.get("one", "main") == "https://example.org/one/CHANGES.md"
+    assert locations.get("one", "other") is None
+    assert locations.get("three", "main") is MISSING
+    requested.clear()
+    assert get_changelogs(["one", "two", "three"], locations=locations) == changelogs
+    assert sorted(requested) == [
+        "https://example.org/one/CHANGES.md",
+        "https://example.org/two/HISTORY.txt",
+    ]
+
+    # When a changelog has moved, we look for it again.
+    del available["https://example.org/one/CHANGES.md"]
+    requested.clear()
+    assert get_changelogs(["one"], locations=locations) == {"one": b"one docs"}
+    assert requested[0] == "https://example.org/one/CHANGES.md"
+    assert "https://example.org/one/CHANGES.rst" in requested
+    assert locations.get("one", "main") == "https://example.org/one/docs/CHANGES.rst"
+
+    # After a while we check again if a changelog was added.
+    locations = ChangelogLocations(path, ttl=0)
+    assert locations.get("three", "main") is None
+
+
+def test_is_release():
+    from plone.releaser.changelog import is_release
+
+    assert is_release("6.0.7")
+    assert is_release("6.1.0a1")
+    assert not is_release("6.1-dev")
+    assert not is_release("6.0.dev0")
+    assert not is_release("here")
+
+
+def test_split_rst_versions():
+    from plone.releaser.changelog import split_rst_versions
+
+    content = CHANGES_RST.read_text()
+    prefix, sections = split_rst_versions(content)
+    assert prefix.startswith("Example changelog from plone.dexterity.")
+    versions = [version for version, text in sections]
+    assert versions == ["3.0.3", "3.0.2"]
+    assert sections[0][1].startswith("3.0.3 (2023-09-01)\n------------------\n")
+    assert prefix + "".join(text for version, text in sections) == content
+
+
+def test_stop_version():
+    full = Changelog(CHANGES_RST)
+    assert list(full) == ["3.0.3", "3.0.2"]
+    bounded = Changelog(CHANGES_RST, stop_version="3.0.2")
+    assert bounded == full
+    # A single version is parsed fine too.
+    bounded = Changelog(CHANGES_RST, stop_version="3.0.3")
+    assert list(bounded) == ["3.0.3"]
+    assert bounded.get("3.0.3") == full.get("3.0.3")
+    # When the stop version is not found, we parse everything.
+    bounded = Changelog(CHANGES_RST, stop_version="0.0.1")
+    assert bounded == full
+
+
+def test_stop_version_with_title():
+    content = """Changelog
+=========
+
+.. towncrier release notes start
+
+2.0 (2024-01-01)
+================
+
+Bug fixes:
+
+- Fixed.
+
+1.0 (2023-01-01)
+================
+
+- Initial release.
+"""
+    full = Changelog(content=content)
+    assert list(full) == ["2.0", "1.0"]
+    assert full.get_changes("1.0") == ["Bug fixes:", "Fixed."]
+    bounded = Changelog(content=content, stop_version="2.0")
+    assert list(bounded) == ["2.0"]
+    assert bounded.get("2.0") == full.get("2.0")
+
+
+SIMPLE_RST = """Changelog
+=========
+
+.. towncrier release notes start
+
+3.0 (unreleased)
+----------------
+
+- Nothing changed yet.
+
+
+2.1 (2024-02-01)
+----------------
+
+This release has an introduction.
+
+New:
+
+- Added *this*
+  and that.  [maurits]
+
+* Another list style.
+
+Fixes:
+
+- Fixed a bug
+    with more indentation
+  and a second paragraph.
+
+  Like this.  [maurits]
+- Fixed another.
+
+
+2.0 (2024-01-01)
+----------------
+"""
+
+
+def test_parse_simple_rst():
+    from plone.releaser.changelog import parse_rst_docutils
+    from plone.releaser.changelog import parse_simple_rst
+
+    data = parse_simple_rst(SIMPLE_RST)
+    assert data is not None
+    assert data == parse_rst_docutils(SIMPLE_RST)
+    assert list(data) == ["3.0", "2.1", "2.0"]
+    assert data["2.1"]["New features:"] == ["Another list style."]
+    assert data["2.1"]["Bug fixes:"] == [
+        "Fixed a bug\n  with more indentation\nand a second paragraph.\n\n"
+        "Like this.  [maurits]",
+        "Fixed another.",
+    ]
+    for path in (CHANGES_RST, TESTS_DIR.parents[3] / "CHANGES.rst"):
+        if path.exists():
+            content = path.read_text()
+            assert parse_simple_rst(content) == parse_rst_docutils(content)
+    # Markdown has no restructuredtext version headings.
+    assert parse_simple_rst(CHANGES_MD.read_text()) == {}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "- Item\n\n  - Nested item.\n",
+        "- Big changes:\n  - Nested item without blank line.\n",
+        "- Item\n  continued\n  1. Nested item.\n",
+        "- 1. Nested item.\n",
+        "Bug fixes:\n- No blank line.\n",
+        "- Item\nNo blank line.\n",
+        "- Item\n\n.. comment\n",
+        "Sub heading\n~~~~~~~~~~~\n\n- Item\n",
+        "Example::\n\n    - code\n",
+        "    Quote.\n",
+    ],
+)
+def test_parse_simple_rst_fallback(body):
+    from plone.releaser.changelog import parse_rst_docutils
+    from plone.releaser.changelog import parse_simple_rst
+
+    content = f"1.0 (2024-01-01)\n----------------\n\n{body}"
+    assert parse_simple_rst(content) is None
+    # Changelog falls back to docutils.
+    assert Changelog(content=content).data == parse_rst_docutils(content)
+
+
+def test_changelog_cache(tmp_path, monkeypatch):
+    from plone.releaser import changelog
+    from plone.releaser.changelog import ChangelogCache
+
+    cache = ChangelogCache(tmp_path)
+    content = CHANGES_RST.read_text()
+    first = Changelog(content=content, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # Now we do not parse again.
+    def fail(*args):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(changelog, "parse_simple_rst", fail)
+    second = Changelog(content=content, cache=ChangelogCache(tmp_path))
+    assert second == first
+    assert second.get_changes("3.0.2") == first.get_changes("3.0.2")
+    assert second.cache.stats() == "Parsed changelog cache: 1 hits, 0 misses."
+
+    # Other contents or another stop version are not in the cache yet.
+    with pytest.raises(AssertionError):
+        Changelog(content=content + "\n", cache=cache)
+    with pytest.raises(AssertionError):
+        Changelog(content=content, stop_version="3.0.3", cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
@@ -0,0 +1,95 @@
+from plone.releaser.db import get_ignores_db
+from plone.releaser.db import IgnoresDB
+from plone.releaser.db import JSON_FILENAME
+
+import json
+import pytest
+import threading
+
+
+def test_ignores_db(tmp_path):
+    db = IgnoresDB(tmp_path / "ignores.sqlite")
+    assert db.get("plone.api") is None
+    db.set("plone.api", "abc", branch="main")
+    db.set("plone.api", "def", branch="main")
+    assert db.get("plone.api") == "def"
+    assert db.get("plone.restapi") is None
+    db.delete("plone.api")
+    assert db.get("plone.api") is None
+    with pytest.raises(KeyError):
+        db.delete("plone.api")
+    history = db.history("plone.api")
+    assert [(sha, branch) for sha, branch, timestamp in history] == [
+        ("abc", "main"),
+        ("def", "main"),
+        (None, None),
+    ]
+    # Another connection sees the same data.
+    db.close()
+    assert IgnoresDB(tmp_path / "ignores.sqlite").history("plone.api") == history
+
+
+def test_ignores_db_migrate(tmp_path):
+    (tmp_path / JSON_FILENAME).write_text(json.dumps({"plone.api": "abc"}))
+    db = IgnoresDB(tmp_path / "ignores.sqlite")
+    assert db.get("plone.api") == "abc"
+    db.set("plone.api", "def")
+    db.close()
+    # We only migrate once.
+    db = IgnoresDB(tmp_path / "ignores.sqlite")
+    assert db.get("plone.api") == "def"
+    assert len(db.history("plone.api")) == 2
+
+
+def test_ignores_db_migrate_concurrently(tmp_path):
+    # Several processes may open a new database at the same time.
+    # Only one of them copies the commits.
+    (tmp_path / JSON_FILENAME).write_text(json.dumps({"plone.api": "abc"}))
+    dbs = [IgnoresDB(tmp_path / "ignores.sqlite") for _ in range(8)]
+    barrier = threading.Barrier(len(dbs))
+    errors = []
+
+    def open_db(db):
+        barrier.wait()
+        try:
+            db.get("plone.api")
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=open_db, args=(db,)) for db in dbs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(dbs[0].history("plone.api")) == 1
+    for db in dbs:
+        db.close()
+
+
+def test_ignores_db_threads(tmp_path):
+    db = IgnoresDB(tmp_path / "ignores.sqlite")
+
+    def ignore(number):
+        for count in range(10):
+            db.set(f"package{number}", f"sha{count}")
+
+    threads = [threading.Thread(target=ignore, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for number in range(5):
+        assert db.get(f"package{number}") == "sha9"
+        assert len(db.history(f"package{number}")) == 10
+
+
+def test_get_ignores_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = get_ignores_db()
+    assert get_ignores_db() is db
+    assert get_ignores_db(tmp_path / ".package_ignores.sqlite") is db
+    # We only create the database when we use it.
+    assert not db.path.exists()
+    db.set("plone.api", "abc")
+    assert db.path.exists()
@@ -0,0 +1,223 @@
+from configparser import ConfigParser
+from configparser import ExtendedInterpolation
+from configparser import InterpolationDepthError
+from configparser import InterpolationMissingOptionError
+from configparser import MissingSectionHeaderError
+from configparser import ParsingError
+from plone.releaser.document import Config
+from plone.releaser.document import IniDocument
+from plone.releaser.document import InterpolatingConfig
+
+import pathlib
+import pytest
+
+INPUT_DIR = pathlib.Path(__file__).parent / "input"
+
+TEXT = """[buildout]
+# Keep this comment.
+extends = base.cfg
+
+[versions]
+# comment = 1.0
+one = 1.0
+Two = 2.0{whitespace}
+duplicate = 1.0
+duplicate = 1.1
+
+[versions:python312]
+one = 1.2
+""".format(whitespace="   ")
+
+
+def test_document_unchanged():
+    document = IniDocument(TEXT)
+    assert document.text() == TEXT
+    assert not document.changed
+    assert document.sections == {
+        "buildout": (0, 4),
+        "versions": (4, 11),
+        "versions:python312": (11, 13),
+    }
+    assert document.find("one") == [6, 12]
+    assert document.find("one", "versions") == [6]
+    assert document.find("one", "versions:python312") == [12]
+    assert document.find("comment") == []
+
+
+def test_document_is_modified():
+    document = IniDocument(TEXT)
+
+    def no_text():
+        raise AssertionError("We should not build the text.")
+
+    document.text = no_text
+    assert not document.is_modified()
+    del document.text
+    # Changes that cancel each other out do not count.
+    document.set("one", "one = 1.1", section="versions")
+    assert document.is_modified()
+    document.set("one", "one = 1.0", section="versions")
+    assert document.changed
+    assert not document.is_modified()
+
+
+def test_document_set(capsys):
+    document = IniDocument(TEXT, filename="versions.cfg")
+    assert document.set("one", "one = 1.1", section="versions")
+    assert not document.set("two", "Two = 2.0", section="versions")
+    assert document.set("duplicate", "duplicate = 1.1", section="versions")
+    assert document.set("three", "three = 3.0", section="versions")
+    assert document.set("new", "new = 1.0", section="versions:python312")
+    assert document.changed
+    # Only the changed lines differ.  The extra whitespace after 'Two' stays.
+    assert document.text() == TEXT.replace("one = 1.0", "one = 1.1").replace(
+        "duplicate = 1.0\nduplicate = 1.1\n", "duplicate = 1.1\nthree = 3.0\n"
+    ).replace("one = 1.2\n", "one = 1.2\nnew = 1.0\n")
+    output = capsys.readouterr().out
+    assert "versions.cfg: have set 'one = 1.1'." in output
+    assert "versions.cfg: 'Two = 2.0' already there." in output
+    assert "versions.cfg: 'three = 3.0' added." in output
+
+
+def test_document_remove():
+    document = IniDocument(TEXT)
+    assert document.remove("duplicate")
+    assert not document.remove("nope")
+    assert "duplicate" not in document.text()
+    # Remove from one section only.
+    document = IniDocument(TEXT)
+    assert document.remove("one", section="versions:python312")
+    assert document.text() == TEXT.replace("one = 1.2\n", "")
+
+
+def test_document_add_section():
+    document = IniDocument(TEXT)
+    document.add_section("versions:python313")
+    document.set("one", "one = 1.3", section="versions:python313")
+    # When there is no such section, we use the entire file.
+    document.set("other", "other = 1.0", section="nope")
+    assert document.text() == TEXT + "\n[versions:python313]\none = 1.3\nother = 1.0\n"
+
+
+def test_document_empty():
+    document = IniDocument("")
+    document.set("one", "one = 1.0", section="versions")
+    assert document.text() == "one = 1.0\n"
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "badversions.cfg",
+        "checkouts.cfg",
+        "goodversions.cfg",
+        "mxcheckouts.ini",
+        "mxsources.ini",
+        "sources.cfg",
+        "versions.cfg",
+        "versions2.cfg",
+        "versions3.cfg",
+        "versions4.cfg",
+    ],
+)
+def test_config_like_configparser(filename):
+    text = (INPUT_DIR / filename).read_text()
+    if filename.endswith(".ini"):
+        default_section = "settings"
+        optionxform = str.lower
+    else:
+        default_section = "DEFAULT"
+        optionxform = str
+    parser = ConfigParser(
+        strict=False, interpolation=None, default_section=default_section
+    )
+    parser.optionxform = optionxform
+    parser.read_string(text)
+    document = IniDocument(
+        text, optionxform=optionxform, default_section=default_section
+    )
+    config = Config(document.values, default_section=default_section)
+    assert list(config) == list(parser)
+    assert config.sections() == parser.sections()
+    for name in parser:
+        assert dict(config[name]) == dict(parser[name])
+    # Nothing changes in the text.
+    assert document.text() == text
+
+
+def test_ini_document_continuation_lines():
+    text = "[buildout]\nextends =\n    one.cfg\n\n    two.cfg\nother = 1\n"
+    document = IniDocument(text)
+    assert document.values["buildout"] == {
+        "extends": "\none.cfg\n\ntwo.cfg",
+        "other": "1",
+    }
+    # When we replace the option, its continuation lines are removed.
+    document.set("extends", "extends = three.cfg", section="buildout")
+    assert document.text() == "[buildout]\nextends = three.cfg\n\nother = 1\n"
+
+
+def test_config_defaults():
+    text = "[settings]\ndefault-use = false\n\n[package]\nuse = true\n"
+    document = IniDocument(text, default_section="settings")
+    config = Config(document.values, default_section="settings")
+    assert config.sections() == ["package"]
+    assert "settings" in config
+    assert not config.has_section("settings")
+    assert dict(config["package"]) == {"use": "true", "default-use": "false"}
+    assert config.get("package", "nope", fallback=None) is None
+    with pytest.raises(KeyError):
+        config.get("package", "nope")
+    with pytest.raises(KeyError):
+        config["nope"]
+
+
+def test_ini_document_errors():
+    with pytest.raises(MissingSectionHeaderError):
+        IniDocument("one = 1\n")
+    with pytest.raises(ParsingError):
+        IniDocument("[versions]\nno delimiter\n")
+
+
+@pytest.mark.parametrize("filename", ["sources.cfg", "versions.cfg", "versions3.cfg"])
+def test_interpolating_config_like_configparser(filename):
+    text = (INPUT_DIR / filename).read_text()
+    parser = ConfigParser(strict=False, interpolation=ExtendedInterpolation())
+    parser.optionxform = str
+    parser.read_string(text)
+    config = InterpolatingConfig(IniDocument(text).values)
+    assert list(config) == list(parser)
+    for name in parser:
+        assert dict(config[name]) == dict(parser[name])
+
+
+def test_interpolating_config_shares_values():
+    text = "[remotes]\nplone = https://github.com/plone\n\n[sources]\none = git ${remotes:plone}/one.git\ncost = $$10\n"
+    document = IniDocument(text)
+    raw = Config(document.values)
+    config = InterpolatingConfig(document.values)
+    assert config["sources"]["one"] == "git https://github.com/plone/one.git"
+    assert config["sources"]["cost"] == "$10"
+    assert raw["sources"]["one"] == "git ${remotes:plone}/one.git"
+    # The interpolated value is remembered.
+    assert config.interpolated[("sources", "one")] == config["sources"]["one"]
+    # Values that we set are interpolated, but do not end up in the raw values.
+    config.add_section("buildout")
+    config["buildout"]["directory"] = "${remotes:plone}/coredev"
+    assert config["buildout"]["directory"] == "https://github.com/plone/coredev"
+    assert config.has_section("buildout")
+    assert "buildout" not in raw
+    assert "buildout" not in document.values
+    # Setting a value forgets the interpolated values.
+    config["remotes"]["plone"] = "https://example.org"
+    assert config["sources"]["one"] == "git https://example.org/one.git"
+    assert raw["remotes"]["plone"] == "https://github.com/plone"
+
+
+def test_interpolating_config_errors():
+    text = "[one]\nmissing = ${two:nope}\nloop = ${loop}\n"
+    config = InterpolatingConfig(IniDocument(text).values)
+    with pytest.raises(InterpolationMissingOptionError):
+        config["one"]["missing"]
+    with pytest.raises(InterpolationDepthError):
+        config["one"]["loop"]
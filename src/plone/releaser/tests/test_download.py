@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from plone.releaser.download import ConnectionPool
+from plone.releaser.download import HTTPCache
+
+import pytest
+import threading
+
+
+class FakeServer(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Map from path to contents.
+    files = {}
+    # Client ports of the connections that we have seen.
+    connections = set()
+    # Requested paths
+    requests = []
+
+    def do_GET(self):
+        self.connections.add(self.client_address)
+        self.requests.append(self.path)
+        if self.path == "/redirect":
+            self.send_response(301)
+            self.send_header("Location", "/CHANGES.rst")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = self.files.get(self.path)
+        etag = f'"{hash(body)}"'
+        if body is None:
+            self.send_response(404)
+            body = b"Not found"
+        elif self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            body = b""
+        else:
+            self.send_response(200)
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakeServer.files = {"/CHANGES.rst": b"Changelog\n========="}
+    FakeServer.connections = set()
+    FakeServer.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeServer)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_pool_reuses_connection(server):
+    pool = ConnectionPool()
+    for _ in range(3):
+        response = pool.request(f"{server}/CHANGES.rst")
+        assert response.status == 200
+        assert response.body == b"Changelog\n========="
+        response = pool.request(f"{server}/HISTORY.rst")
+        assert response.status == 404
+    assert len(FakeServer.requests) == 6
+    assert len(FakeServer.connections) == 1
+    pool.close()
+    pool.request(f"{server}/CHANGES.rst")
+    assert len(FakeServer.connections) == 2
+
+
+def test_pool_close_all_threads(server):
+    pool = ConnectionPool()
+    connections = []
+
+    def request(number):
+        pool.request(f"{server}/CHANGES.rst")
+        connections.extend(pool.connections.values())
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(request, range(6)))
+    assert connections
+    assert all(connection.sock is not None for connection in connections)
+    # After the workers are done, we close the connections of all threads.
+    pool.close()
+    assert all(connection.sock is None for connection in connections)
+
+
+def test_pool_follows_redirect(server):
+    response = ConnectionPool().request(f"{server}/redirect")
+    assert response.status == 200
+    assert response.url == f"{server}/CHANGES.rst"
+    assert response.body == b"Changelog\n========="
+
+
+def test_pool_unreachable():
+    with pytest.raises(OSError):
+        ConnectionPool(timeout=1).request("http://127.0.0.1:1/CHANGES.rst")
+
+
+def test_cache_revalidates(server, tmp_path):
+    cache = HTTPCache(tmp_path)
+    url = f"{server}/CHANGES.rst"
+    response = cache.fetch(url)
+    assert response.status == 200
+    assert response.body == b"Changelog\n========="
+    # The second time we ask if the file has changed.  It has not.
+    response = cache.fetch(url)
+    assert response.status == 200
+    assert response.body == b"Changelog\n========="
+    assert len(FakeServer.requests) == 2
+    # Now it changes.
+    FakeServer.files["/CHANGES.rst"] = b"Changed"
+    assert cache.fetch(url).body == b"Changed"
+    assert cache.fetch(url).body == b"Changed"
+    assert len(FakeServer.requests) == 4
+    # Missing files are not cached.
+    assert cache.fetch(f"{server}/HISTORY.rst").status == 404
+    assert cache.load(f"{server}/HISTORY.rst") == (None, None)
+
+
+def test_cache_immutable(server, tmp_path):
+    cache = HTTPCache(tmp_path)
+    url = f"{server}/CHANGES.rst"
+    assert cache.fetch(url, immutable=True).status == 200
+    FakeServer.files["/CHANGES.rst"] = b"Changed"
+    # We do not ask the server again.
+    assert cache.fetch(url).body == b"Changelog\n========="
+    assert len(FakeServer.requests) == 1
+
+
+def test_cache_offline(server, tmp_path):
+    url = f"{server}/CHANGES.rst"
+    HTTPCache(tmp_path).fetch(url)
+    cache = HTTPCache(tmp_path, offline=True)
+    assert cache.fetch(url).body == b"Changelog\n========="
+    assert cache.fetch(f"{server}/HISTORY.rst").status == 504
+    assert len(FakeServer.requests) == 1
@@ -0,0 +1,189 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from plone.releaser.base import Source
+from plone.releaser.forge import commits_between
+from plone.releaser.forge import GitHubBackend
+from plone.releaser.forge import parse_github_url
+from plone.releaser.package import Package
+from plone.releaser.tests.conftest import commit
+from plone.releaser.tests.conftest import FakeBuildout
+
+import git
+import json
+import pytest
+import threading
+
+
+def repository_data(repo, ref):
+    """Answer a GraphQL repository query from a local repository."""
+    try:
+        head = repo.commit(ref)
+    except (git.exc.BadName, ValueError):
+        return {"ref": None, "refs": {"nodes": []}}
+    history = []
+    for c in repo.iter_commits(ref, max_count=100):
+        history.append(
+            {
+                "oid": c.hexsha,
+                "messageHeadline": c.summary,
+                "message": c.message,
+                "author": {"name": c.author.name},
+                "parents": {"nodes": [{"oid": p.hexsha} for p in c.parents]},
+            }
+        )
+    tags = []
+    for tag in repo.tags:
+        if tag.tag is None:
+            target = {"oid": tag.commit.hexsha}
+        else:
+            target = {"oid": tag.tag.hexsha, "target": {"oid": tag.commit.hexsha}}
+        tags.append({"name": tag.name, "target": target})
+    return {
+        "ref": {"target": {"oid": head.hexsha, "history": {"nodes": history}}},
+        "refs": {"nodes": tags},
+    }
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Fake GitHub GraphQL server that answers from local repositories."""
+
+    # Map from (owner, name) to local repository path.
+    repositories = {}
+    # List of received variables, one per request.
+    requests = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        body = json.loads(self.rfile.read(length))
+        variables = body["variables"]
+        self.requests.append(variables)
+        data = {}
+        index = 0
+        while f"owner{index}" in variables:
+            key = (variables[f"owner{index}"], variables[f"name{index}"])
+            path = self.repositories.get(key)
+            if path is None:
+                data[f"r{index}"] = None
+            else:
+                ref = variables[f"ref{index}"]
+                data[f"r{index}"] = repository_data(git.Repo(path), ref)
+            index += 1
+        response = json.dumps({"data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github(upstream):
+    FakeGitHub.repositories = {("plone", "package"): upstream}
+    FakeGitHub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/graphql"
+    server.shutdown()
+    server.server_close()
+
+
+def make_package(name, version, url="https://github.com/plone/package.git"):
+    source = Source(name=name, protocol="git", url=url, branch="main")
+    return Package(FakeBuildout({name: source}, {name: version}), name)
+
+
+def test_parse_github_url():
+    assert parse_github_url("https://github.com/plone/plone.api.git") == (
+        "plone",
+        "plone.api",
+    )
+    assert parse_github_url("git@github.com:plone/plone.api.git") == (
+        "plone",
+        "plone.api",
+    )
+    assert parse_github_url("git://github.com/zopefoundation/Zope") == (
+        "zopefoundation",
+        "Zope",
+    )
+    assert parse_github_url("https://gitlab.com/plone/plone.api.git") is None
+    assert parse_github_url("/some/local/path") is None
+
+
+def test_commits_between():
+    def node(oid, *parents):
+        return {"oid": oid, "parents": {"nodes": [{"oid": p} for p in parents]}}
+
+    # d merges c and b, which both have a as parent.
+    history = [node("d", "c", "b"), node("c", "a"), node("b", "a"), node("a")]
+    assert [n["oid"] for n in commits_between(history, "a", "d")] == ["d", "c", "b"]
+    assert [n["oid"] for n in commits_between(history, "b", "d")] == ["d", "c"]
+    assert commits_between(history, "d", "d") == []
+    assert commits_between(history, "unknown", "d") is None
+
+
+def test_github_backend_scan(github, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = GitHubBackend(token="secret", url=github)
+    package = make_package("package", "1.0")
+    result = backend.scan(package)
+    assert result.latest_tag == "1.0"
+    assert [c.summary for c in result.commits_since_release] == [
+        "Add feature",
+        "Fix bug",
+    ]
+    assert result.commits_since_release[0].author == "Tester"
+
+
+def test_github_backend_prefetch_batches(github, upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repo = git.Repo(upstream)
+    commit(repo, "Release 1.1")
+    repo.create_tag("1.1", message="Annotated")
+    for index in range(5):
+        FakeGitHub.repositories[("plone", f"p{index}")] = upstream
+    packages = [
+        make_package(f"p{index}", "1.0", url=f"https://github.com/plone/p{index}")
+        for index in range(5)
+    ]
+    # This one is not on GitHub, so we leave it alone.
+    packages.append(make_package("other", "1.0", url="https://example.org/other"))
+    backend = GitHubBackend(token="secret", url=github, batch_size=2)
+    backend.prefetch(packages)
+    assert len(FakeGitHub.requests) == 3
+    for package in packages[:-1]:
+        result = backend.scan(package)
+        assert result.latest_tag == "1.1"
+        assert len(result.commits_since_release) == 3
+    # No new requests were needed.
+    assert len(FakeGitHub.requests) == 3
+    assert backend.scan(packages[-1]) is None
+
+
+def test_github_backend_falls_back(github, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = GitHubBackend(token="secret", url=github)
+    # This version is not tagged, so the backend cannot tell.
+    package = make_package("package", "0.1")
+    assert backend.scan(package) is None
+    # Unknown repository.
+    package = make_package("unknown", "1.0", url="https://github.com/plone/unknown")
+    assert backend.scan(package) is None
+
+
+def test_package_scan_with_forge(github, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def no_clone(*args, **kwargs):
+        raise AssertionError("We should not clone.")
+
+    monkeypatch.setattr("plone.releaser.package.git_repo", no_clone)
+    package = make_package("package", "1.0")
+    package.forge = GitHubBackend(token="secret", url=github)
+    result = package.scan()
+    assert len(result.commits_since_release) == 2
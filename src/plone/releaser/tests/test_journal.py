@@ -0,0 +1,63 @@
+from plone.releaser.journal import Journal
+from plone.releaser.package import ScanResult
+from plone.releaser.package_commands import _journaled
+
+
+class FakePackage:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_journal(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl")
+    assert journal.entries() == {}
+    assert journal.done() == set()
+    journal.record("plone.api")
+    journal.record("plone.restapi", error="Could not clone")
+    assert journal.done() == {"plone.api"}
+    assert journal.failed() == {"plone.restapi"}
+    assert journal.entries()["plone.restapi"]["error"] == "Could not clone"
+    # The last entry of a package wins.
+    journal.record("plone.restapi")
+    assert journal.done() == {"plone.api", "plone.restapi"}
+    assert journal.failed() == set()
+    journal.clear()
+    assert journal.entries() == {}
+    journal.clear()
+
+
+def test_journal_half_written_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path)
+    journal.record("plone.api")
+    with path.open("a") as journal_file:
+        journal_file.write('{"name": "plone.rest')
+    assert journal.done() == {"plone.api"}
+    # The next entry starts on a new line, so we can read it.
+    journal.record("plone.restapi")
+    assert journal.done() == {"plone.api", "plone.restapi"}
+
+
+def test_journaled(tmp_path):
+    journal = Journal(tmp_path / "journal.jsonl")
+    failed = ScanResult("plone.restapi")
+    failed.error = "Could not clone"
+    scanned = [
+        (FakePackage("plone.api"), ScanResult("plone.api")),
+        (FakePackage("plone.restapi"), failed),
+        (FakePackage("plone.rest"), None),
+    ]
+    for pkg, result in _journaled(scanned, journal):
+        # A package is recorded after it has been handled, not before.
+        assert pkg.name not in journal.entries()
+        if pkg.name == "plone.restapi":
+            # Stop halfway, like when the command crashes.
+            break
+    assert journal.done() == {"plone.api"}
+    assert journal.failed() == set()
+
+    # Resume: check the rest.
+    for pkg, result in _journaled(scanned[1:], journal):
+        pass
+    assert journal.done() == {"plone.api", "plone.rest"}
+    assert journal.failed() == {"plone.restapi"}
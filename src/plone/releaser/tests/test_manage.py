@@ -0,0 +1,64 @@
+from argh.constants import ATTR_NAME
+from plone.releaser.manage import COMMANDS
+from plone.releaser.manage import load_command
+
+import pytest
+import subprocess
+import sys
+
+# Modules that are slow to import, and that quick commands do not need.
+HEAVY_MODULES = ("argh", "docutils", "git", "progress", "xmlrpc", "zest")
+# Budget in microseconds for importing what a quick command needs.
+IMPORT_TIME_BUDGET = 200_000
+
+
+def import_times(code):
+    """Run the code with 'python -X importtime'.
+
+    Return a list of (module name, nesting level, cumulative import time
+    in microseconds).
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        # The name starts with a space, plus two spaces per nesting level.
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((name.strip(), level, int(cumulative)))
+    return times
+
+
+def test_command_names():
+    # The names in our registry must be the names that argh uses.
+    for name in COMMANDS:
+        function = load_command(name)
+        argh_name = getattr(function, ATTR_NAME, None)
+        assert name == argh_name or name == function.__name__.replace("_", "-")
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import plone.releaser.manage",
+        "from plone.releaser.manage import load_command; "
+        "load_command('get-package-version')",
+    ],
+)
+def test_import_time(code):
+    times = import_times(code)
+    heavy = [name for name, level, _ in times if name.split(".")[0] in HEAVY_MODULES]
+    assert heavy == []
+    # Count what we import, not the startup of Python itself.
+    total = sum(
+        cumulative
+        for name, level, cumulative in times
+        if level == 0 and name not in sys.stdlib_module_names
+    )
+    assert total < IMPORT_TIME_BUDGET
@@ -122,6 +122,15 @@ def test_constraints_file_set_cleanup_duplicates(tmp_path):
     assert copy_path.read_text().count("duplicate==1.0") == 0
 
 
+def test_constraints_file_set_normalized_name(tmp_path):
+    copy_path = tmp_path / "constraints.txt"
+    copy_path.write_text("plone.app.foo==1.0\nzope_bar==2.0\n")
+    cf = ConstraintsFile(copy_path)
+    cf["plone_app_foo"] = "2.0"
+    cf.update_many({"Zope.Bar": "3.0"})
+    assert copy_path.read_text() == "plone_app_foo==2.0\nZope.Bar==3.0\n"
+
+
 def test_constraints_file_extends():
     cf = ConstraintsFile(CONSTRAINTS_FILE)
     assert cf.extends == [
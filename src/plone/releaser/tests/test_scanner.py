@@ -0,0 +1,356 @@
+from plone.releaser.base import Source
+from plone.releaser.cache import RepoCache
+from plone.releaser.cache import ScanCache
+from plone.releaser.db import DB_FILENAME
+from plone.releaser.package import git_repo
+from plone.releaser.package import ls_remote
+from plone.releaser.package import Package
+from plone.releaser.package import ScanResult
+from plone.releaser.package_commands import _print_records
+from plone.releaser.package_commands import _sleep_between
+from plone.releaser.scanner import get_host
+from plone.releaser.scanner import Scanner
+from plone.releaser.tests.conftest import FakeBuildout
+
+import git
+import json
+import os
+import random
+import threading
+import time
+
+
+class FakePackage:
+    def __init__(self, name, url, fail=0):
+        self.name = name
+        self.source = Source(name=name, url=url)
+        self.fail = fail
+        self.calls = 0
+
+    def scan(self):
+        self.calls += 1
+        if self.calls <= self.fail:
+            raise git.exc.GitCommandError("clone", 128)
+        time.sleep(random.random() / 100)
+        return self.name
+
+
+def test_get_host():
+    assert get_host("https://github.com/plone/plone.api.git") == "github.com"
+    assert get_host("git@github.com:plone/plone.api.git") == "github.com"
+    assert get_host("github.com:plone/plone.api.git") == "github.com"
+    assert get_host("ssh://git@example.org:22/repo.git") == "example.org"
+
+
+def test_scan_all_keeps_order():
+    packages = [FakePackage(f"p{i}", f"https://host{i % 3}/p{i}") for i in range(20)]
+    scanner = Scanner(workers=8, per_host=2)
+    results = list(scanner.scan_all(packages))
+    assert [package for package, result in results] == packages
+    assert [result for package, result in results] == [p.name for p in packages]
+
+
+def test_scan_all_unordered():
+    class SlowPackage(FakePackage):
+        def scan(self):
+            time.sleep(0.2)
+            return self.name
+
+    # The first package is the slowest, so it should not come first.
+    packages = [SlowPackage("p0", "https://host0/p0")]
+    packages += [
+        FakePackage(f"p{i}", f"https://host{i % 3}/p{i}") for i in range(1, 20)
+    ]
+    scanner = Scanner(workers=8, per_host=2)
+    results = list(scanner.scan_all(packages, ordered=False))
+    assert sorted(result for package, result in results) == sorted(
+        p.name for p in packages
+    )
+    assert results[0][0] is not packages[0]
+    for package, result in results:
+        assert result == package.name
+
+
+def test_scan_all_per_host_limit():
+    lock = threading.Lock()
+    active = []
+    highest = []
+
+    class CountingPackage(FakePackage):
+        def scan(self):
+            with lock:
+                active.append(self)
+                highest.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(self)
+            return self.name
+
+    packages = [CountingPackage(f"p{i}", "https://github.com/p") for i in range(10)]
+    list(Scanner(workers=8, per_host=3).scan_all(packages))
+    assert max(highest) <= 3
+
+
+def test_scan_retries():
+    package = FakePackage("p", "https://github.com/p", fail=2)
+    scanner = Scanner(retries=3, backoff=0.01)
+    assert scanner.scan(package) == "p"
+    assert package.calls == 3
+    # After two failures and a success, the delay is going down again.
+    throttle = scanner.throttle("https://github.com/p")
+    assert throttle.delay == 0.01
+
+
+def test_scan_retries_backoff():
+    starts = []
+
+    class TimedPackage(FakePackage):
+        def scan(self):
+            starts.append(time.monotonic())
+            raise git.exc.GitCommandError("clone", 128)
+
+    package = TimedPackage("p", "https://github.com/p")
+    Scanner(retries=3, backoff=0.05).scan(package)
+    assert len(starts) == 4
+    # We wait before each retry, twice as long each time.
+    delays = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    for delay, expected in zip(delays, [0.05, 0.1, 0.2]):
+        assert delay >= expected * 0.9
+
+
+def test_scan_retries_exhausted():
+    package = FakePackage("p", "https://github.com/p", fail=5)
+    scanner = Scanner(retries=1, backoff=0.01)
+    result = scanner.scan(package)
+    assert package.calls == 2
+    assert result.name == "p"
+    assert "clone" in result.error
+
+
+def test_package_scan(upstream, tmp_path, monkeypatch):
+    # The database with ignored commits is created in the current directory.
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    result = Package(buildout, "package").scan()
+    assert result.error is None
+    assert result.latest_tag == "1.0"
+    assert [commit.summary for commit in result.commits_since_release] == [
+        "Add feature",
+        "Fix bug",
+    ]
+    assert result.commits_since_release[0].author == "Tester"
+    assert result.ignored_commit is None
+
+
+def test_package_report(upstream, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    package = Package(buildout, "package")
+    result = package.scan()
+    package(action="report", result=result)
+    captured = capsys.readouterr()
+    assert "WARNING: No auto-checkout exists for package" in captured.out
+    assert "Tester: Add feature" in captured.out
+
+
+def test_package_record(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    package = Package(buildout, "package")
+    result = package.scan()
+    assert package.scan_seconds > 0
+    record = package.record(result, seconds=1.5)
+    assert json.loads(json.dumps(record)) == record
+    assert record["name"] == "package"
+    assert record["version"] == "1.0"
+    assert record["latest_tag"] == "1.0"
+    assert record["newer_tag"] is False
+    assert [commit["summary"] for commit in record["interesting_commits"]] == [
+        "Add feature",
+        "Fix bug",
+    ]
+    assert record["interesting_commits"][0]["author"] == "Tester"
+    assert record["in_checkouts"] is False
+    assert record["checkout"] == "add"
+    assert record["third_party"] is False
+    assert record["seconds"] == 1.5
+
+    # Once we ignore the commits, nothing is interesting anymore.
+    package.commit_ignores.set("package", result.commits_since_release[0].hexsha)
+    buildout.checkouts["package"] = True
+    package = Package(buildout, "package")
+    record = package.record(package.scan())
+    assert record["interesting_commits"] == []
+    assert len(record["commits_since_release"]) == 2
+    assert record["checkout"] == "remove"
+    assert package.record(None)["status"] == "skipped"
+
+
+def test_package_ignores_in_coredev_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    coredev = tmp_path / "coredev"
+    coredev.mkdir()
+    source = Source(name="package", protocol="git", url="unused", branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    buildout.coredev_dir = coredev
+    package = Package(buildout, "package")
+    package.commit_ignores.set("package", "abc")
+    assert (coredev / DB_FILENAME).exists()
+    assert not (tmp_path / DB_FILENAME).exists()
+
+
+def test_print_records(upstream, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    package = Package(buildout, "package")
+    result = package.scan()
+    skipped = Package(buildout, "package")
+
+    def no_scan():
+        raise AssertionError("We should not scan again.")
+
+    skipped.scan = no_scan
+    _print_records([(package, result), (skipped, None)])
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["checkout"] == "add"
+    assert records[1]["status"] == "skipped"
+
+
+def test_sleep_between(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    fetched = ScanResult("fetched")
+    fetched.fetched = True
+    failed = ScanResult("failed")
+    failed.error = "Could not clone"
+    scanned = [
+        (FakePackage(result.name, "https://github.com/p"), result)
+        for result in (fetched, ScanResult("cached"), failed)
+    ]
+    scanned.append((FakePackage("skipped", "https://github.com/p"), None))
+    assert list(_sleep_between(scanned, 20.0)) == scanned
+    # We do not sleep after cache hits or skipped packages.
+    assert sleeps == [20.0, 20.0]
+
+
+def test_git_repo_without_checkout(upstream):
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    with git_repo(source) as repo:
+        assert repo.git.describe("--abbrev=0", "--tags") == "1.0"
+        assert not os.path.exists(os.path.join(repo.working_tree_dir, "README.rst"))
+
+
+def test_package_scan_with_cache(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    cache = RepoCache(tmp_path / "repos")
+    for _ in range(2):
+        result = Package(buildout, "package", repo_cache=cache).scan()
+        assert result.latest_tag == "1.0"
+        assert len(result.commits_since_release) == 2
+    assert cache.repo_path("package").exists()
+
+
+def test_ls_remote(upstream):
+    repo = git.Repo(upstream)
+    refs = ls_remote(str(upstream))
+    assert refs["refs/heads/main"] == repo.head.commit.hexsha
+    assert refs["refs/tags/1.0"] == repo.commit("1.0").hexsha
+
+
+def test_package_scan_unchanged(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repo = git.Repo(upstream)
+    # Make an annotated release tag at the head of the branch.
+    repo.create_tag("2.0", message="Release 2.0")
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "2.0"})
+    package = Package(buildout, "package")
+    assert package.unchanged_since_release()
+
+    def no_clone(*args, **kwargs):
+        raise AssertionError("We should not clone.")
+
+    monkeypatch.setattr("plone.releaser.package.git_repo", no_clone)
+    result = package.scan()
+    assert result.latest_tag == "2.0"
+    assert result.commits_since_release == []
+
+    # With an older version pinned, we do need to clone.
+    buildout.versions["package"] = "1.0"
+    package = Package(buildout, "package")
+    assert not package.unchanged_since_release()
+
+
+def test_package_scan_cache_new_tag(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    scan_cache = ScanCache(tmp_path / "scans")
+    result = Package(buildout, "package", scan_cache=scan_cache).scan()
+    assert result.latest_tag == "1.0"
+    # A release of the same head does not change the head, but the tags.
+    git.Repo(upstream).create_tag("1.1")
+    result = Package(buildout, "package", scan_cache=scan_cache).scan()
+    assert result.latest_tag == "1.1"
+    assert scan_cache.stats() == "Scan cache: 0 hits, 2 misses."
+
+
+def test_package_scan_without_ls_remote(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+
+    def no_ls_remote(url):
+        raise AssertionError("We should not call ls-remote.")
+
+    monkeypatch.setattr("plone.releaser.package.ls_remote", no_ls_remote)
+    scan_cache = ScanCache(tmp_path / "scans")
+    package = Package(buildout, "package", scan_cache=scan_cache, use_ls_remote=False)
+    result = package.scan()
+    assert result.fetched
+    assert len(result.commits_since_release) == 2
+    # Without the head of the branch, we cannot use the scan cache.
+    assert scan_cache.stats() == "Scan cache: 0 hits, 0 misses."
+
+
+def test_package_scan_cache(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    scan_cache = ScanCache(tmp_path / "scans")
+    result = Package(buildout, "package", scan_cache=scan_cache).scan()
+    assert len(result.commits_since_release) == 2
+    assert result.fetched
+    assert scan_cache.stats() == "Scan cache: 0 hits, 1 misses."
+
+    def no_clone(*args, **kwargs):
+        raise AssertionError("We should not clone.")
+
+    # Nothing has changed, so we use the previous result.
+    with monkeypatch.context() as patch:
+        patch.setattr("plone.releaser.package.git_repo", no_clone)
+        cached = Package(buildout, "package", scan_cache=scan_cache).scan()
+    assert [commit.summary for commit in cached.commits_since_release] == [
+        commit.summary for commit in result.commits_since_release
+    ]
+    assert not cached.fetched
+    assert scan_cache.stats() == "Scan cache: 1 hits, 1 misses."
+
+    # A new commit on the branch means we scan again.
+    repo = git.Repo(upstream)
+    repo.index.commit("Another fix")
+    result = Package(buildout, "package", scan_cache=scan_cache).scan()
+    assert len(result.commits_since_release) == 3
+    # Ignoring commits changes the key as well.
+    package = Package(buildout, "package", scan_cache=scan_cache)
+    package.commit_ignores.set("package", repo.head.commit.hexsha)
+    result = package.scan()
+    assert result.commits_since_ignore == []
+    assert scan_cache.stats() == "Scan cache: 1 hits, 3 misses."
@@ -0,0 +1,68 @@
+from plone.releaser.server import can_serve
+from plone.releaser.server import forward
+from plone.releaser.server import RequestHandler
+from plone.releaser.server import run_request
+
+import pathlib
+import shutil
+import socketserver
+import threading
+
+TESTS_DIR = pathlib.Path(__file__).parent
+INPUT_DIR = TESTS_DIR / "input"
+VERSIONS_FILE = INPUT_DIR / "versions.cfg"
+
+
+def test_can_serve():
+    assert can_serve(["get-package-version", "package"])
+    assert can_serve(["set-package-versions", "-"])
+    assert not can_serve(["report"])
+    assert not can_serve(["serve"])
+    assert not can_serve(["unknown"])
+    assert not can_serve([])
+
+
+def test_run_request(tmp_path):
+    shutil.copyfile(VERSIONS_FILE, tmp_path / "versions.cfg")
+    response = run_request(
+        {"args": ["get-package-version", "package"], "cwd": str(tmp_path)}
+    )
+    assert response == {
+        "stdout": "versions.cfg: package 1.0.\n",
+        "stderr": "",
+        "exit": 0,
+    }
+    # Read the pins from standard input.
+    response = run_request(
+        {
+            "args": ["set-package-versions", "-"],
+            "cwd": str(tmp_path),
+            "stdin": "package==2.0\n",
+        }
+    )
+    assert response["exit"] == 0
+    assert "package = 2.0" in (tmp_path / "versions.cfg").read_text()
+    # Errors in the arguments are reported.
+    response = run_request({"args": ["get-package-version"], "cwd": str(tmp_path)})
+    assert response["exit"] == 2
+    assert "error" in response["stderr"]
+
+
+def test_forward(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "socket")
+    # Without a server, the client returns None.
+    assert forward(["get-package-version", "package"], path) is None
+    shutil.copyfile(VERSIONS_FILE, tmp_path / "versions.cfg")
+    monkeypatch.chdir(tmp_path)
+    with socketserver.UnixStreamServer(path, RequestHandler) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            assert forward(["get-package-version", "package"], path) == 0
+            assert forward(["report"], path) == 2
+        finally:
+            server.shutdown()
+            thread.join()
+    captured = capsys.readouterr()
+    assert captured.out == "versions.cfg: package 1.0.\n"
+    assert "We do not serve this command: report" in captured.err
@@ -0,0 +1,56 @@
+from plone.releaser.buildout import VersionsFile
+from plone.releaser.manage import set_package_versions
+from plone.releaser.pip import ConstraintsFile
+
+import io
+import pathlib
+import shutil
+
+TESTS_DIR = pathlib.Path(__file__).parent
+INPUT_DIR = TESTS_DIR / "input"
+CONSTRAINTS_FILE = INPUT_DIR / "constraints.txt"
+VERSIONS_FILE = INPUT_DIR / "versions.cfg"
+PINS = """
+# Pins after a release sprint.
+package==2.0
+CAMELCASE = 2.1
+duplicate==2.2
+new==1.0
+"""
+
+
+def test_set_package_versions_all_files(tmp_path, monkeypatch):
+    shutil.copyfile(CONSTRAINTS_FILE, tmp_path / "constraints.txt")
+    shutil.copyfile(VERSIONS_FILE, tmp_path / "versions.cfg")
+    pins = tmp_path / "pins.txt"
+    pins.write_text(PINS)
+    monkeypatch.chdir(tmp_path)
+    set_package_versions(str(pins))
+    for constraints in (
+        ConstraintsFile(tmp_path / "constraints.txt"),
+        VersionsFile(tmp_path / "versions.cfg"),
+    ):
+        assert constraints["package"] == "2.0"
+        assert constraints["CamelCase"] == "2.1"
+        assert constraints["duplicate"] == "2.2"
+        # Without explicit path, we do not add new pins.
+        assert "new" not in constraints
+        # Other pins are kept.
+        assert constraints["lowercase"] == "1.0"
+    text = (tmp_path / "versions.cfg").read_text()
+    assert "CAMELCASE = 2.1" in text
+    assert text.count("duplicate") == 1
+    assert "[versions:python312]\nonepython = 2.1\npyspecific = 2.0" in text
+
+
+def test_set_package_versions_stdin(tmp_path, monkeypatch):
+    copy_path = tmp_path / "versions.cfg"
+    shutil.copyfile(VERSIONS_FILE, copy_path)
+    monkeypatch.setattr("sys.stdin", io.StringIO(PINS))
+    set_package_versions("-", path=str(copy_path))
+    vf = VersionsFile(copy_path)
+    assert vf["package"] == "2.0"
+    # With an explicit path, we add new pins in the versions section.
+    assert vf["new"] == "1.0"
+    text = copy_path.read_text()
+    assert "UPPERCASE = 1.0\nnew = 1.0\n\n[versions:python312]" in text
@@ -0,0 +1,69 @@
+from plone.releaser.base import Source
+from plone.releaser.package import Package
+from plone.releaser.tests.conftest import FakeBuildout
+from plone.releaser.timing import percentile
+from plone.releaser.timing import TIMINGS
+from plone.releaser.timing import Timings
+
+import json
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(reversed(values), 1.0) == 100
+    assert percentile([3], 0.95) == 3
+
+
+def test_timings(tmp_path):
+    timings = Timings()
+    with timings.phase("plone.api", "scan"):
+        pass
+    timings.count("plone.api", "commits walked")
+    # We only record when enabled.
+    assert timings.spans == []
+    assert timings.counters == {}
+    timings.enabled = True
+    assert timings.summary() == "Timings: nothing was timed."
+    with timings.phase("plone.api", "scan"):
+        with timings.phase("plone.api", "clone"):
+            pass
+    with timings.phase("plone.restapi", "scan"):
+        pass
+    with timings.phase("plone.restapi", "process"):
+        pass
+    timings.count("plone.api", "commits walked", 3)
+    timings.count("plone.restapi", "commits walked", 2)
+    assert len(timings.phase_durations()["scan"]) == 2
+    assert sorted(timings.package_durations()) == ["plone.api", "plone.restapi"]
+    summary = timings.summary()
+    assert "Timings of 2 packages" in summary
+    assert "clone" in summary
+    assert "           5 commits walked" in summary
+
+    path = tmp_path / "trace.json"
+    timings.write_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [event["name"] for event in events] == ["clone", "scan", "scan", "process"]
+    assert events[1]["ph"] == "X"
+    assert events[1]["args"] == {"package": "plone.api", "commits walked": 3}
+    assert events[0]["ts"] >= events[1]["ts"]
+    assert events[0]["dur"] <= events[1]["dur"]
+
+
+def test_package_timings(upstream, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(TIMINGS, "enabled", True)
+    TIMINGS.clear()
+    source = Source(name="package", protocol="git", url=str(upstream), branch="main")
+    buildout = FakeBuildout({"package": source}, {"package": "1.0"})
+    Package(buildout, "package").scan()
+    phases = {phase for package, phase, *rest in TIMINGS.spans}
+    assert {"config", "scan", "ls-remote", "clone", "describe", "iter commits"} <= (
+        phases
+    )
+    counters = TIMINGS.counters["package"]
+    assert counters["commits walked"] == 2
+    assert counters["bytes fetched"] > 0
@@ -1,6 +1,7 @@
 from plone.releaser.utils import update_contents
 
 import pathlib
+import pytest
 
 TESTS_DIR = pathlib.Path(__file__).parent
 INPUT_DIR = TESTS_DIR / "input"
@@ -8,6 +9,29 @@ INPUT_DIR = TESTS_DIR / "input"
 VERSIONS = (INPUT_DIR / "versions.cfg").read_text()
 
 
+def test_normalize_name():
+    from plone.releaser.utils import normalize_name
+
+    assert normalize_name("plone.api") == "plone-api"
+    assert normalize_name("Products.CMFPlone") == "products-cmfplone"
+    assert normalize_name("zope_interface") == "zope-interface"
+    assert normalize_name("a-_.b") == "a-b"
+
+
+def test_parse_pins():
+    from plone.releaser.utils import parse_pins
+
+    assert parse_pins("") == {}
+    assert parse_pins("# comment\n\na==1.0\nB = 2.0  # comment\n") == {
+        "a": "1.0",
+        "B": "2.0",
+    }
+    with pytest.raises(ValueError):
+        parse_pins("a\n")
+    with pytest.raises(ValueError):
+        parse_pins("a==\n")
+
+
 def test_buildout_marker_to_pip_marker():
     from plone.releaser.utils import buildout_marker_to_pip_marker as trans
 
@@ -83,3 +107,14 @@ def test_update_contents_versions_removes_duplicates():
     result = update_contents(VERSIONS, line_check, "duplicate = 2.0", "")
     assert "duplicate = 2.0" in result
     assert result.count("duplicate =") == 1
+
+
+def test_parse_size():
+    from plone.releaser.utils import parse_size
+
+    assert parse_size(0) == 0
+    assert parse_size("100") == 100
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5m") == 1.5 * 1024 * 1024
+    assert parse_size("2G") == 2 * 1024**3
+    assert parse_size("2GB") == 2 * 1024**3
@@ -0,0 +1,167 @@
+"""Timing of the phases of checking packages.
+
+We record how long each phase takes for each package, for example
+cloning, 'git describe', or waiting for an answer to a question.
+We also count things, like the bytes that we fetch.
+
+We only record anything when timing is enabled, so it costs nothing
+otherwise.  At the end of a report you can print a summary, and write
+a trace file in the Chrome trace event format.  You can open that file
+in chrome://tracing or https://ui.perfetto.dev to see what happened
+when, in which thread.
+"""
+
+from collections import Counter
+from collections import defaultdict
+from contextlib import contextmanager
+
+import json
+import math
+import os
+import threading
+import time
+
+# Phases that do not overlap: together they are the time spent on a package.
+# The other phases happen within these.
+PACKAGE_PHASES = ("config", "scan", "process", "sleep")
+
+
+def percentile(values, fraction):
+    """Return the percentile of the values, using the nearest rank.
+
+    For example a fraction of 0.95 gives the 95th percentile.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+class Timings:
+    """Durations of phases and counters per package.
+
+    This is safe to use from several threads.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.clear()
+
+    def clear(self):
+        # List of (package, phase, start, seconds, thread id).
+        self.spans = []
+        # Map from package to a Counter.
+        self.counters = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, package, phase):
+        """Record how long the code within this context manager takes."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.spans.append(
+                    (package, phase, start, seconds, threading.get_ident())
+                )
+
+    def count(self, package, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[package][name] += amount
+
+    def phase_durations(self):
+        """Return a map from phase to a list of durations in seconds."""
+        durations = defaultdict(list)
+        for package, phase, start, seconds, thread in self.spans:
+            durations[phase].append(seconds)
+        return durations
+
+    def package_durations(self):
+        """Return a map from package to the seconds spent on it."""
+        durations = Counter()
+        for package, phase, start, seconds, thread in self.spans:
+            if phase in PACKAGE_PHASES:
+                durations[package] += seconds
+        return durations
+
+    def summary(self, slowest=10):
+        """Return a table with the timings, as text."""
+        if not self.spans:
+            return "Timings: nothing was timed."
+        first = min(span[2] for span in self.spans)
+        last = max(span[2] + span[3] for span in self.spans)
+        packages = self.package_durations()
+        lines = [
+            f"Timings of {len(packages)} packages in {last - first:.2f} seconds.",
+            f"{'Phase':<16} {'count':>6} {'total':>9} {'p50':>8} {'p95':>8} {'max':>8}",
+        ]
+        for phase, durations in sorted(self.phase_durations().items()):
+            lines.append(
+                f"{phase:<16} {len(durations):>6} {sum(durations):>8.2f}s "
+                f"{percentile(durations, 0.5):>7.3f}s "
+                f"{percentile(durations, 0.95):>7.3f}s "
+                f"{max(durations):>7.3f}s"
+            )
+        lines.append("Slowest packages:")
+        for package, seconds in packages.most_common(slowest):
+            lines.append(f"{seconds:>8.2f}s {package}")
+        totals = Counter()
+        for counter in self.counters.values():
+            totals.update(counter)
+        if totals:
+            lines.append("Counters:")
+            for name, total in sorted(totals.items()):
+                lines.append(f"{total:>12} {name}")
+        return "\n".join(lines)
+
+    def trace_events(self):
+        """Return the spans and counters as Chrome trace events."""
+        pid = os.getpid()
+        events = []
+        for package, phase, start, seconds, thread in self.spans:
+            event = {
+                "name": phase,
+                "cat": "package",
+                "ph": "X",
+                "ts": start * 1_000_000,
+                "dur": seconds * 1_000_000,
+                "pid": pid,
+                "tid": thread,
+                "args": {"package": package},
+            }
+            if phase == "scan" and package in self.counters:
+                event["args"].update(self.counters[package])
+            events.append(event)
+        return events
+
+    def write_trace(self, path):
+        """Write a trace file in the Chrome trace event format."""
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": self.trace_events()}, trace_file)
+
+
+# Timings of this process, shared by all packages.
+TIMINGS = Timings()
+
+
+def phase(package, name):
+    """Time a phase of checking this package, see Timings.phase."""
+    return TIMINGS.phase(package, name)
+
+
+def count(package, name, amount=1):
+    """Count something for this package, for example the commits we walk."""
+    TIMINGS.count(package, name, amount)
+
+
+def enabled():
+    """Are we timing?  Use this to skip measuring when we are not."""
+    return TIMINGS.enabled
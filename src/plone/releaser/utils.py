@@ -1,3 +1,17 @@
+import re
+
+# Runs of characters that PEP 503 treats as the same.
+NORMALIZE_RE = re.compile(r"[-_.]+")
+
+
+def normalize_name(name):
+    """Normalize a package name like PEP 503 does.
+
+    So 'Plone.App-Foo' and 'plone_app.foo' are the same package.
+    """
+    return NORMALIZE_RE.sub("-", name).lower()
+
+
 def buildout_marker_to_pip_marker(marker):
     """Translate a Buildout marker to a pip marker.
 
@@ -142,3 +156,49 @@ def update_contents(
     if not result.endswith("\n"):
         result += "\n"
     return result
+
+
+def parse_pins(text):
+    """Parse version pins from text.
+
+    We accept one pin per line, in pip or Buildout style:
+
+        package==1.0
+        other = 2.0
+
+    Empty lines and comments are ignored.
+    Returns a dictionary from package name to version.
+    """
+    pins = {}
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if "==" in line:
+            package, version = line.split("==", 1)
+        elif "=" in line:
+            package, version = line.split("=", 1)
+        else:
+            raise ValueError(f"Cannot parse version pin: {line}")
+        package = package.strip()
+        version = version.strip()
+        if not package or not version:
+            raise ValueError(f"Cannot parse version pin: {line}")
+        pins[package] = version
+    return pins
+
+
+def parse_size(size):
+    """Parse a size like '500M' or '2G' into a number of bytes.
+
+    A plain number is taken as bytes.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    size = size.strip().upper()
+    if size.endswith("B"):
+        size = size[:-1]
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)